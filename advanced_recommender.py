@@ -5,29 +5,221 @@ OpenDigger高级推荐系统 - 支持GitHub仓库分析和动态项目发现
 import requests
 import json
 import os
+import re
 import time
+import threading
 from datetime import datetime, timedelta
 from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 import hashlib
+import heapq
+from functools import partial
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import cache_codec
+import catalog_snapshot
+import parallel_scoring
+import pipeline_metrics
+import trace_spans
+from cache_gc import sharded_path
+from cache_lease import CacheLease
+from circuit_breaker import CircuitOpenError, HostCircuitBreakers, STATE_VALUES
+from costar_index import load_index as load_costar_index
+from heavy_hitters import SpaceSaving
+from ranking_pages import CompactRanking, CursorError, RankingStore, catalog_fingerprint
+from recommendation import BREAKDOWN_KEYS, Recommendation
+from skill_vocabulary import SkillVocabulary, CANONICAL_TERMS
+from github_graphql import GitHubGraphQLBackend
 
 class AdvancedOpenDiggerRecommender:
-    def __init__(self, github_token=None):
-        self.opendigger_url = "https://oss.x-lab.info/open_digger/github"
-        self.github_api = "https://api.github.com"
+    # GitHub用户名规则（用户名会拼进画像状态文件路径，不合规的一律拒绝）
+    USERNAME_PATTERN = re.compile(r'[A-Za-z0-9](?:[A-Za-z0-9-]{0,38})')
+    # 用户画像状态（增量刷新）
+    PROFILE_STATE_VERSION = 1
+    MAX_PROFILE_REPOS = 100
+    MAX_PROFILE_STARRED = 40
+    # 流式提取（超大账户）：高频项草图容量和每个技能保留的示例仓库数
+    SKILL_SKETCH_CAPACITY = 200
+    INTEREST_SKETCH_CAPACITY = 500
+    MAX_SKILL_EXAMPLES = 10
+    # 全量历史分析时每个列表最多拉取的页数（每页100条）
+    FULL_HISTORY_MAX_PAGES = 300
+    # 进程内存缓存条目上限（常驻服务中跨请求复用）
+    MEMORY_CACHE_SIZE = 4096
+    # 推荐结果缓存条目上限
+    RECOMMENDATION_CACHE_SIZE = 1024
+    # 分页推荐：保存的排序结果总条数上限（每条约90字节）和游标有效期（秒）
+    RANKING_STORE_ITEMS = 200000
+    RANKING_CURSOR_TTL = 600
+    # 磁盘/内存缓存有效期（秒）
+    GITHUB_CACHE_TTL = 3600
+    OPENDIGGER_CACHE_TTL = 86400
+    # 负缓存有效期（秒）：404（不存在/未收录）和请求失败分别缓存
+    NOT_FOUND_CACHE_TTL = 1800
+    FAILURE_CACHE_TTL = 60
+    # 按主机熔断：连续失败次数阈值和熔断冷却时间（秒）
+    CIRCUIT_FAILURE_THRESHOLD = 5
+    CIRCUIT_RESET_TIMEOUT = 30
+    # 缓存回填租约有效期（需大于一次回填的最长耗时）和未取得租约时的最长等待时间（秒）
+    CACHE_LEASE_TTL = 60
+    CACHE_LEASE_WAIT = 15
+    # 缓存命中的访问时间批量写回文件（供缓存回收按LRU淘汰）：累计条数或间隔（秒）达到其一即写回
+    CACHE_ACCESS_FLUSH_SIZE = 1000
+    CACHE_ACCESS_FLUSH_INTERVAL = 60
+    # 带截止时间推荐时并发抓取缺失指标的线程数
+    DEADLINE_FETCH_WORKERS = 8
+    # GitHub负缓存条目的标记字段
+    NEGATIVE_CACHE_KEY = '__negative__'
+    
+    # 评分规则中的技能/兴趣/标签按小写写法比较（启用别名时按规范术语比较，见 skill_vocabulary），启动时编译为编号集合
+    # 热门技能：直接匹配额外加分
+    HOT_SKILLS = ('python', 'javascript', '机器学习', '数据科学', '前端开发')
+    # 大赛工具相关技能：直接匹配大赛工具时额外加分
+    COMPETITION_TOOL_SKILLS = ('java', 'javascript', '数据可视化', '大数据', '物联网')
+    # 相关技能匹配时额外加分的技能
+    HOT_RELATED_SKILLS = ('python', 'javascript', '机器学习')
+    # 技能组：用户和项目都命中同组两项以上时按共同技能加分
+    SKILL_GROUPS = (
+        ('python', '机器学习', '数据科学'),
+        ('javascript', '前端开发', 'react', 'vue'),
+        ('java', '后端开发', 'spring'),
+        ('大数据', '物联网', '数据分析')
+    )
+    # 兴趣类别 -> 相关标签
+    INTEREST_CATEGORIES = {
+        'web开发': ('javascript', 'react', 'vue', '前端', 'web'),
+        '数据科学': ('python', '数据分析', '机器学习', 'ai', '数据科学'),
+        'ai/机器学习': ('ai', '机器学习', '深度学习', '神经网络', 'python'),
+        '物联网': ('iot', '物联网', '传感器', '嵌入式')
+    }
+    # 热门技术栈加分
+    HOT_TECH_POINTS = {
+        '机器学习': 15, 'ai/人工智能': 15, '数据科学': 12, 'python': 10, 'javascript': 10,
+        'react': 8, 'vue': 8, '大数据': 10, '物联网': 8
+    }
+    # 大赛工具专项：(项目标签, 用户技能)，两边都命中时加分（项目标签按原样写法比较）
+    COMPETITION_SKILL_RULES = (
+        (('dataease', '数据可视化'), ('数据可视化', '数据分析', 'javascript', 'java')),
+        (('iotdb', '时序数据库', '物联网'), ('大数据', '物联网', 'java', '数据库')),
+        (('open-digger', '开源分析'), ('数据分析', 'javascript', '开源分析'))
+    )
+    # 排序时加强的热门兴趣（按原样写法比较）
+    HOT_INTERESTS = ('AI/机器学习', '数据科学', 'Web开发', '开源工具')
+    # 基于兴趣扩展技能：(兴趣中的关键字, 补充技能)，按顺序只应用第一条命中的规则；
+    # 补充技能中的每组候选都未出现时才补充该组第一个
+    INTEREST_SKILL_RULES = (
+        (('数据', '分析'), (('Python',), ('数据科学',), ('机器学习',))),
+        (('web', '前端'), (('JavaScript',), ('前端开发',))),
+        (('ai', '机器学习', '人工智能'), (('Python',), ('机器学习',))),
+        (('后端',), (('Python', 'Java'), ('后端开发',))),
+        (('物联网', 'iot'), (('大数据',), ('Java',))),
+        (('可视化',), (('数据可视化',), ('JavaScript',)))
+    )
+    # 协同加成：与用户已star仓库的共同star亲和度 × 权重，上限（见 costar_index）
+    COSTAR_BONUS_WEIGHT = 25
+    COSTAR_BONUS_MAX = 20
+    
+    def __init__(self, github_token=None, github_backend='rest', cache_compression=None,
+                 github_api=None, opendigger_url=None, profile_dir=None, transport=None,
+                 snapshot=None, skill_aliases=False, costar_index=None, shared_rankings=False):
+        self.opendigger_url = opendigger_url or "https://oss.x-lab.info/open_digger/github"
+        self.github_api = github_api or "https://api.github.com"
         self.github_token = github_token
         self.headers = {"User-Agent": "OpenDigger-Recommender"}
         if github_token:
             self.headers["Authorization"] = f"token {github_token}"
         
-        # 初始化项目数据库（增强版）
-        self.project_db = self._initialize_enhanced_project_database()
+        # 流水线指标（HTTP请求、缓存命中、各阶段耗时）
+        self.metrics = pipeline_metrics.MetricsRegistry()
+        self._http_requests = self.metrics.counter(
+            'recommender_http_requests_total', 'HTTP请求数（按主机和状态码）', ('host', 'status'))
+        self._http_latency = self.metrics.histogram(
+            'recommender_http_request_duration_seconds', 'HTTP请求耗时（秒）', ('host',))
+        self._rate_limit_remaining = self.metrics.gauge(
+            'recommender_rate_limit_remaining', '上游返回的剩余API配额', ('host',))
+        self._cache_requests = self.metrics.counter(
+            'recommender_cache_requests_total', '缓存查询数（hit/stale/expired/miss）', ('cache', 'result'))
+        self._stage_latency = self.metrics.histogram(
+            'recommender_stage_duration_seconds', '流水线各阶段耗时（秒）', ('stage',))
+        self._circuit_state = self.metrics.gauge(
+            'recommender_circuit_state', '按主机的熔断状态（0关闭 1熔断 2探测中）', ('host',))
+        
+        # 按主机熔断：上游故障时快速失败，只偶尔放行探测请求
+        self.circuit_breakers = HostCircuitBreakers(self.CIRCUIT_FAILURE_THRESHOLD,
+                                                    self.CIRCUIT_RESET_TIMEOUT)
+        
+        # HTTP发送函数，签名同 requests.request；可替换为录制/回放transport（见 http_replay）
+        self.transport = transport or requests.request
+        
+        # 缓存预热用：忽略已有缓存，所有数据重新抓取并写回缓存（见 cache_warmer）
+        self.force_refresh = False
+        # 在画像状态中记录访问次数和最近访问时间，供缓存预热挑选热门用户
+        self.track_access = True
+        # 项目指标刷新后的回调 listener(repo, metrics)，如健康度排行榜（见 health_leaderboard）
+        self.metrics_listeners = []
+        
+        # 按请求的性能剖析：设置目录后每次分析/推荐输出一个Chrome trace文件
+        self.profile_dir = profile_dir
+        
+        # GitHub数据后端：rest（默认）或 graphql（一次查询获取整个画像，需要Token）
+        self.graphql_backend = None
+        self._prefetched_sources = {}
+        if github_backend == 'graphql':
+            if github_token:
+                self.graphql_backend = GitHubGraphQLBackend(
+                    github_token, graphql_url=f"{self.github_api}/graphql", headers=self.headers
+                )
+                self.graphql_backend.http_post = partial(self._http_request, 'POST')
+            else:
+                print("⚠️ GraphQL后端需要GitHub Token，改用REST接口")
         
-        # 增强技能图谱（高权重）
-        self.skill_graph = self._build_enhanced_skill_graph()
+        # 初始化项目数据库（增强版）；从快照启动时直接使用快照中编译好的目录
+        self.project_db = self._initialize_enhanced_project_database() if snapshot is None else {}
         
-        # 缓存
+        # 增强技能图谱（高权重）
+        self.skill_graph = self._build_enhanced_skill_graph() if snapshot is None else {}
+        
+        # 技能词表：画像和目录标签在评分前各编译一次，评分只做整数集合运算
+        # skill_aliases为True时按规范术语匹配不同写法（会改变现有分数，见 skill_vocabulary）
+        self.vocabulary = SkillVocabulary(CANONICAL_TERMS if skill_aliases else None)
+        self._scoring_rules = self._compile_scoring_rules()
+        self._compiled_catalog_terms = None
+        
+        # 共同star相似度索引（文件路径或已加载的 CoStarIndex），离线构建，提供协同过滤加成
+        if isinstance(costar_index, str):
+            costar_index = load_costar_index(costar_index)
+        self.costar_index = costar_index
+        
+        # 缓存（紧凑JSON，可选 'zlib' / 'gzip' 压缩）
+        self.cache_compression = cache_compression
+        self._memory_cache = {}
+        self._memory_cache_lock = threading.Lock()
+        # 缓存命中的访问时间（批量写回文件，供缓存回收按LRU淘汰）
+        self._cache_access = {}
+        self._cache_access_flushed = time.time()
+        self._cache_access_lock = threading.Lock()
+        # 刷新失败、暂时沿用上次正常数据的缓存文件（只在内存中记录，磁盘上的正常缓存不被覆盖）
+        self._stale_cache_files = set()
+        
+        # 推荐结果缓存（按画像指纹 + 目录/指标版本）
+        self.catalog_version = 0
+        self.metrics_version = 0
+        self._recommendation_cache = {}
+        self._recommendation_cache_lock = threading.Lock()
+        # 分页推荐的紧凑排序（按游标取后续页）；shared_rankings时写入缓存目录供其他服务进程读取
+        self.rankings = RankingStore(self.RANKING_STORE_ITEMS, self.RANKING_CURSOR_TTL,
+                                     directory="cache" if shared_rankings else None)
+        self._catalog_positions = None
         os.makedirs("cache", exist_ok=True)
         os.makedirs("user_data", exist_ok=True)
+        
+        # 预热快照（文件路径或已解码的快照）：装入目录、词表、编译好的标签和指标，省去首个请求的预热
+        if snapshot is not None:
+            if isinstance(snapshot, str):
+                snapshot = catalog_snapshot.load_snapshot(snapshot)
+            catalog_snapshot.apply_snapshot(self, snapshot)
     
     def _initialize_enhanced_project_database(self):
         """初始化增强版项目数据库"""
@@ -205,10 +397,23 @@ class AdvancedOpenDiggerRecommender:
             }
         }
     
-    def analyze_github_user(self, username):
-        """深度分析GitHub用户 - 增强版"""
+    def analyze_github_user(self, username, incremental=True, deadline=None, full_history=False):
+        """
+        深度分析GitHub用户 - 增强版（支持基于水位线的增量刷新）
+        deadline: 截止时间（time.time()时间戳）；到时仍未返回的数据源沿用已保存的状态或默认值，
+                  并记录在画像的 degraded_sources 中
+        full_history: 流式分析全部仓库和starred（不限于最近的窗口），技能和兴趣用固定容量的草图统计，
+                      适合仓库、star数以万计的账户和组织
+        用户名不符合GitHub规则时抛出ValueError
+        """
+        self._check_username(username)
+        with self._request_profiling('analyze'), trace_spans.span('analyze_github_user', username=username):
+            return self._analyze_github_user(username, incremental, deadline, full_history)
+    
+    def _analyze_github_user(self, username, incremental, deadline=None, full_history=False):
+        """深度分析GitHub用户"""
+        started = time.perf_counter()
         print(f"🔍 深度分析GitHub用户: {username}")
-        print("正在获取用户数据...")
         
         user_profile = {
             'username': username,
@@ -223,65 +428,27 @@ class AdvancedOpenDiggerRecommender:
             'analysis_time': datetime.now().isoformat()
         }
         
+        timed_out = []
         try:
-            # 1. 获取用户基础信息
-            user_info = self._fetch_github_data(f"/users/{username}")
-            if user_info:
-                user_profile['name'] = user_info.get('name', username)
-                user_profile['bio'] = user_info.get('bio', '')
-                user_profile['public_repos'] = user_info.get('public_repos', 0)
-                user_profile['followers'] = user_info.get('followers', 0)
-                print(f"  👤 {user_profile['name']} - {user_profile['bio'][:50] if user_profile['bio'] else '暂无简介'}")
-            
-            # 2. 获取用户仓库（分析技术栈）
-            print("  分析用户仓库...")
-            repos = self._fetch_github_data(f"/users/{username}/repos?per_page=100&sort=updated")
-            if repos:
-                # 分析技术栈
-                skill_analysis = self._extract_enhanced_skills_from_repos(repos)
-                user_profile['skills'] = skill_analysis['primary']
-                user_profile['detailed_skills'] = skill_analysis['detailed']
-                user_profile['recent_repos'] = [repo['full_name'] for repo in repos[:10]]
-                
-                # 分析经验等级
-                user_profile['experience_level'] = self._assess_enhanced_experience_level(repos)
-                user_profile['activity_score'] = self._calculate_activity_score(repos)
-                
-                if user_profile['skills']:
-                    print(f"  发现技能: {', '.join(user_profile['skills'][:8])}")
-                else:
-                    print("  未发现技能，使用默认技能")
-                    user_profile['skills'] = ['Python', 'JavaScript', '开源开发', 'Git', '前端开发', '后端开发']
+            # 已有画像状态时只拉取上次分析之后变化的数据
+            state = self._load_profile_state(username) if incremental else None
+            if state:
+                print("正在增量刷新用户数据...")
+                state = self._refresh_profile_state(username, state, deadline, timed_out)
             else:
-                print("  无仓库数据，使用默认技能")
-                user_profile['skills'] = ['Python', 'JavaScript', '开源开发', 'Git', '前端开发', '后端开发']
+                print("正在获取用户数据...")
+                state = self._build_profile_state(username, deadline, timed_out)
             
-            # 3. 获取starred项目（分析兴趣）
-            print("  分析starred项目...")
-            starred = self._fetch_github_data(f"/users/{username}/starred?per_page=60")
-            if starred:
-                user_profile['starred_repos'] = [repo['full_name'] for repo in starred[:30]]
-                user_profile['interests'] = self._extract_enhanced_interests_from_starred(starred)
-                
-                if user_profile['interests']:
-                    print(f"  发现兴趣: {', '.join(user_profile['interests'][:6])}")
-                else:
-                    print("  未发现兴趣，使用默认兴趣")
-                    user_profile['interests'] = ['开源工具', 'Web开发', '数据科学', 'AI/机器学习', '云计算']
-            else:
-                print("  无starred数据，使用默认兴趣")
-                user_profile['interests'] = ['开源工具', 'Web开发', '数据科学', 'AI/机器学习', '云计算']
-            
-            # 4. 获取用户关注的项目（following）
-            following = self._fetch_github_data(f"/users/{username}/following?per_page=30")
-            if following:
-                user_profile['following_users'] = [user['login'] for user in following]
-            
-            # 5. 技能扩展（基于兴趣）
-            user_profile['skills'] = self._extend_skills_based_on_interests(
-                user_profile['skills'], 
-                user_profile['interests']
-            )
+            self._apply_profile_state(user_profile, state)
+            if full_history:
+                self._apply_full_history(user_profile, username, deadline, timed_out)
+            if timed_out:
+                user_profile['degraded_sources'] = sorted(timed_out)
+            if self.track_access:
+                access = state.setdefault('access', {'count': 0, 'last_accessed': None})
+                access['count'] += 1
+                access['last_accessed'] = time.time()
+            self._save_profile_state(state)
             
             print(f"✅ 分析完成! 技能数: {len(user_profile['skills'])}")
             print(f"   经验等级: {user_profile['experience_level']}")
@@ -297,71 +464,461 @@ class AdvancedOpenDiggerRecommender:
             user_profile['experience_level'] = 'intermediate'
             user_profile['activity_score'] = 50
         
+        self._stage_latency.observe(time.perf_counter() - started, stage='analyze_github_user')
         return user_profile
     
-    def _extract_enhanced_skills_from_repos(self, repos):
-        """从仓库中提取增强版技能"""
-        skills_counter = Counter()
-        detailed_skills = defaultdict(list)
+    # ========== 用户画像状态（增量刷新） ==========
+    
+    def _check_username(self, username):
+        """校验GitHub用户名，防止拼接出user_data之外的文件路径"""
+        if not isinstance(username, str) or not self.USERNAME_PATTERN.fullmatch(username):
+            raise ValueError(f"无效的GitHub用户名: {username!r}")
+    
+    def _profile_state_file(self, username):
+        """用户画像状态文件路径"""
+        self._check_username(username)
+        return f"user_data/state_{username}.json"
+    
+    def _load_profile_state(self, username):
+        """读取持久化的用户画像状态"""
+        state_file = self._profile_state_file(username)
+        if not os.path.exists(state_file):
+            return None
         
-        for repo in repos:
-            # 编程语言（权重最高）
-            language = repo.get('language')
-            if language:
-                skills_counter[language] += 5
-                detailed_skills[language].append(repo['full_name'])
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if state.get('version') != self.PROFILE_STATE_VERSION:
+            return None
+        return state
+    
+    def _save_profile_state(self, state):
+        """保存用户画像状态"""
+        state['watermarks']['analyzed_at'] = datetime.now().isoformat()
+        try:
+            cache_codec.atomic_write(self._profile_state_file(state['username']),
+                                     json.dumps(state, ensure_ascii=False, indent=2).encode('utf-8'))
+        except OSError:
+            pass
+    
+    def _build_profile_state(self, username, deadline=None, timed_out=None):
+        """全量构建用户画像状态（四个数据源并发获取）"""
+        state = {
+            'version': self.PROFILE_STATE_VERSION,
+            'username': username,
+            'user_info': None,
+            'repos': [],
+            'skill_counter': {},
+            'starred': [],
+            'interest_counter': {},
+            'following_users': [],
+            'watermarks': {
+                'repos_updated_at': None,
+                'starred_cursor': None,
+                'analyzed_at': None
+            }
+        }
+        
+        tasks = {
+            # 1. 用户基础信息
+            'user_info': lambda: self._fetch_github_data(f"/users/{username}"),
+            # 2. 用户仓库（分析技术栈）
+            'repos': lambda: self._fetch_github_data(f"/users/{username}/repos?per_page=100&sort=updated"),
+            # 3. starred项目（分析兴趣）
+            'starred': lambda: self._fetch_github_data(f"/users/{username}/starred?per_page=60"),
+            # 4. 用户关注的项目（following）
+            'following': lambda: self._fetch_github_data(f"/users/{username}/following?per_page=30")
+        }
+        
+        # GraphQL后端一次返回全部数据源；否则REST并发获取，哪个数据源先返回就先分析哪个
+        sources = self._fetch_graphql_sources(username) if self.graphql_backend else None
+        results = sources.items() if sources is not None else \
+            self._fetch_concurrently(tasks, deadline, timed_out)
+        
+        for source, data in results:
+            if not data:
+                continue
+            if source == 'user_info':
+                state['user_info'] = self._compact_user_info(data)
+            elif source == 'repos':
+                self._apply_repo_delta(state, data, replace_all=True)
+            elif source == 'starred':
+                self._apply_starred_delta(state, data, replace_all=True)
+            elif source == 'following':
+                state['following_users'] = [user['login'] for user in data]
+        
+        return state
+    
+    def _refresh_profile_state(self, username, state, deadline=None, timed_out=None):
+        """增量刷新用户画像状态：只拉取水位线之后的变化并应用增量"""
+        # 增量刷新不使用GraphQL预取结果，丢弃可能残留的条目
+        self._prefetched_sources.pop(username, None)
+        watermarks = state['watermarks']
+        previous_info = state.get('user_info') or {}
+        
+        # 仓库：按更新时间倒序分页，遇到水位线即停止；无水位线时全量获取
+        repos_watermark = watermarks.get('repos_updated_at')
+        if repos_watermark is None:
+            fetch_repos = lambda: self._fetch_github_data(f"/users/{username}/repos?per_page=100&sort=updated")
+        else:
+            fetch_repos = lambda: self._fetch_github_pages(
+                f"/users/{username}/repos?sort=updated",
+                stop=lambda repo: (repo.get('updated_at') or '') <= repos_watermark,
+                max_items=self.MAX_PROFILE_REPOS
+            )
+        
+        # starred：按star时间倒序分页，遇到游标即停止；无游标时全量获取
+        cursor = watermarks.get('starred_cursor')
+        if cursor is None:
+            fetch_starred = lambda: self._fetch_github_data(f"/users/{username}/starred?per_page=60")
+        else:
+            fetch_starred = lambda: self._fetch_github_pages(
+                f"/users/{username}/starred",
+                stop=lambda repo: repo.get('full_name') == cursor,
+                max_items=self.MAX_PROFILE_STARRED
+            )
+        
+        tasks = {
+            'user_info': lambda: self._fetch_github_data(f"/users/{username}"),
+            'repos': fetch_repos,
+            'starred': fetch_starred,
+            # following只有一页，直接刷新
+            'following': lambda: self._fetch_github_data(f"/users/{username}/following?per_page=30")
+        }
+        
+        repos_deleted = False
+        for source, data in self._fetch_concurrently(tasks, deadline, timed_out):
+            if source == 'user_info':
+                if data:
+                    state['user_info'] = self._compact_user_info(data)
+                    repos_deleted = data.get('public_repos', 0) < previous_info.get('public_repos', 0)
+            elif source == 'repos':
+                if data:
+                    self._apply_repo_delta(state, data, replace_all=repos_watermark is None)
+                if repos_watermark is not None:
+                    print(f"  仓库增量: {len(data or [])} 个")
+            elif source == 'starred':
+                if data:
+                    self._apply_starred_delta(state, data, replace_all=cursor is None)
+                if cursor is not None:
+                    print(f"  starred增量: {len(data or [])} 个")
+            elif source == 'following':
+                if data:
+                    state['following_users'] = [user['login'] for user in data]
+        
+        # 有仓库被删除时增量无法感知，仓库来源需要全量重建（已超出时间预算时留到下次）
+        if repos_deleted and repos_watermark is not None and (deadline is None or time.time() < deadline):
+            repos = self._fetch_github_data(f"/users/{username}/repos?per_page=100&sort=updated")
+            if repos:
+                self._apply_repo_delta(state, repos, replace_all=True)
+        
+        return state
+    
+    def prefetch_profiles(self, usernames, incremental=True):
+        """
+        使用GraphQL后端把多个用户合并查询，预取画像数据
+        预取结果只在全量构建时使用：incremental为True时跳过已有画像状态的用户（它们走REST增量刷新）
+        """
+        if not self.graphql_backend:
+            return 0
+        
+        usernames = [username for username in usernames
+                     if isinstance(username, str) and self.USERNAME_PATTERN.fullmatch(username)]
+        if incremental:
+            usernames = [username for username in usernames if self._load_profile_state(username) is None]
+        if not usernames:
+            return 0
+        
+        try:
+            results = self.graphql_backend.fetch_profiles(usernames)
+        except Exception as e:
+            print(f"⚠️ GraphQL批量预取失败: {e}")
+            return 0
+        
+        self._prefetched_sources.update(results)
+        return len(results)
+    
+    def _fetch_graphql_sources(self, username):
+        """通过GraphQL获取单个用户的四个数据源；失败时返回None以回退REST"""
+        if username in self._prefetched_sources:
+            data = self._prefetched_sources.pop(username)
+        else:
+            try:
+                data = self.graphql_backend.fetch_profiles([username]).get(username)
+            except Exception as e:
+                print(f"⚠️ GraphQL获取失败，改用REST接口: {e}")
+                return None
+        
+        # 用户不存在：所有数据源为空，沿用各自的默认值
+        if data is None:
+            return {'user_info': None, 'repos': None, 'starred': None, 'following': None}
+        return data
+    
+    def _fetch_concurrently(self, tasks, deadline=None, timed_out=None):
+        """
+        并发执行互不依赖的抓取任务，按完成顺序产出 (名称, 结果)
+        到达deadline时不再等待：未完成的任务产出None并记入timed_out，在后台继续执行（结果写入缓存供下次使用）
+        """
+        executor = ThreadPoolExecutor(max_workers=len(tasks))
+        futures = {executor.submit(trace_spans.bind(func)): name for name, func in tasks.items()}
+        timeout = None if deadline is None else max(deadline - time.time(), 0)
+        remaining = dict(futures)
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                yield self._concurrent_result(remaining.pop(future), future)
+        except FuturesTimeoutError:
+            for future, name in remaining.items():
+                if future.done():
+                    yield self._concurrent_result(name, future)
+                    continue
+                print(f"⏱️ 获取{name}超出时间预算，沿用已有数据")
+                if timed_out is not None:
+                    timed_out.append(name)
+                yield name, None
+        finally:
+            executor.shutdown(wait=deadline is None)
+    
+    def _concurrent_result(self, name, future):
+        """取出已完成任务的结果；单个数据源失败只影响该数据源，后续使用默认值"""
+        try:
+            return name, future.result()
+        except Exception as e:
+            print(f"⚠️ 获取{name}失败: {e}")
+            return name, None
+    
+    def _apply_full_history(self, user_profile, username, deadline=None, timed_out=None):
+        """
+        流式分析全部仓库和starred，覆盖画像中基于最近窗口得到的技能和兴趣
+        结果不写入画像状态（状态仍只保存最近的窗口，供增量刷新使用）
+        """
+        print("  流式分析全部仓库和starred项目...")
+        repos = self._iter_github_pages(f"/users/{username}/repos?sort=updated", deadline, timed_out, 'repos')
+        skills = self._extract_enhanced_skills_from_repos(repos, stream=True)
+        if skills['primary']:
+            user_profile['skills'] = skills['primary']
+            user_profile['detailed_skills'] = skills['detailed']
+        
+        starred = self._iter_github_pages(f"/users/{username}/starred", deadline, timed_out, 'starred')
+        interests = self._extract_enhanced_interests_from_starred(starred, stream=True)
+        if interests:
+            user_profile['interests'] = interests
+        
+        user_profile['skills'] = self._extend_skills_based_on_interests(
+            user_profile['skills'], user_profile['interests']
+        )
+        print(f"  全量技能: {', '.join(user_profile['skills'][:8])}")
+    
+    def _iter_github_pages(self, endpoint, deadline=None, timed_out=None, source=None, per_page=100):
+        """逐页产出GitHub列表中的条目（不在内存中累积），最多FULL_HISTORY_MAX_PAGES页，到截止时间即停止"""
+        separator = '&' if '?' in endpoint else '?'
+        for page in range(1, self.FULL_HISTORY_MAX_PAGES + 1):
+            if deadline is not None and time.time() >= deadline:
+                print(f"⏱️ 全量获取{source or endpoint}超出时间预算，只统计已获取的部分")
+                if timed_out is not None and source and source not in timed_out:
+                    timed_out.append(source)
+                return
+            batch = self._fetch_github_data(f"{endpoint}{separator}per_page={per_page}&page={page}")
+            if not batch:
+                return
+            yield from batch
+            if len(batch) < per_page:
+                return
+    
+    def _fetch_github_pages(self, endpoint, stop, per_page=10, max_items=100):
+        """分页获取GitHub列表数据，直到stop条件命中或达到上限"""
+        items = []
+        separator = '&' if '?' in endpoint else '?'
+        page = 1
+        
+        while len(items) < max_items:
+            batch = self._fetch_github_data(f"{endpoint}{separator}per_page={per_page}&page={page}")
+            if not batch:
+                break
             
-            # 从描述和主题中提取技术关键词
-            description = repo.get('description', '').lower() if repo.get('description') else ''
-            topics = repo.get('topics', [])
+            for item in batch:
+                if stop(item):
+                    return items
+                items.append(item)
             
-            full_text = f"{description} {' '.join(topics)}".lower()
+            if len(batch) < per_page:
+                break
+            page += 1
+        
+        return items[:max_items]
+    
+    def _compact_user_info(self, user_info):
+        """只保留画像需要的用户信息字段"""
+        return {
+            'name': user_info.get('name'),
+            'bio': user_info.get('bio'),
+            'public_repos': user_info.get('public_repos', 0),
+            'followers': user_info.get('followers', 0)
+        }
+    
+    def _apply_repo_delta(self, state, repos, replace_all=False):
+        """把变化的仓库应用到技能计数器（先减旧贡献，再加新贡献）"""
+        with trace_spans.span('skill_extraction', repos=len(repos)):
+            self._apply_repo_delta_counts(state, repos, replace_all)
+    
+    def _apply_repo_delta_counts(self, state, repos, replace_all):
+        """计算仓库增量并更新技能计数器"""
+        started = time.perf_counter()
+        skill_counter = Counter() if replace_all else Counter(state['skill_counter'])
+        old_repos = [] if replace_all else state['repos']
+        
+        changed = []
+        changed_names = set()
+        for repo in repos:
+            if repo['full_name'] in changed_names:
+                continue
+            skills, detailed = self._repo_skill_contribution(repo)
+            changed.append({
+                'full_name': repo['full_name'],
+                'updated_at': repo.get('updated_at') or '',
+                'stargazers_count': repo.get('stargazers_count', 0),
+                'forks_count': repo.get('forks_count', 0),
+                'skills': dict(skills),
+                'detailed': detailed
+            })
+            changed_names.add(repo['full_name'])
+            skill_counter.update(skills)
+        
+        # 被更新的旧仓库撤销旧贡献
+        kept = []
+        for entry in old_repos:
+            if entry['full_name'] in changed_names:
+                skill_counter.subtract(entry['skills'])
+            else:
+                kept.append(entry)
+        
+        merged = changed + kept
+        if not replace_all:
+            merged.sort(key=lambda entry: entry['updated_at'], reverse=True)
+        
+        # 超出窗口的仓库撤销贡献
+        for entry in merged[self.MAX_PROFILE_REPOS:]:
+            skill_counter.subtract(entry['skills'])
+        
+        state['repos'] = merged[:self.MAX_PROFILE_REPOS]
+        state['skill_counter'] = {skill: count for skill, count in skill_counter.items() if count > 0}
+        if state['repos']:
+            state['watermarks']['repos_updated_at'] = max(entry['updated_at'] for entry in state['repos'])
+        self._stage_latency.observe(time.perf_counter() - started, stage='skill_extraction')
+    
+    def _apply_starred_delta(self, state, starred, replace_all=False):
+        """把新的starred项目应用到兴趣计数器"""
+        with trace_spans.span('interest_extraction', starred=len(starred)):
+            self._apply_starred_delta_counts(state, starred, replace_all)
+    
+    def _apply_starred_delta_counts(self, state, starred, replace_all):
+        """计算starred增量并更新兴趣计数器"""
+        started = time.perf_counter()
+        interest_counter = Counter() if replace_all else Counter(state['interest_counter'])
+        old_starred = [] if replace_all else state['starred']
+        
+        new_entries = []
+        for repo in starred:
+            new_entries.append({
+                'full_name': repo['full_name'],
+                'interests': dict(self._starred_interest_contribution(repo))
+            })
+        
+        merged = new_entries + old_starred
+        window = merged[:self.MAX_PROFILE_STARRED]
+        
+        for entry in new_entries[:self.MAX_PROFILE_STARRED]:
+            interest_counter.update(entry['interests'])
+        # 滑出窗口的旧starred撤销贡献
+        for entry in old_starred[max(self.MAX_PROFILE_STARRED - len(new_entries), 0):]:
+            interest_counter.subtract(entry['interests'])
+        
+        state['starred'] = window
+        state['interest_counter'] = {
+            interest: count for interest, count in interest_counter.items() if count > 0
+        }
+        if window:
+            state['watermarks']['starred_cursor'] = window[0]['full_name']
+        self._stage_latency.observe(time.perf_counter() - started, stage='interest_extraction')
+    
+    def _apply_profile_state(self, user_profile, state):
+        """根据画像状态填充用户画像"""
+        # 1. 用户基础信息
+        user_info = state.get('user_info')
+        if user_info:
+            user_profile['name'] = user_info.get('name') or state['username']
+            user_profile['bio'] = user_info.get('bio') or ''
+            user_profile['public_repos'] = user_info.get('public_repos', 0)
+            user_profile['followers'] = user_info.get('followers', 0)
+            print(f"  👤 {user_profile['name']} - {user_profile['bio'][:50] if user_profile['bio'] else '暂无简介'}")
+        
+        # 2. 技术栈
+        print("  分析用户仓库...")
+        repos = state['repos']
+        if repos:
+            skill_counter = Counter(state['skill_counter'])
+            user_profile['skills'] = [skill for skill, count in skill_counter.most_common(20)]
             
-            # 技术关键词检测 - 增强版
-            tech_keywords = {
-                'Python': {'keywords': ['python', 'django', 'flask', 'fastapi', 'pandas', 
-                                       'numpy', 'scikit-learn', 'tensorflow', 'pytorch'], 'weight': 4},
-                'JavaScript': {'keywords': ['javascript', 'js', 'react', 'vue', 'angular', 
-                                           'node', 'express', 'typescript'], 'weight': 4},
-                'Java': {'keywords': ['java', 'spring', 'spring-boot', 'hibernate', 'android'], 'weight': 4},
-                'TypeScript': {'keywords': ['typescript', 'ts'], 'weight': 3},
-                'Go': {'keywords': ['go', 'golang'], 'weight': 3},
-                'Rust': {'keywords': ['rust'], 'weight': 2},
-                '机器学习': {'keywords': ['machine learning', 'ml', 'deep learning', 'ai', 
-                                       'tensorflow', 'pytorch', '神经网络', '人工智能'], 'weight': 5},
-                '数据科学': {'keywords': ['data science', 'data analysis', '数据分析', '数据挖掘', 
-                                        'pandas', 'numpy'], 'weight': 4},
-                '前端开发': {'keywords': ['frontend', '前端', 'web', 'css', 'html', 
-                                       'react', 'vue', 'angular'], 'weight': 4},
-                '后端开发': {'keywords': ['backend', '后端', 'api', 'server', 'database', 
-                                        '微服务', 'rest'], 'weight': 4},
-                'DevOps': {'keywords': ['devops', 'docker', 'kubernetes', 'ci/cd', 
-                                       'jenkins', '云原生'], 'weight': 3},
-                '大数据': {'keywords': ['big data', '大数据', 'hadoop', 'spark', 'hive'], 'weight': 4},
-                '数据可视化': {'keywords': ['data visualization', '可视化', 'bi', 'dashboard', 
-                                         '报表', '图表'], 'weight': 3},
-                '物联网': {'keywords': ['iot', '物联网', '传感器', '嵌入式', '智能家居'], 'weight': 3},
-                '开源开发': {'keywords': ['open source', '开源', 'github', 'git'], 'weight': 2},
-                '移动开发': {'keywords': ['mobile', 'android', 'ios', 'flutter', 'react-native'], 'weight': 3}
-            }
+            detailed_skills = defaultdict(list)
+            for entry in repos:
+                for skill in entry['detailed']:
+                    detailed_skills[skill].append(entry['full_name'])
+            user_profile['detailed_skills'] = dict(detailed_skills)
+            user_profile['recent_repos'] = [entry['full_name'] for entry in repos[:10]]
             
-            for skill, data in tech_keywords.items():
-                if any(keyword in full_text for keyword in data['keywords']):
-                    skills_counter[skill] += data['weight']
-                    detailed_skills[skill].append(repo['full_name'])
+            # 分析经验等级
+            user_profile['experience_level'] = self._assess_enhanced_experience_level(repos)
+            user_profile['activity_score'] = self._calculate_activity_score(repos)
             
-            # 仓库名称中的关键词
-            repo_name = repo['name'].lower()
-            repo_keywords = {
-                'AI': ['ai', 'ml', 'deep', 'neural', '智能'],
-                '数据': ['data', 'dataset', 'database'],
-                '工具': ['tool', 'utils', 'utility', 'helper'],
-                '学习': ['learn', 'tutorial', 'example']
-            }
+            if user_profile['skills']:
+                print(f"  发现技能: {', '.join(user_profile['skills'][:8])}")
+            else:
+                print("  未发现技能，使用默认技能")
+                user_profile['skills'] = ['Python', 'JavaScript', '开源开发', 'Git', '前端开发', '后端开发']
+        else:
+            print("  无仓库数据，使用默认技能")
+            user_profile['skills'] = ['Python', 'JavaScript', '开源开发', 'Git', '前端开发', '后端开发']
+        
+        # 3. 兴趣
+        print("  分析starred项目...")
+        starred = state['starred']
+        if starred:
+            user_profile['starred_repos'] = [entry['full_name'] for entry in starred[:30]]
+            user_profile['interests'] = self._rank_interests(Counter(state['interest_counter']))
             
-            for category, keywords in repo_keywords.items():
-                if any(keyword in repo_name for keyword in keywords):
-                    skills_counter['技术热情'] = skills_counter.get('技术热情', 0) + 1
+            if user_profile['interests']:
+                print(f"  发现兴趣: {', '.join(user_profile['interests'][:6])}")
+            else:
+                print("  未发现兴趣，使用默认兴趣")
+                user_profile['interests'] = ['开源工具', 'Web开发', '数据科学', 'AI/机器学习', '云计算']
+        else:
+            print("  无starred数据，使用默认兴趣")
+            user_profile['interests'] = ['开源工具', 'Web开发', '数据科学', 'AI/机器学习', '云计算']
+        
+        # 4. 关注的用户
+        user_profile['following_users'] = list(state['following_users'])
+        
+        # 5. 技能扩展（基于兴趣）
+        user_profile['skills'] = self._extend_skills_based_on_interests(
+            user_profile['skills'], 
+            user_profile['interests']
+        )
+    
+    def _extract_enhanced_skills_from_repos(self, repos, stream=False):
+        """从仓库中提取增强版技能（stream为True时逐个消费任意可迭代对象，内存与仓库数无关）"""
+        if stream:
+            return self._stream_skills_from_repos(repos)
+        
+        skills_counter = Counter()
+        detailed_skills = defaultdict(list)
+        
+        for repo in repos:
+            skills, detailed = self._repo_skill_contribution(repo)
+            skills_counter.update(skills)
+            for skill in detailed:
+                detailed_skills[skill].append(repo['full_name'])
         
         # 返回最相关的技能
         primary_skills = [skill for skill, count in skills_counter.most_common(20)]
@@ -371,43 +928,163 @@ class AdvancedOpenDiggerRecommender:
             'detailed': dict(detailed_skills)
         }
     
-    def _extract_enhanced_interests_from_starred(self, starred_repos):
-        """从starred项目中提取增强版兴趣"""
+    def _stream_skills_from_repos(self, repos):
+        """
+        流式提取技能
+        1. 技能计数用容量固定的Space-Saving草图，前20名在草图中的计数误差有上界
+        2. 每个技能只保留最先出现的MAX_SKILL_EXAMPLES个示例仓库
+        3. 技能被替换出草图时一并丢弃其示例，示例表大小不超过草图容量
+        """
+        sketch = SpaceSaving(self.SKILL_SKETCH_CAPACITY)
+        detailed_skills = {}
+        
+        for repo in repos:
+            skills, detailed = self._repo_skill_contribution(repo)
+            for skill, weight in skills.items():
+                evicted = sketch.update(skill, weight)
+                if evicted is not None:
+                    detailed_skills.pop(evicted, None)
+            for skill in detailed:
+                if skill not in sketch:
+                    continue
+                examples = detailed_skills.setdefault(skill, [])
+                if len(examples) < self.MAX_SKILL_EXAMPLES:
+                    examples.append(repo['full_name'])
+        
+        return {
+            'primary': [skill for skill, count in sketch.most_common(20)],
+            'detailed': detailed_skills,
+            'guaranteed': sketch.guaranteed_top(20)
+        }
+    
+    def _repo_skill_contribution(self, repo):
+        """计算单个仓库对技能计数器的贡献"""
+        skills_counter = Counter()
+        detailed = []
+        
+        # 编程语言（权重最高）
+        language = repo.get('language')
+        if language:
+            skills_counter[language] += 5
+            detailed.append(language)
+        
+        # 从描述和主题中提取技术关键词
+        description = repo.get('description', '').lower() if repo.get('description') else ''
+        topics = repo.get('topics', [])
+        
+        full_text = f"{description} {' '.join(topics)}".lower()
+        
+        # 技术关键词检测 - 增强版
+        tech_keywords = {
+            'Python': {'keywords': ['python', 'django', 'flask', 'fastapi', 'pandas', 
+                                   'numpy', 'scikit-learn', 'tensorflow', 'pytorch'], 'weight': 4},
+            'JavaScript': {'keywords': ['javascript', 'js', 'react', 'vue', 'angular', 
+                                       'node', 'express', 'typescript'], 'weight': 4},
+            'Java': {'keywords': ['java', 'spring', 'spring-boot', 'hibernate', 'android'], 'weight': 4},
+            'TypeScript': {'keywords': ['typescript', 'ts'], 'weight': 3},
+            'Go': {'keywords': ['go', 'golang'], 'weight': 3},
+            'Rust': {'keywords': ['rust'], 'weight': 2},
+            '机器学习': {'keywords': ['machine learning', 'ml', 'deep learning', 'ai', 
+                                   'tensorflow', 'pytorch', '神经网络', '人工智能'], 'weight': 5},
+            '数据科学': {'keywords': ['data science', 'data analysis', '数据分析', '数据挖掘', 
+                                    'pandas', 'numpy'], 'weight': 4},
+            '前端开发': {'keywords': ['frontend', '前端', 'web', 'css', 'html', 
+                                   'react', 'vue', 'angular'], 'weight': 4},
+            '后端开发': {'keywords': ['backend', '后端', 'api', 'server', 'database', 
+                                    '微服务', 'rest'], 'weight': 4},
+            'DevOps': {'keywords': ['devops', 'docker', 'kubernetes', 'ci/cd', 
+                                   'jenkins', '云原生'], 'weight': 3},
+            '大数据': {'keywords': ['big data', '大数据', 'hadoop', 'spark', 'hive'], 'weight': 4},
+            '数据可视化': {'keywords': ['data visualization', '可视化', 'bi', 'dashboard', 
+                                     '报表', '图表'], 'weight': 3},
+            '物联网': {'keywords': ['iot', '物联网', '传感器', '嵌入式', '智能家居'], 'weight': 3},
+            '开源开发': {'keywords': ['open source', '开源', 'github', 'git'], 'weight': 2},
+            '移动开发': {'keywords': ['mobile', 'android', 'ios', 'flutter', 'react-native'], 'weight': 3}
+        }
+        
+        for skill, data in tech_keywords.items():
+            if any(keyword in full_text for keyword in data['keywords']):
+                skills_counter[skill] += data['weight']
+                detailed.append(skill)
+        
+        # 仓库名称中的关键词
+        repo_name = repo['name'].lower()
+        repo_keywords = {
+            'AI': ['ai', 'ml', 'deep', 'neural', '智能'],
+            '数据': ['data', 'dataset', 'database'],
+            '工具': ['tool', 'utils', 'utility', 'helper'],
+            '学习': ['learn', 'tutorial', 'example']
+        }
+        
+        for category, keywords in repo_keywords.items():
+            if any(keyword in repo_name for keyword in keywords):
+                skills_counter['技术热情'] = skills_counter.get('技术热情', 0) + 1
+        
+        return skills_counter, detailed
+    
+    def _extract_enhanced_interests_from_starred(self, starred_repos, stream=False):
+        """
+        从starred项目中提取增强版兴趣
+        stream为True时消费全部starred（任意可迭代对象），兴趣计数用容量固定的Space-Saving草图，
+        原始主题再多内存也不增长；否则只统计前40个
+        """
+        if stream:
+            sketch = SpaceSaving(self.INTEREST_SKETCH_CAPACITY)
+            for repo in starred_repos:
+                for interest, weight in self._starred_interest_contribution(repo).items():
+                    sketch.update(interest, weight)
+            return self._rank_interests(dict(sketch.most_common()))
+        
         interests = Counter()
         
         for repo in starred_repos[:40]:
-            topics = repo.get('topics', [])
-            interests.update(topics)
-            
-            # 从描述中提取兴趣
-            description = repo.get('description', '').lower() if repo.get('description') else ''
-            
-            interest_categories = {
-                'Web开发': {'keywords': ['web', 'frontend', 'backend', 'framework', 
-                                        'fullstack', 'javascript', 'react', 'vue'], 'weight': 3},
-                '数据科学': {'keywords': ['data', 'analysis', 'ml', 'ai', 'visualization', 
-                                        '数据科学', '数据分析', '机器学习'], 'weight': 3},
-                'AI/机器学习': {'keywords': ['ai', '人工智能', 'machine learning', '深度学习', 
-                                          'neural', 'llm', 'gpt'], 'weight': 4},
-                '移动开发': {'keywords': ['mobile', 'android', 'ios', 'flutter', 
-                                        'react-native', '移动端'], 'weight': 2},
-                '云计算': {'keywords': ['cloud', 'aws', 'azure', 'serverless', 
-                                      '云原生', 'kubernetes', 'docker'], 'weight': 2},
-                '开源工具': {'keywords': ['tools', 'utilities', 'productivity', 
-                                       '效率工具', '开发工具'], 'weight': 2},
-                '游戏开发': {'keywords': ['game', 'unity', 'unreal', '游戏开发'], 'weight': 1},
-                '区块链': {'keywords': ['blockchain', 'crypto', 'web3', '智能合约'], 'weight': 1},
-                '大数据': {'keywords': ['big data', 'hadoop', 'spark', '数据分析'], 'weight': 2},
-                '物联网': {'keywords': ['iot', '物联网', '智能家居', '传感器'], 'weight': 2}
-            }
-            
-            for category, data in interest_categories.items():
-                if any(keyword in description for keyword in data['keywords']):
-                    interests[category] += data['weight']
+            interests.update(self._starred_interest_contribution(repo))
+        
+        return self._rank_interests(interests)
+    
+    def _starred_interest_contribution(self, repo):
+        """计算单个starred项目对兴趣计数器的贡献"""
+        interests = Counter()
+        
+        topics = repo.get('topics', [])
+        interests.update(topics)
+        
+        # 从描述中提取兴趣
+        description = repo.get('description', '').lower() if repo.get('description') else ''
+        
+        interest_categories = {
+            'Web开发': {'keywords': ['web', 'frontend', 'backend', 'framework', 
+                                    'fullstack', 'javascript', 'react', 'vue'], 'weight': 3},
+            '数据科学': {'keywords': ['data', 'analysis', 'ml', 'ai', 'visualization', 
+                                    '数据科学', '数据分析', '机器学习'], 'weight': 3},
+            'AI/机器学习': {'keywords': ['ai', '人工智能', 'machine learning', '深度学习', 
+                                      'neural', 'llm', 'gpt'], 'weight': 4},
+            '移动开发': {'keywords': ['mobile', 'android', 'ios', 'flutter', 
+                                    'react-native', '移动端'], 'weight': 2},
+            '云计算': {'keywords': ['cloud', 'aws', 'azure', 'serverless', 
+                                  '云原生', 'kubernetes', 'docker'], 'weight': 2},
+            '开源工具': {'keywords': ['tools', 'utilities', 'productivity', 
+                                   '效率工具', '开发工具'], 'weight': 2},
+            '游戏开发': {'keywords': ['game', 'unity', 'unreal', '游戏开发'], 'weight': 1},
+            '区块链': {'keywords': ['blockchain', 'crypto', 'web3', '智能合约'], 'weight': 1},
+            '大数据': {'keywords': ['big data', 'hadoop', 'spark', '数据分析'], 'weight': 2},
+            '物联网': {'keywords': ['iot', '物联网', '智能家居', '传感器'], 'weight': 2}
+        }
+        
+        for category, data in interest_categories.items():
+            if any(keyword in description for keyword in data['keywords']):
+                interests[category] += data['weight']
+        
+        return interests
+    
+    def _rank_interests(self, interests):
+        """对兴趣计数加权排序"""
+        interests = Counter(interests)
         
         # 加强热门兴趣
+        hot_interests = self._scoring_rules['hot_interests']
         for interest in list(interests.keys()):
-            if interest in ['AI/机器学习', '数据科学', 'Web开发', '开源工具']:
+            if self.vocabulary.key(interest) in hot_interests:
                 interests[interest] *= 1.5
         
         return [interest for interest, count in interests.most_common(15)]
@@ -441,264 +1118,507 @@ class AdvancedOpenDiggerRecommender:
             return 'beginner'
     
     def _extend_skills_based_on_interests(self, skills, interests):
-        """基于兴趣扩展技能"""
+        """基于兴趣扩展技能（启用别名时同一规范术语的不同写法视为同一技能）"""
+        key = self.vocabulary.key
         extended_skills = list(skills)
+        present = {key(skill) for skill in skills}
         
         for interest in interests:
-            if '数据' in interest or '分析' in interest:
-                if 'Python' not in extended_skills:
-                    extended_skills.append('Python')
-                if '数据科学' not in extended_skills:
-                    extended_skills.append('数据科学')
-                if '机器学习' not in extended_skills:
-                    extended_skills.append('机器学习')
-                    
-            elif 'web' in interest.lower() or '前端' in interest:
-                if 'JavaScript' not in extended_skills:
-                    extended_skills.append('JavaScript')
-                if '前端开发' not in extended_skills:
-                    extended_skills.append('前端开发')
-                    
-            elif 'ai' in interest.lower() or '机器学习' in interest or '人工智能' in interest:
-                if 'Python' not in extended_skills:
-                    extended_skills.append('Python')
-                if '机器学习' not in extended_skills:
-                    extended_skills.append('机器学习')
-                    
-            elif '后端' in interest:
-                if 'Java' not in extended_skills and 'Python' not in extended_skills:
-                    extended_skills.append('Python')
-                if '后端开发' not in extended_skills:
-                    extended_skills.append('后端开发')
-                    
-            elif '物联网' in interest.lower() or 'iot' in interest.lower():
-                if '大数据' not in extended_skills:
-                    extended_skills.append('大数据')
-                if 'Java' not in extended_skills:
-                    extended_skills.append('Java')
-                    
-            elif '可视化' in interest:
-                if '数据可视化' not in extended_skills:
-                    extended_skills.append('数据可视化')
-                if 'JavaScript' not in extended_skills:
-                    extended_skills.append('JavaScript')
+            interest_lower = interest.lower()
+            for keywords, additions in self.INTEREST_SKILL_RULES:
+                if any(keyword in interest_lower for keyword in keywords):
+                    for candidates in additions:
+                        if present.isdisjoint(key(candidate) for candidate in candidates):
+                            extended_skills.append(candidates[0])
+                            present.add(key(candidates[0]))
+                    break
         
         # 去重
         unique_skills = []
         seen = set()
         for skill in extended_skills:
-            if skill not in seen:
+            if key(skill) not in seen:
                 unique_skills.append(skill)
-                seen.add(skill)
+                seen.add(key(skill))
         
         return unique_skills[:20]
     
-    def recommend_projects(self, user_profile, top_n=10):
-        """推荐项目 - 简化版（不使用发现功能）"""
+    def recommend_projects(self, user_profile, top_n=10, deadline=None):
+        """
+        推荐项目 - 简化版（不使用发现功能）
+        返回 Recommendation 列表（可像字典一样读取，to_dict() 得到完整字典，见 recommendation）
+        deadline: 截止时间（time.time()时间戳）；到时仍缺失指标的项目使用过期缓存或默认指标评分，
+                  这些推荐带有 degraded 字段（'stale_metrics' / 'default_metrics'）
+        """
+        with self._request_profiling('recommend'), trace_spans.span('recommend_projects', top_n=top_n):
+            return self._recommend_projects(user_profile, top_n, deadline)
+    
+    def recommend_page(self, user_profile=None, page_size=10, cursor=None, deadline=None):
+        """
+        分页推荐
+        1. 不带cursor：完整排序一次（不生成推荐理由），有序结果保存在游标后面
+        2. 带cursor：直接从保存的排序中取下一页，不再评分和排序（user_profile可省略）
+        3. 保存的只是目录下标和分数，取页时按当前目录和指标缓存解析出本页项目，只为本页生成推荐理由
+        返回 {'recommendations': [...], 'next_cursor': 下一页游标（没有更多时为None）, 'total': 总数}
+        游标无效、过期或目录已变化时抛出 ranking_pages.CursorError
+        """
+        fingerprint, repos, positions = self._catalog_index()
+        if cursor is None:
+            with self._request_profiling('recommend'), trace_spans.span('recommend_projects', top_n=None):
+                ranking = self._recommend_projects(user_profile, None, deadline)
+            experience_level = user_profile.get('experience_level', 'intermediate')
+            compact = CompactRanking.from_recommendations(ranking, fingerprint, positions,
+                                                          len(BREAKDOWN_KEYS), experience_level)
+            _, next_cursor, total = self.rankings.put(compact, page_size)
+            page = ranking[:page_size]
+        else:
+            entries, next_cursor, total, compact = self.rankings.page(cursor, page_size)
+            if compact.catalog != fingerprint:
+                raise CursorError("项目目录已更新，请重新请求首页")
+            experience_level = compact.context
+            page = [self._resolve_ranking_entry(repos, entry) for entry in entries]
+        
+        recommendations = []
+        for rec in page:
+            rec.recommendation_reason = self._generate_detailed_recommendation_reason(
+                rec.match_score, rec.score_breakdown, rec.project_info, {'experience_level': experience_level}
+            )
+            recommendations.append(rec)
+        return {'recommendations': recommendations, 'next_cursor': next_cursor, 'total': total}
+    
+    def _catalog_index(self):
+        """目录指纹、项目名列表和 项目名 -> 下标（目录版本或规模变化后重建）"""
+        key = (self.catalog_version, len(self.project_db))
+        cached = self._catalog_positions
+        if cached is None or cached[0] != key:
+            repos = list(self.project_db)
+            cached = self._catalog_positions = (
+                key, catalog_fingerprint(repos), repos, {repo: i for i, repo in enumerate(repos)}
+            )
+        return cached[1:]
+    
+    def _resolve_ranking_entry(self, repos, entry):
+        """把紧凑排序中的一条解析为Recommendation（指标取当前缓存，不发起请求）"""
+        position, match_score, health_score, combined_score, components, degraded = entry
+        repo = repos[position]
+        metrics = self._read_stale_cache(self._opendigger_cache_file(repo)) or {}
+        return Recommendation(repo, self.project_db[repo], metrics, match_score, health_score,
+                              combined_score, components, degraded=degraded)
+    
+    def recommend_batch(self, user_profiles, top_n=10, processes=1):
+        """批量推荐：processes>1（或None表示每个CPU核一个）时在进程池中评分，目录放在共享内存中"""
+        if processes == 1:
+            return [self.recommend_projects(user_profile, top_n=top_n) for user_profile in user_profiles]
+        with parallel_scoring.ParallelScorer(self, processes) as scorer:
+            return scorer.recommend_batch(user_profiles, top_n=top_n)
+    
+    def _recommend_projects(self, user_profile, top_n, deadline=None):
+        """推荐项目；top_n为None时返回完整排序且不生成推荐理由（供分页推荐保存）"""
+        started = time.perf_counter()
         print(f"🚀 开始智能推荐...")
         
+        # 画像的技能和兴趣编译为规范术语编号，各项目评分共用
+        profile_terms = self._compile_profile_terms(user_profile)
+        
+        # 相同画像（技能、兴趣、经验）+ 相同目录/指标版本直接复用排序结果（完整排序不进入缓存）
+        # 缓存键和版本号在评分前确定：评分期间指标刷新时，结果不按新版本保存
+        versions = (self.catalog_version, self.metrics_version)
+        cache_key = None if top_n is None else self._recommendation_cache_key(user_profile, top_n, profile_terms)
+        cached = None if cache_key is None else self._get_cached_recommendations(cache_key)
+        if cached is not None:
+            self._cache_requests.inc(cache='recommendation', result='hit')
+            print(f"⚡ 命中推荐结果缓存")
+            self._stage_latency.observe(time.perf_counter() - started, stage='recommend_projects')
+            return cached
+        if top_n is not None:
+            self._cache_requests.inc(cache='recommendation', result='miss')
+        
         all_recommendations = []
+        expires_at = float('inf')
+        # 各评分阶段在本次请求内累计耗时，最后各记录一次
+        stage_time = Counter()
         
         print(f"📊 分析 {len(self.project_db)} 个项目...")
         
+        # 有截止时间时先在预算内收集全部指标，未能及时获取的项目降级评分
+        degraded = {}
+        if deadline is not None:
+            collected, degraded = self._collect_metrics_within_deadline(deadline)
+            if degraded:
+                print(f"⏱️ {len(degraded)} 个项目超出时间预算，使用过期或默认指标")
+        
         for repo, project_info in self.project_db.items():
             try:
                 # 获取OpenDigger数据
-                metrics = self._fetch_opendigger_metrics(repo)
+                metrics = collected[repo] if deadline is not None else self._fetch_opendigger_metrics(repo)
+                cache_file = self._opendigger_cache_file(repo)
+                expires_at = min(expires_at, self._cache_expires_at(cache_file, self.OPENDIGGER_CACHE_TTL))
+                # 指标刷新失败、沿用旧指标的项目同样按降级处理
+                if self._is_stale_cache(cache_file):
+                    degraded.setdefault(repo, 'stale_metrics')
                 
-                # 计算匹配度
-                match_score, breakdown = self._calculate_high_match_score(
-                    user_profile, project_info, metrics, repo
-                )
+                # 计算健康度（同时用于匹配度中的质量加成）
+                stage_started = time.perf_counter()
+                with trace_spans.span('health_score', repo=repo):
+                    health_score = self._calculate_health_score(metrics)
                 
-                # 计算健康度
-                health_score = self._calculate_health_score(metrics)
+                # 计算匹配度（只保留各分项分数，分项字典按需生成）
+                health_done = time.perf_counter()
+                with trace_spans.span('match_score', repo=repo):
+                    components = self._match_components(
+                        user_profile, project_info, health_score, repo, profile_terms
+                    )
+                    match_score = min(sum(components), 150)
+                match_done = time.perf_counter()
+                stage_time['health_score'] += health_done - stage_started
+                stage_time['match_score'] += match_done - health_done
                 
-                # 计算综合分数
+                # 计算综合分数；推荐理由只为最终返回的结果生成
                 combined_score = match_score * 0.7 + health_score * 0.3
-                
-                # 生成推荐理由
-                reason = self._generate_detailed_recommendation_reason(
-                    match_score, breakdown, project_info, user_profile
-                )
-                
-                all_recommendations.append({
-                    'repo': repo,
-                    'name': repo.split('/')[-1],
-                    'match_score': match_score,
-                    'health_score': health_score,
-                    'combined_score': combined_score,
-                    'category': project_info.get('category', 'unknown'),
-                    'tags': project_info.get('tags', []),
-                    'description': project_info.get('description', '开源项目'),
-                    'difficulty': project_info.get('difficulty', 'intermediate'),
-                    'metrics': metrics,
-                    'score_breakdown': breakdown,
-                    'recommendation_reason': reason,
-                    'is_competition_tool': '大赛工具' in project_info.get('tags', [])
-                })
+                all_recommendations.append(Recommendation(
+                    repo, project_info, metrics, match_score, health_score, combined_score,
+                    components, degraded=degraded.get(repo)
+                ))
                 
             except Exception as e:
                 print(f"  跳过 {repo}: {e}")
                 continue
         
         # 智能排序
-        final_recommendations = self._smart_sort_with_competition(all_recommendations, top_n)
-        
+        stage_started = time.perf_counter()
+        with trace_spans.span('sort', candidates=len(all_recommendations)):
+            final_recommendations = self._smart_sort_with_competition(
+                all_recommendations, len(all_recommendations) if top_n is None else top_n)
+        stage_time['sort'] += time.perf_counter() - stage_started
+        
+        # 生成推荐理由
+        if top_n is not None:
+            stage_started = time.perf_counter()
+            for rec in final_recommendations:
+                with trace_spans.span('reason', repo=rec.repo):
+                    rec.recommendation_reason = self._generate_detailed_recommendation_reason(
+                        rec.match_score, rec.score_breakdown, rec.project_info, user_profile
+                    )
+            stage_time['reason'] += time.perf_counter() - stage_started
+        
+        for stage, seconds in stage_time.items():
+            self._stage_latency.observe(seconds, stage=stage)
+        
+        # 降级结果和完整排序不缓存；评分期间目录或指标版本变化时不保存（结果可能混用了新旧指标）
+        if not degraded and cache_key is not None:
+            self._store_cached_recommendations(cache_key, final_recommendations, expires_at, versions)
+        
+        self._stage_latency.observe(time.perf_counter() - started, stage='recommend_projects')
         return final_recommendations
     
-    def _calculate_high_match_score(self, user_profile, project_info, metrics, repo_name):
-        """高匹配度计算算法"""
-        breakdown = {}
+    def _collect_metrics_within_deadline(self, deadline):
+        """
+        在截止时间前收集所有项目的指标，返回 (指标, 降级项目)
+        1. 未过期的缓存直接使用
+        2. 缺失的指标并发抓取，最多等到截止时间
+        3. 仍未返回的项目回退到过期缓存，没有缓存时使用默认（空）指标
+        4. 刷新失败、沿用上次正常指标的项目同样记为降级
+        """
+        collected = {}
+        degraded = {}
+        missing = []
+        for repo in self.project_db:
+            cache_file = self._opendigger_cache_file(repo)
+            cached = self._read_cache(cache_file, self.OPENDIGGER_CACHE_TTL)
+            if cached is not None:
+                collected[repo] = cached
+                if self._is_stale_cache(cache_file):
+                    degraded[repo] = 'stale_metrics'
+            else:
+                missing.append(repo)
         
-        user_skills = user_profile.get('skills', [])
-        user_interests = user_profile.get('interests', [])
-        project_tags = [tag.lower() for tag in project_info.get('tags', [])]
+        if not missing:
+            return collected, degraded
         
-        total_score = 0
+        executor = ThreadPoolExecutor(max_workers=min(len(missing), self.DEADLINE_FETCH_WORKERS))
+        futures = {
+            executor.submit(trace_spans.bind(self._fetch_opendigger_metrics), repo): repo
+            for repo in missing
+        }
+        done, _ = wait(futures, timeout=max(deadline - time.time(), 0))
+        # 已发出的请求在后台完成并写入缓存，尚未开始的直接取消
+        executor.shutdown(wait=False, cancel_futures=True)
+        
+        for future, repo in futures.items():
+            if future in done and future.exception() is None:
+                collected[repo] = future.result()
+                if self._is_stale_cache(self._opendigger_cache_file(repo)):
+                    degraded[repo] = 'stale_metrics'
+                continue
+            stale = self._read_cache(self._opendigger_cache_file(repo), self.OPENDIGGER_CACHE_TTL, stale_ok=True)
+            collected[repo] = stale if stale is not None else {}
+            degraded[repo] = 'stale_metrics' if stale is not None else 'default_metrics'
         
-        # 1. 技能匹配（权重最高）
-        skill_score = self._calculate_skill_match_high(user_skills, project_tags, project_info)
-        total_score += skill_score
-        breakdown['skill_match'] = skill_score
+        return collected, degraded
+    
+    # ========== 推荐结果缓存 ==========
+    
+    def _recommendation_cache_key(self, user_profile, top_n, profile_terms=None):
+        """规范化画像指纹：评分只依赖技能编号和兴趣比较形式的多重集合、协同亲和度和经验等级"""
+        if profile_terms is None:
+            profile_terms = self._compile_profile_terms(user_profile)
+        normalized = {
+            'skills': sorted(profile_terms['skills']),
+            'interests': sorted(form for form, _, _ in profile_terms['interests']),
+            'costar': sorted(profile_terms['costar'].items()),
+            'experience_level': user_profile.get('experience_level', 'intermediate'),
+            'top_n': top_n,
+            'catalog_version': self.catalog_version,
+            'metrics_version': self.metrics_version
+        }
+        payload = json.dumps(normalized, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    
+    def _get_cached_recommendations(self, cache_key):
+        """读取推荐结果缓存（返回浅拷贝，调用方修改不影响缓存）"""
+        with self._recommendation_cache_lock:
+            entry = self._recommendation_cache.get(cache_key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._recommendation_cache[cache_key]
+                return None
+            # LRU：命中的条目移到末尾
+            self._recommendation_cache[cache_key] = self._recommendation_cache.pop(cache_key)
+        return [rec.copy() for rec in entry[1]]
+    
+    def _store_cached_recommendations(self, cache_key, recommendations, expires_at, versions):
+        """
+        保存推荐结果缓存，过期时间不晚于所用指标缓存的过期时间
+        versions: 评分开始时的 (目录版本, 指标版本)，与当前版本不一致时不保存
+        """
+        if expires_at <= time.time():
+            return
+        with self._recommendation_cache_lock:
+            if versions != (self.catalog_version, self.metrics_version):
+                return
+            self._recommendation_cache.pop(cache_key, None)
+            self._recommendation_cache[cache_key] = (expires_at, [rec.copy() for rec in recommendations])
+            while len(self._recommendation_cache) > self.RECOMMENDATION_CACHE_SIZE:
+                self._recommendation_cache.pop(next(iter(self._recommendation_cache)))
+    
+    def invalidate_recommendation_cache(self):
+        """目录（project_db）被修改后调用：升级目录版本并清空推荐结果缓存"""
+        with self._recommendation_cache_lock:
+            self.catalog_version += 1
+            self._recommendation_cache.clear()
+    
+    def _compile_scoring_rules(self):
+        """把评分规则中的写法编译为编号集合（热门兴趣按比较形式保存）"""
+        vocabulary = self.vocabulary
+        
+        def ids(terms):
+            return frozenset(vocabulary.add_terms(terms, tag=False))
         
-        # 2. 兴趣匹配
-        interest_score = self._calculate_interest_match_high(user_interests, project_tags)
-        total_score += interest_score
-        breakdown['interest_match'] = interest_score
+        def term_id(term):
+            return vocabulary.add_terms([term], tag=False)[0]
+        
+        return {
+            'hot_skills': ids(self.HOT_SKILLS),
+            'competition_tool_skills': ids(self.COMPETITION_TOOL_SKILLS),
+            'hot_related_skills': ids(self.HOT_RELATED_SKILLS),
+            'skill_groups': [ids(group) for group in self.SKILL_GROUPS],
+            'interest_categories': {term_id(interest): ids(tags)
+                                    for interest, tags in self.INTEREST_CATEGORIES.items()},
+            'hot_tech_points': {term_id(tech): points for tech, points in self.HOT_TECH_POINTS.items()},
+            'competition_skills': [(ids(tags), ids(skills)) for tags, skills in self.COMPETITION_SKILL_RULES],
+            'hot_interests': frozenset(vocabulary.key(interest) for interest in self.HOT_INTERESTS)
+        }
+    
+    def _compiled_catalog(self):
+        """
+        目录标签和技能图谱编译为编号（目录版本变化后重新编译）
+        1. 项目标签 -> 标签编号集合（未收录的标签写法加入词表，同时建立兴趣部分匹配用的子串索引）
+        2. 大赛工具 -> 项目标签命中的大赛专项规则下标（标签按原样写法比较）
+        3. 技能图谱 -> 技能编号: 相关技能编号（保持原顺序）
+        """
+        compiled = self._compiled_catalog_terms
+        if compiled is not None and compiled['version'] == self.catalog_version:
+            return compiled
+        
+        compiled = {'version': self.catalog_version, 'tags': {}, 'competition': {}, 'related': {}}
+        for repo, project_info in self.project_db.items():
+            compiled['tags'][repo], competition = self._compile_project_tags(project_info)
+            if competition is not None:
+                compiled['competition'][repo] = competition
+        for skill, node in self.skill_graph.items():
+            skill_id = self.vocabulary.add_terms([skill], tag=False)[0]
+            compiled['related'].setdefault(skill_id, self.vocabulary.add_terms(node.get('related', []), tag=False))
+        self._compiled_catalog_terms = compiled
+        return compiled
+    
+    def _compile_project_tags(self, project_info):
+        """项目标签编译为 (标签编号集合, 命中的大赛专项规则下标；不是大赛工具时为None)"""
+        tags = project_info.get('tags', [])
+        tag_ids = frozenset(self.vocabulary.add_terms(tags))
+        if '大赛工具' not in tags:
+            return tag_ids, None
+        raw_ids = self.vocabulary.raw_ids(tags)
+        return tag_ids, tuple(i for i, (tool_tags, _) in enumerate(self._scoring_rules['competition_skills'])
+                              if not tool_tags.isdisjoint(raw_ids))
+    
+    def _project_tags(self, repo_name, project_info):
+        """项目的 (标签编号集合, 命中的大赛专项规则下标或None)（目录被修改但未升级版本时现场编译）"""
+        compiled = self._compiled_catalog()
+        tag_ids = compiled['tags'].get(repo_name)
+        if tag_ids is None:
+            return self._compile_project_tags(project_info)
+        return tag_ids, compiled['competition'].get(repo_name)
+    
+    def _compile_profile_terms(self, user_profile):
+        """
+        画像的技能和兴趣编译为编号（重复的写法与原有评分一样各计一次）
+        1. 技能：编号元组（未收录的写法不会与任何标签匹配，直接跳过）
+        2. 兴趣：(比较形式, 编号, 以其为子串的标签编号集合)，部分匹配查目录编译时建立的子串索引
+        3. 协同亲和度：已star仓库在共同star索引中的邻居 -> 相似度之和（未加载索引时为空）
+        """
+        self._compiled_catalog()
+        vocabulary = self.vocabulary
+        skills = tuple(term_id for term_id in map(vocabulary.term_id, user_profile.get('skills', []))
+                       if term_id is not None)
+        
+        interests = []
+        compiled_interests = {}
+        for interest in user_profile.get('interests', []):
+            form = vocabulary.normalize(interest)
+            if form not in compiled_interests:
+                compiled_interests[form] = (form, vocabulary.term_id(interest), vocabulary.tags_containing(interest))
+            interests.append(compiled_interests[form])
+        
+        costar = {}
+        if self.costar_index is not None:
+            costar = self.costar_index.affinities(user_profile.get('starred_repos', []))
+        
+        return {'skills': skills, 'skill_set': frozenset(skills), 'interests': interests, 'costar': costar}
+    
+    def _calculate_high_match_score(self, user_profile, project_info, metrics, repo_name, profile_terms=None):
+        """高匹配度计算算法，返回 (匹配度, 分项字典)"""
+        components = self._match_components(user_profile, project_info, self._calculate_health_score(metrics),
+                                            repo_name, profile_terms)
+        return min(sum(components), 150), dict(zip(BREAKDOWN_KEYS, components))
+    
+    def _match_components(self, user_profile, project_info, health_score, repo_name, profile_terms=None):
+        """
+        匹配度各分项分数（顺序同 BREAKDOWN_KEYS），总分可能超过100，表示高匹配，上限150
+        1. 技能匹配（权重最高）  2. 兴趣匹配  3. 经验适配
+        4. 项目质量加成  5. 大赛工具专项加成（非常高）  6. 热门技术栈加成  7. 协同加成
+        """
+        if profile_terms is None:
+            profile_terms = self._compile_profile_terms(user_profile)
+        tag_ids, competition = self._project_tags(repo_name, project_info)
+        is_competition_tool = competition is not None
+        
+        with trace_spans.span('skill_match'):
+            skill_score = self._calculate_skill_match_high(profile_terms, tag_ids, is_competition_tool)
+        
+        with trace_spans.span('interest_match'):
+            interest_score = self._calculate_interest_match_high(profile_terms['interests'], tag_ids)
         
-        # 3. 经验适配
         experience = user_profile.get('experience_level', 'intermediate')
         difficulty = project_info.get('difficulty', 'intermediate')
-        exp_score = self._calculate_experience_match_high(experience, difficulty)
-        total_score += exp_score
-        breakdown['experience_match'] = exp_score
+        with trace_spans.span('experience_match'):
+            exp_score = self._calculate_experience_match_high(experience, difficulty)
         
-        # 4. 项目质量加成
-        health_score = self._calculate_health_score(metrics)
         quality_bonus = health_score * 0.2
-        total_score += quality_bonus
-        breakdown['quality_bonus'] = quality_bonus
         
-        # 5. 大赛工具专项加成（非常高）
+        with trace_spans.span('competition_bonus'):
+            competition_bonus = self._calculate_competition_bonus(profile_terms['skill_set'], competition)
+        
+        with trace_spans.span('hot_tech_bonus'):
+            hot_tech_bonus = self._calculate_hot_tech_bonus_high(profile_terms['skill_set'], tag_ids)
+        
+        collaborative_bonus = min(profile_terms['costar'].get(repo_name, 0) * self.COSTAR_BONUS_WEIGHT,
+                                  self.COSTAR_BONUS_MAX)
+        
+        return (skill_score, interest_score, exp_score, quality_bonus, competition_bonus, hot_tech_bonus,
+                collaborative_bonus)
+    
+    def _calculate_competition_bonus(self, skill_set, competition):
+        """大赛工具专项加成（competition: 项目标签命中的专项规则下标，不是大赛工具时为None）"""
         competition_bonus = 0
-        if '大赛工具' in project_info.get('tags', []):
+        if competition is not None:
             competition_bonus = 40  # 非常高的基础加分
             
-            # 检查用户是否有相关技能
-            user_skills_lower = [s.lower() for s in user_skills]
-            
-            # DataEase相关技能
-            if any(tag in ['dataease', '数据可视化'] for tag in project_info['tags']):
-                if any(skill in user_skills_lower for skill in ['数据可视化', '数据分析', 'javascript', 'java']):
-                    competition_bonus += 20
-            
-            # IoTDB相关技能
-            if any(tag in ['iotdb', '时序数据库', '物联网'] for tag in project_info['tags']):
-                if any(skill in user_skills_lower for skill in ['大数据', '物联网', 'java', '数据库']):
+            # DataEase / IoTDB / OpenDigger：项目标签和用户技能都命中时加分
+            rules = self._scoring_rules['competition_skills']
+            for i in competition:
+                if not rules[i][1].isdisjoint(skill_set):
                     competition_bonus += 20
-            
-            # OpenDigger相关技能
-            if any(tag in ['open-digger', '开源分析'] for tag in project_info['tags']):
-                if any(skill in user_skills_lower for skill in ['数据分析', 'javascript', '开源分析']):
-                    competition_bonus += 20
-        
-        total_score += competition_bonus
-        breakdown['competition_bonus'] = competition_bonus
-        
-        # 6. 热门技术栈加成
-        hot_tech_bonus = self._calculate_hot_tech_bonus_high(user_skills, project_tags)
-        total_score += hot_tech_bonus
-        breakdown['hot_tech_bonus'] = hot_tech_bonus
         
-        # 最终分数（可能超过100，表示高匹配）
-        final_score = min(total_score, 150)
-        
-        return final_score, breakdown
+        return competition_bonus
     
-    def _calculate_skill_match_high(self, user_skills, project_tags, project_info):
+    def _calculate_skill_match_high(self, profile_terms, tag_ids, is_competition_tool):
         """高权重技能匹配"""
+        rules = self._scoring_rules
+        related_skills = self._compiled_catalog()['related']
         score = 0
         
-        for skill in user_skills:
-            skill_lower = skill.lower()
-            
+        for skill_id in profile_terms['skills']:
             # 直接匹配（非常高权重）
-            if skill_lower in project_tags:
+            if skill_id in tag_ids:
                 base_score = 25  # 非常高
                 
                 # 检查是否是热门技能
-                if skill_lower in ['python', 'javascript', '机器学习', '数据科学', '前端开发']:
+                if skill_id in rules['hot_skills']:
                     base_score += 10
                 
-                # 检查是否是大赛工具相关技能
-                if '大赛工具' in project_info.get('tags', []):
-                    # 大赛工具相关技能额外加成
-                    if skill_lower in ['java', 'javascript', '数据可视化', '大数据', '物联网']:
-                        base_score += 15
+                # 大赛工具相关技能额外加成
+                if is_competition_tool and skill_id in rules['competition_tool_skills']:
+                    base_score += 15
                 
                 score += base_score
             
             # 相关技能匹配
-            elif skill_lower in self.skill_graph:
-                related_skills = self.skill_graph[skill_lower].get('related', [])
-                for related in related_skills:
-                    if related in project_tags:
+            elif skill_id in related_skills:
+                for related_id in related_skills[skill_id]:
+                    if related_id in tag_ids:
                         related_score = 15  # 较高
                         
                         # 热门技能的相关技能额外加成
-                        if skill_lower in ['python', 'javascript', '机器学习']:
+                        if skill_id in rules['hot_related_skills']:
                             related_score += 8
                         
                         score += related_score
                         break  # 只取第一个匹配的相关技能
         
         # 技能组匹配加成
-        skill_groups = [
-            ['python', '机器学习', '数据科学'],
-            ['javascript', '前端开发', 'react', 'vue'],
-            ['java', '后端开发', 'spring'],
-            ['大数据', '物联网', '数据分析']
-        ]
-        
-        for group in skill_groups:
-            user_group_skills = [s.lower() for s in user_skills if s.lower() in group]
-            project_group_tags = [t for t in project_tags if t in group]
-            
-            if len(user_group_skills) >= 2 and len(project_group_tags) >= 2:
-                group_bonus = len(set(user_group_skills) & set(project_group_tags)) * 5
-                score += group_bonus
+        skills = profile_terms['skills']
+        for group in rules['skill_groups']:
+            # 用户命中数按技能写法计（重复写法各计一次），共同技能按编号去重
+            if sum(skill_id in group for skill_id in skills) >= 2 and len(group & tag_ids) >= 2:
+                score += len(profile_terms['skill_set'] & group & tag_ids) * 5
         
         return min(score, 80)  # 技能匹配最高80分
     
-    def _calculate_interest_match_high(self, user_interests, project_tags):
-        """高权重兴趣匹配"""
+    def _calculate_interest_match_high(self, interests, tag_ids):
+        """
+        高权重兴趣匹配
+        部分匹配查子串索引（'开源' 匹配 '开源分析'；启用别名时同一术语的其他写法也参与）；
+        启用别名时类别匹配按规范术语计数，同一术语的多种写法只计一次
+        """
+        interest_categories = self._scoring_rules['interest_categories']
         score = 0
         
-        for interest in user_interests:
-            interest_lower = interest.lower()
-            
+        for _, interest_id, containing_tags in interests:
             # 直接匹配
-            if interest_lower in project_tags:
+            if interest_id in tag_ids:
                 score += 20  # 很高
             
             # 部分匹配
-            elif any(interest_lower in tag for tag in project_tags):
+            elif not containing_tags.isdisjoint(tag_ids):
                 score += 12  # 较高
             
             # 兴趣类别匹配
-            interest_categories = {
-                'web开发': ['javascript', 'react', 'vue', '前端', 'web'],
-                '数据科学': ['python', '数据分析', '机器学习', 'ai', '数据科学'],
-                'ai/机器学习': ['ai', '机器学习', '深度学习', '神经网络', 'python'],
-                '物联网': ['iot', '物联网', '传感器', '嵌入式']
-            }
-            
-            if interest_lower in interest_categories:
-                category_keywords = interest_categories[interest_lower]
-                matching_keywords = [kw for kw in category_keywords if kw in project_tags]
-                if matching_keywords:
-                    score += len(matching_keywords) * 6
+            category_tags = interest_categories.get(interest_id)
+            if category_tags:
+                matching_tags = category_tags & tag_ids
+                if matching_tags:
+                    score += len(matching_tags) * 6
         
         return min(score, 50)  # 兴趣匹配最高50分
     
@@ -713,28 +1633,10 @@ class AdvancedOpenDiggerRecommender:
         
         return experience_matrix.get(experience, {}).get(difficulty, 15)
     
-    def _calculate_hot_tech_bonus_high(self, user_skills, project_tags):
+    def _calculate_hot_tech_bonus_high(self, skill_set, tag_ids):
         """高权重热门技术栈加成"""
-        bonus = 0
-        
-        # 热门技术栈
-        hot_techs = {
-            '机器学习': 15,
-            'ai/人工智能': 15,
-            '数据科学': 12,
-            'python': 10,
-            'javascript': 10,
-            'react': 8,
-            'vue': 8,
-            '大数据': 10,
-            '物联网': 8
-        }
-        
-        user_skills_lower = [s.lower() for s in user_skills]
-        
-        for tech, points in hot_techs.items():
-            if tech in user_skills_lower and tech in project_tags:
-                bonus += points
+        hot_tech_points = self._scoring_rules['hot_tech_points']
+        bonus = sum(hot_tech_points.get(tech_id, 0) for tech_id in skill_set & tag_ids)
         
         return min(bonus, 30)
     
@@ -797,6 +1699,10 @@ class AdvancedOpenDiggerRecommender:
             elif comp_bonus > 30:
                 reasons.append("与您的技能相关")
         
+        # 协同信号
+        if breakdown.get('collaborative_bonus', 0) > 10:
+            reasons.append("👥 与您star的项目常被一起star")
+        
         # 项目特性
         category = project_info.get('category', '')
         if category == 'ai-ml':
@@ -825,86 +1731,346 @@ class AdvancedOpenDiggerRecommender:
             return []
         
         # 按综合分数排序
-        recommendations.sort(key=lambda x: x['combined_score'], reverse=True)
+        recommendations.sort(key=lambda x: x.combined_score, reverse=True)
         
         # 确保大赛工具在顶部
-        competition_tools = [r for r in recommendations if r['is_competition_tool']]
-        other_tools = [r for r in recommendations if not r['is_competition_tool']]
+        competition_tools = [r for r in recommendations if r.is_competition_tool]
+        other_tools = [r for r in recommendations if not r.is_competition_tool]
         
         # 如果大赛工具匹配度较低，适当提升位置
         for tool in competition_tools:
-            if tool['match_score'] < 60:
-                tool['combined_score'] += 20  # 提升大赛工具排名
+            if tool.match_score < 60:
+                tool.combined_score += 20  # 提升大赛工具排名
         
-        # 重新合并排序
+        # 重新合并排序，只取前top_n个（同分时保持合并后的顺序）
         final_list = competition_tools + other_tools
-        final_list.sort(key=lambda x: x['combined_score'], reverse=True)
-        
-        return final_list[:top_n]
+        return heapq.nlargest(top_n, final_list, key=lambda x: x.combined_score)
     
     # ========== 原有的辅助方法 ==========
     
-    def _fetch_github_data(self, endpoint):
-        """获取GitHub数据"""
-        cache_key = hashlib.md5(endpoint.encode()).hexdigest()
-        cache_file = f"cache/github_{cache_key}.json"
-        
-        # 检查缓存
-        if os.path.exists(cache_file):
-            file_age = time.time() - os.path.getmtime(cache_file)
-            if file_age < 3600:
+    def _request_profiling(self, name):
+        """设置了profile_dir且外层未开启剖析时，为本次请求开启剖析并输出trace文件"""
+        if not self.profile_dir or trace_spans.active():
+            return trace_spans.NULL_SPAN
+        filename = f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json"
+        return trace_spans.profiling(os.path.join(self.profile_dir, filename), name=name)
+    
+    def _read_cache(self, cache_file, ttl, stale_ok=False):
+        """
+        读取缓存：先查进程内存缓存，再查磁盘文件；过期或不存在返回None
+        stale_ok为True时过期的条目也返回（计为stale，供回填期间和截止时间到时兜底）
+        """
+        cache = os.path.basename(cache_file).split('_', 1)[0]
+        if self.force_refresh:
+            self._cache_requests.inc(cache=cache, result='bypass')
+            return None
+        
+        now = time.time()
+        entry = self._memory_cache.get(cache_file)
+        if entry and (stale_ok or now - entry[0] < ttl):
+            self._cache_requests.inc(cache=cache, result='hit' if now - entry[0] < ttl else 'stale')
+            self._note_cache_access(cache_file, now)
+            return entry[1]
+        
+        if os.path.exists(cache_file) or self._migrate_legacy_cache(cache_file):
+            written_at = os.path.getmtime(cache_file)
+            fresh = now - written_at < ttl
+            if fresh or stale_ok:
                 try:
-                    with open(cache_file, 'r', encoding='utf-8') as f:
-                        return json.load(f)
-                except:
-                    pass
+                    with trace_spans.span('cache_decode', cache=cache):
+                        data = cache_codec.read_file(cache_file)
+                except (OSError, *cache_codec.DECODE_ERRORS) as e:
+                    # 文件被删除或损坏：按未命中处理，由回填覆盖
+                    print(f"⚠️ 缓存文件不可读 {cache_file}: {e}")
+                    self._cache_requests.inc(cache=cache, result='corrupt')
+                    return None
+                self._remember_cache(cache_file, written_at, data)
+                self._cache_requests.inc(cache=cache, result='hit' if fresh else 'stale')
+                self._note_cache_access(cache_file, now)
+                return data
+            
+            self._cache_requests.inc(cache=cache, result='expired')
+            return None
         
+        self._cache_requests.inc(cache=cache, result='miss')
+        return None
+    
+    def _note_cache_access(self, cache_file, now):
+        """
+        记录缓存条目的最近访问时间，供缓存回收按LRU淘汰（见 cache_gc）
+        读路径上只记在内存里，累计到一定条数或间隔后才批量写回文件的访问时间
+        """
+        with self._cache_access_lock:
+            self._cache_access[cache_file] = now
+            if (len(self._cache_access) < self.CACHE_ACCESS_FLUSH_SIZE
+                    and now - self._cache_access_flushed < self.CACHE_ACCESS_FLUSH_INTERVAL):
+                return
+        self.flush_cache_access()
+    
+    def flush_cache_access(self):
+        """把记录的访问时间写回缓存文件的atime（修改时间表示写入时间，保持不变）"""
+        with self._cache_access_lock:
+            accessed, self._cache_access = self._cache_access, {}
+            self._cache_access_flushed = time.time()
+        for cache_file, accessed_at in accessed.items():
+            try:
+                os.utime(cache_file, ns=(int(accessed_at * 1e9), os.stat(cache_file).st_mtime_ns))
+            except OSError:
+                pass
+    
+    def _migrate_legacy_cache(self, cache_file):
+        """把旧版平铺在cache/下的同名缓存文件移动到分片路径（保留修改时间），返回是否迁移"""
+        legacy_file = os.path.join("cache", os.path.basename(cache_file))
+        if legacy_file == cache_file or not os.path.exists(legacy_file):
+            return False
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            os.replace(legacy_file, cache_file)
+        except OSError:
+            return False
+        return True
+    
+    def _write_cache(self, cache_file, data, written_at=None):
+        """写入缓存（内存 + 磁盘）；指定written_at时磁盘文件的修改时间也设为该时间"""
+        self._remember_cache(cache_file, written_at or time.time(), data)
+        with self._memory_cache_lock:
+            self._stale_cache_files.discard(cache_file)
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            cache_codec.write_file(cache_file, data, self.cache_compression)
+            if written_at:
+                os.utime(cache_file, (written_at, written_at))
+        except OSError as e:
+            print(f"⚠️ 缓存写入失败 {cache_file}: {e}")
+    
+    @contextmanager
+    def _cache_refill(self, cache_file, ttl):
+        """
+        跨进程协调过期缓存的回填，产出缓存数据（为None时由调用方抓取并写入缓存）
+        1. 取得租约：再查一次缓存（可能刚被其他进程回填），仍未命中则由本进程回填
+        2. 其他进程持有租约：有过期数据时直接使用过期数据
+        3. 没有过期数据：等待持有者回填完成后读取；等待超时则由本进程自行抓取
+        """
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        except OSError:
+            pass
+        lease = CacheLease(cache_file, self.CACHE_LEASE_TTL)
+        if lease.acquire():
+            try:
+                yield self._read_cache(cache_file, ttl)
+            finally:
+                lease.release()
+            return
+        
+        stale = self._read_cache(cache_file, ttl, stale_ok=True)
+        if stale is None:
+            lease.wait(self.CACHE_LEASE_WAIT)
+            stale = self._read_cache(cache_file, ttl)
+        yield stale
+    
+    def _write_negative_cache(self, cache_file, data, ttl, negative_ttl):
+        """
+        写入短期缓存：回拨写入时间，使按ttl读取的条目在negative_ttl秒后过期
+        只在没有上一份正常数据时调用（有正常数据时改用 _fallback_to_stale）
+        """
+        self._write_cache(cache_file, data, time.time() - max(ttl - negative_ttl, 0))
+    
+    def _read_stale_cache(self, cache_file):
+        """读取缓存而不论是否过期（内存优先，其次磁盘）；不存在或不可读时返回None"""
+        entry = self._memory_cache.get(cache_file)
+        if entry:
+            return entry[1]
+        try:
+            return cache_codec.read_file(cache_file)
+        except (OSError, *cache_codec.DECODE_ERRORS):
+            return None
+    
+    def _fallback_to_stale(self, cache_file, ttl, negative_ttl, is_usable):
+        """
+        刷新失败时回退到上一份正常数据，返回该数据；没有可用的旧数据时返回None（由调用方写入负缓存）
+        1. 磁盘上的旧数据保持不变，其他进程仍可将其作为过期数据使用
+        2. 只在内存中以回拨的写入时间记住旧数据，negative_ttl秒内不再重试
+        3. 记为过期数据，使用它的推荐结果标记为降级且不进入推荐结果缓存
+        """
+        stale = self._read_stale_cache(cache_file)
+        if stale is None or not is_usable(stale):
+            return None
+        self._remember_cache(cache_file, time.time() - max(ttl - negative_ttl, 0), stale)
+        with self._memory_cache_lock:
+            self._stale_cache_files.add(cache_file)
+        return stale
+    
+    def _is_stale_cache(self, cache_file):
+        """缓存文件当前是否在沿用刷新失败前的旧数据"""
+        return cache_file in self._stale_cache_files
+    
+    def _has_metric_values(self, metrics):
+        """指标缓存是否包含至少一项正常获取的指标（全部为error的是负缓存）"""
+        return isinstance(metrics, dict) and any(
+            isinstance(metric, dict) and metric.get('trend') != 'error' for metric in metrics.values()
+        )
+    
+    def _is_negative_entry(self, data):
+        """是否为负缓存条目（记录了404或请求失败，而不是数据）"""
+        return isinstance(data, dict) and self.NEGATIVE_CACHE_KEY in data
+    
+    def _cache_expires_at(self, cache_file, ttl):
+        """内存缓存条目的过期时间（不在内存中时视为立即过期）"""
+        entry = self._memory_cache.get(cache_file)
+        return entry[0] + ttl if entry else 0
+    
+    def _remember_cache(self, cache_file, written_at, data):
+        """放入进程内存缓存（超出容量时淘汰最早放入的条目）"""
+        with self._memory_cache_lock:
+            self._memory_cache.pop(cache_file, None)
+            self._memory_cache[cache_file] = (written_at, data)
+            while len(self._memory_cache) > self.MEMORY_CACHE_SIZE:
+                self._memory_cache.pop(next(iter(self._memory_cache)))
+    
+    def _http_request(self, method, url, **kwargs):
+        """发起HTTP请求，按主机和状态码记录请求数、耗时和剩余配额；主机熔断时直接失败"""
+        host = urlsplit(url).netloc
+        breaker = self.circuit_breakers.get(host)
+        if not breaker.allow():
+            self._http_requests.inc(host=host, status='circuit_open')
+            raise CircuitOpenError(f"{host} 已熔断，请求被拒绝")
+        
+        status = 'error'
+        started = time.perf_counter()
+        try:
+            with trace_spans.span('http', method=method, url=url):
+                response = self.transport(method, url, **kwargs)
+            status = response.status_code
+            remaining = response.headers.get('X-RateLimit-Remaining')
+            if remaining and remaining.isdigit():
+                self._rate_limit_remaining.set(int(remaining), host=host)
+            return response
+        finally:
+            # 超时、连接错误和5xx计为失败；404、403限流等说明主机仍然可用
+            if status == 'error' or status >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            self._circuit_state.set(STATE_VALUES[breaker.state], host=host)
+            self._http_requests.inc(host=host, status=status)
+            self._http_latency.observe(time.perf_counter() - started, host=host)
+    
+    def _fetch_github_data(self, endpoint):
+        """获取GitHub数据（记录耗时）"""
+        started = time.perf_counter()
+        try:
+            with trace_spans.span('fetch_github', endpoint=endpoint):
+                return self._load_github_data(endpoint)
+        finally:
+            self._stage_latency.observe(time.perf_counter() - started, stage='fetch_github')
+    
+    def _load_github_data(self, endpoint):
+        """获取GitHub数据"""
+        cache_file = self._github_cache_file(endpoint)
+        
+        # 检查缓存（负缓存条目表示近期404或失败过，直接返回None）
+        cached = self._read_cache(cache_file, self.GITHUB_CACHE_TTL)
+        if cached is None:
+            # 多个进程同时发现过期时只由一个进程回填，其他进程使用过期数据或等待回填结果
+            with self._cache_refill(cache_file, self.GITHUB_CACHE_TTL) as cached:
+                if cached is None:
+                    return self._request_github_data(endpoint, cache_file)
+        return None if self._is_negative_entry(cached) else cached
+    
+    def _request_github_data(self, endpoint, cache_file):
+        """请求GitHub接口并写入缓存（失败时写入负缓存）"""
+        negative_ttl = self.FAILURE_CACHE_TTL
         try:
             url = f"{self.github_api}{endpoint}"
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self._http_request('GET', url, headers=self.headers, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
                 
                 # 缓存数据
-                try:
-                    with open(cache_file, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, ensure_ascii=False, indent=2)
-                except:
-                    pass
+                self._write_cache(cache_file, data)
                 
                 return data
             elif response.status_code == 403:
-                print(f"⚠️ GitHub API限制，使用缓存数据")
+                print(f"⚠️ GitHub API限制 {endpoint}")
+            elif response.status_code == 404:
+                negative_ttl = self.NOT_FOUND_CACHE_TTL
             else:
                 print(f"⚠️ GitHub API错误 {endpoint}: {response.status_code}")
+            status = response.status_code
                 
         except Exception as e:
             print(f"⚠️ 请求失败 {endpoint}: {e}")
-        
+            status = 'error'
+        
+        # 有上一份正常数据时沿用它，不用负缓存覆盖
+        stale = self._fallback_to_stale(cache_file, self.GITHUB_CACHE_TTL, negative_ttl,
+                                        lambda data: not self._is_negative_entry(data))
+        if stale is not None:
+            print(f"  ↩️ 使用上次的缓存数据 {endpoint}")
+            return stale
+        self._write_negative_cache(cache_file, {self.NEGATIVE_CACHE_KEY: status},
+                                   self.GITHUB_CACHE_TTL, negative_ttl)
         return None
     
+    def _github_cache_file(self, endpoint):
+        """GitHub接口缓存文件路径（分片目录，避免单个目录下文件过多）"""
+        return sharded_path("cache", f"github_{hashlib.md5(endpoint.encode()).hexdigest()}.json")
+    
+    def _opendigger_cache_file(self, repo):
+        """OpenDigger指标缓存文件路径（分片目录）"""
+        return sharded_path("cache", f"opendigger_{repo.replace('/', '_')}.json")
+    
+    def get_cached_metrics(self, repo, fetch_missing=False):
+        """
+        项目的OpenDigger指标及其写入时间（供快照、缓存预热、健康度排行榜等模块使用）
+        返回 (指标, 写入时间戳)；没有未过期的缓存时，fetch_missing为True则抓取并写入缓存，
+        否则返回 ({}, None)。写入时间取自内存缓存，条目已被淘汰时为None
+        """
+        cache_file = self._opendigger_cache_file(repo)
+        if fetch_missing:
+            data = self._fetch_opendigger_metrics(repo)
+        else:
+            data = self._read_cache(cache_file, self.OPENDIGGER_CACHE_TTL)
+        if not data:
+            return {}, None
+        with self._memory_cache_lock:
+            entry = self._memory_cache.get(cache_file)
+        return data, entry[0] if entry is not None else None
+    
     def _fetch_opendigger_metrics(self, repo):
+        """获取OpenDigger指标（记录耗时）"""
+        started = time.perf_counter()
+        try:
+            with trace_spans.span('fetch_opendigger', repo=repo):
+                return self._load_opendigger_metrics(repo)
+        finally:
+            self._stage_latency.observe(time.perf_counter() - started, stage='fetch_opendigger')
+    
+    def _load_opendigger_metrics(self, repo):
         """获取OpenDigger指标（带缓存）"""
-        cache_file = f"cache/opendigger_{repo.replace('/', '_')}.json"
+        cache_file = self._opendigger_cache_file(repo)
         
         # 检查缓存
-        if os.path.exists(cache_file):
-            file_age = time.time() - os.path.getmtime(cache_file)
-            if file_age < 86400:
-                try:
-                    with open(cache_file, 'r', encoding='utf-8') as f:
-                        return json.load(f)
-                except:
-                    pass
-        
+        cached = self._read_cache(cache_file, self.OPENDIGGER_CACHE_TTL)
+        if cached is None:
+            with self._cache_refill(cache_file, self.OPENDIGGER_CACHE_TTL) as cached:
+                if cached is None:
+                    return self._request_opendigger_metrics(repo, cache_file)
+        return cached
+    
+    def _request_opendigger_metrics(self, repo, cache_file):
+        """请求项目的OpenDigger指标并写入缓存"""
         metrics = {}
         key_metrics = ['activity', 'openrank', 'contributors', 'new_contributors']
+        # 有指标404（项目未收录）或请求失败时，整条缓存只保留较短时间
+        not_found = failed = False
         
         for metric in key_metrics:
             try:
                 url = f"{self.opendigger_url}/{repo}/{metric}.json"
-                response = requests.get(url, timeout=10)
+                response = self._http_request('GET', url, timeout=10)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -934,16 +2100,33 @@ class AdvancedOpenDiggerRecommender:
                         metrics[metric] = {'value': data, 'trend': 'stable'}
                 else:
                     metrics[metric] = {'value': 0, 'trend': 'error'}
+                    if response.status_code == 404:
+                        not_found = True
+                    else:
+                        failed = True
                     
             except Exception as e:
                 metrics[metric] = {'value': 0, 'trend': 'error', 'error': str(e)}
-        
-        # 保存到缓存
-        try:
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(metrics, f, ensure_ascii=False, indent=2)
-        except:
-            pass
+                failed = True
+        
+        # 保存到缓存；指标刷新后依赖旧指标的推荐结果缓存随之失效
+        if failed or not_found:
+            # 有上一份正常指标时沿用它（不覆盖缓存、指标未变化，不通知订阅者）
+            stale = self._fallback_to_stale(cache_file, self.OPENDIGGER_CACHE_TTL,
+                                            self.FAILURE_CACHE_TTL if failed else self.NOT_FOUND_CACHE_TTL,
+                                            self._has_metric_values)
+            if stale is not None:
+                print(f"  ↩️ {repo} 指标刷新失败，沿用上次的指标")
+                return stale
+            self._write_negative_cache(cache_file, metrics, self.OPENDIGGER_CACHE_TTL,
+                                       self.FAILURE_CACHE_TTL if failed else self.NOT_FOUND_CACHE_TTL)
+        else:
+            self._write_cache(cache_file, metrics)
+        # 多个抓取线程并发刷新指标，版本号在锁内递增避免丢失更新
+        with self._recommendation_cache_lock:
+            self.metrics_version += 1
+        for listener in self.metrics_listeners:
+            listener(repo, metrics)
         
         return metrics
     
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+批量分析脚本
+从文件或标准输入读取GitHub用户名，使用工作线程池并发分析并推荐，
+每完成一个用户就向输出流写入一行JSON（JSONL）。进度和吞吐统计写入stderr。
+
+用法:
+    python batch_analyze.py users.txt --workers 8 --output results.jsonl
+    cat requests.jsonl | python batch_analyze.py - --top-n 5
+    python batch_analyze.py orgs.txt --full-history     # 仓库/star数以万计的账户：流式统计全部历史
+"""
+import io
+import sys
+import os
+import json
+import time
+import argparse
+import itertools
+import contextlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from advanced_recommender import AdvancedOpenDiggerRecommender
+from http_replay import build_transport, parse_latency
+from parallel_scoring import ParallelScorer
+from report_writers import compile_fields, open_output, parse_fields, project
+
+# JSON行中可能携带用户名的字段
+USERNAME_FIELDS = ('username', 'user', 'login', 'github')
+
+
+def parse_username(line):
+    """从一行输入中解析用户名：支持纯文本用户名和JSON对象"""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+
+    if line.startswith('{'):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        for field in USERNAME_FIELDS:
+            if record.get(field):
+                return str(record[field]).strip()
+        return None
+
+    return line.split()[0]
+
+
+def iter_usernames(stream):
+    """流式读取用户名（去重）"""
+    seen = set()
+    for line in stream:
+        username = parse_username(line)
+        if username and username.lower() not in seen:
+            seen.add(username.lower())
+            yield username
+
+
+@contextlib.contextmanager
+def detached_stdout(quiet=False):
+    """
+    推荐器的过程日志写在stdout上：在启动工作线程之前把进程的标准输出（文件描述符1）一次性改道到stderr
+    （quiet时丢弃），产出指向原标准输出的文件对象供写出JSONL，退出时（工作线程都已结束）恢复。
+    重定向在文件描述符层面完成，不替换sys.stdout对象，工作线程中的print不受影响
+    """
+    try:
+        fd = sys.stdout.fileno()
+    except (AttributeError, ValueError, io.UnsupportedOperation):
+        # 标准输出不是真实文件（如被测试框架捕获）：不改道
+        yield sys.stdout
+        return
+
+    sys.stdout.flush()
+    saved = os.dup(fd)
+    target = os.open(os.devnull, os.O_WRONLY) if quiet else os.dup(sys.stderr.fileno())
+    os.dup2(target, fd)
+    os.close(target)
+    original = os.fdopen(os.dup(saved), 'w', encoding='utf-8')
+    try:
+        yield original
+    finally:
+        original.close()
+        sys.stdout.flush()
+        os.dup2(saved, fd)
+        os.close(saved)
+
+
+def analyze_one(recommender, username, top_n, incremental, scorer=None, field_paths=None, latency_budget=None,
+                full_history=False):
+    """
+    分析单个用户并生成推荐，返回一条输出记录
+    scorer: 评分进程池；field_paths: 推荐字段投影；latency_budget: 每个用户的时间预算（秒）；
+    full_history: 流式分析全部仓库和starred
+    """
+    started = time.time()
+    deadline = started + latency_budget if latency_budget else None
+    user_profile = recommender.analyze_github_user(username, incremental=incremental, deadline=deadline,
+                                                   full_history=full_history)
+    if scorer is not None:
+        recommendations = scorer.recommend(user_profile, top_n=top_n, deadline=deadline)
+    else:
+        recommendations = recommender.recommend_projects(user_profile, top_n=top_n, deadline=deadline)
+
+    return {
+        'username': username,
+        'profile': {
+            'skills': user_profile['skills'],
+            'interests': user_profile['interests'],
+            'experience_level': user_profile['experience_level'],
+            'activity_score': user_profile['activity_score'],
+            **({'degraded_sources': user_profile['degraded_sources']}
+               if 'degraded_sources' in user_profile else {})
+        },
+        'recommendations': [project(rec, field_paths) for rec in recommendations],
+        'elapsed': round(time.time() - started, 3)
+    }
+
+
+def run_batch(recommender, usernames, out, workers=4, top_n=10, incremental=True, log=sys.stderr,
+              scorer=None, fields=None, latency_budget=None, full_history=False):
+    """使用线程池批量处理用户名流，结果按完成顺序写出"""
+    field_paths = compile_fields(fields)
+    started = time.time()
+    done = failed = 0
+    max_in_flight = workers * 2  # 限制在途任务数，输入再大内存也保持稳定
+    prefetch_size = recommender.graphql_backend.batch_size if recommender.graphql_backend else 1
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        usernames = iter(usernames)
+        exhausted = False
+
+        while pending or not exhausted:
+            # 补充任务；GraphQL后端下按批预取，多个用户合并成一个查询
+            while not exhausted and len(pending) < max_in_flight:
+                chunk = list(itertools.islice(usernames, prefetch_size))
+                if not chunk:
+                    exhausted = True
+                    break
+                if recommender.graphql_backend:
+                    recommender.prefetch_profiles(chunk, incremental=incremental)
+                for username in chunk:
+                    future = executor.submit(analyze_one, recommender, username, top_n, incremental, scorer,
+                                             field_paths, latency_budget, full_history)
+                    pending[future] = username
+
+            if not pending:
+                break
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                username = pending.pop(future)
+                try:
+                    record = future.result()
+                except Exception as e:
+                    record = {'username': username, 'error': str(e)}
+                    failed += 1
+                done += 1
+
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+
+                elapsed = time.time() - started
+                status = "✗" if 'error' in record else "✓"
+                print(f"[{done}] {status} {username} | {done / max(elapsed, 1e-9):.2f} 用户/秒 | 在途 {len(pending)}",
+                      file=log, flush=True)
+
+    elapsed = time.time() - started
+    print(f"✅ 完成 {done} 个用户（失败 {failed}），耗时 {elapsed:.1f}s，"
+          f"吞吐 {done / max(elapsed, 1e-9):.2f} 用户/秒", file=log, flush=True)
+    return done, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OpenDigger推荐系统 - 批量分析GitHub用户")
+    parser.add_argument('input', nargs='?', default='-',
+                        help="用户名文件（每行一个用户名或一个JSON对象），'-'表示标准输入")
+    parser.add_argument('-o', '--output', default='-', help="JSONL输出文件，'-'表示标准输出（.gz结尾时gzip压缩）")
+    parser.add_argument('--fields', default=None,
+                        help="推荐结果写出的字段，逗号分隔，支持点号嵌套（如 repo,match_score,metrics.activity.value）；默认全部")
+    parser.add_argument('-w', '--workers', type=int, default=4, help="工作线程数（默认4）")
+    parser.add_argument('-n', '--top-n', type=int, default=10, help="每个用户的推荐数量（默认10）")
+    parser.add_argument('--token', default=os.environ.get('GITHUB_TOKEN'),
+                        help="GitHub Token（默认读取GITHUB_TOKEN环境变量）")
+    parser.add_argument('--backend', choices=['rest', 'graphql'], default='rest',
+                        help="GitHub数据后端（graphql需要Token，可多用户合并查询）")
+    parser.add_argument('--cache-compression', choices=['zlib', 'gzip'], default=None,
+                        help="缓存文件压缩方式（默认不压缩）")
+    parser.add_argument('--github-api', default=None, help="GitHub API地址（可指向本地回放服务）")
+    parser.add_argument('--opendigger-url', default=None, help="OpenDigger数据地址（可指向本地回放服务）")
+    parser.add_argument('--record', default=None, help="把收到的所有HTTP响应录制到该存档（JSONL）")
+    parser.add_argument('--replay', default=None, help="不访问网络，从该存档回放HTTP响应")
+    parser.add_argument('--replay-latency', default=None, help="回放延迟：'recorded' 或固定秒数")
+    parser.add_argument('--snapshot', default=None, help="从目录预热快照启动（见 catalog_snapshot.py）")
+    parser.add_argument('--costar-index', default=None,
+                        help="共同star相似度索引，为推荐加入协同过滤加成（见 costar_index.py）")
+    parser.add_argument('--scoring-processes', type=int, default=None,
+                        help="评分使用的进程数（目录放在共享内存中），0表示每个CPU核一个；默认在线程中评分")
+    parser.add_argument('--latency-budget', type=float, default=None,
+                        help="每个用户的时间预算（秒），超出时用过期/默认数据输出降级结果")
+    parser.add_argument('--full', action='store_true', help="忽略已保存的画像状态，全量分析")
+    parser.add_argument('--full-history', action='store_true',
+                        help="流式分析全部仓库和starred（不限于最近的窗口，内存恒定），适合超大账户和组织")
+    parser.add_argument('--profile-dir', default=None,
+                        help="为每次分析/推荐输出Chrome trace文件到该目录")
+    parser.add_argument('--metrics-out', default=None,
+                        help="结束时把流水线指标（Prometheus文本格式）写入该文件")
+    parser.add_argument('-q', '--quiet', action='store_true', help="不输出分析过程日志，只保留进度")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+    log = sys.stderr
+    transport_options = {'record': args.record, 'replay': args.replay, 'latency': parse_latency(args.replay_latency)}
+    transport = build_transport(**transport_options)
+
+    try:
+        with detached_stdout(args.quiet) as stdout:
+            out = stdout if args.output == '-' else open_output(args.output)
+            try:
+                recommender = AdvancedOpenDiggerRecommender(github_token=args.token,
+                                                            github_backend=args.backend,
+                                                            cache_compression=args.cache_compression,
+                                                            profile_dir=args.profile_dir,
+                                                            github_api=args.github_api,
+                                                            opendigger_url=args.opendigger_url,
+                                                            transport=transport,
+                                                            snapshot=args.snapshot,
+                                                            costar_index=args.costar_index)
+                with contextlib.ExitStack() as stack:
+                    scorer = None
+                    if args.scoring_processes is not None:
+                        scorer = stack.enter_context(ParallelScorer(recommender, args.scoring_processes or None,
+                                                                    transport_options=transport_options))
+                    run_batch(recommender, iter_usernames(source), out,
+                              workers=max(args.workers, 1), top_n=args.top_n,
+                              incremental=not args.full, log=log, scorer=scorer,
+                              fields=parse_fields(args.fields), latency_budget=args.latency_budget,
+                              full_history=args.full_history)
+                if args.metrics_out:
+                    with open(args.metrics_out, 'w', encoding='utf-8') as f:
+                        f.write(recommender.metrics.render_prometheus())
+            finally:
+                if out is not stdout:
+                    out.close()
+    except KeyboardInterrupt:
+        print("\n👋 批量分析已中断", file=log)
+        return 130
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
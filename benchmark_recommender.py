@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+离线性能基准
+生成合成项目目录（100 ~ 1M 个仓库，标签服从长尾分布）、合成用户画像和预置的OpenDigger指标，
+不访问任何网络，测量推荐、技能/兴趣提取和健康度计算的吞吐、延迟分位数和峰值内存。
+可以保存基线，并在之后的运行中与基线比较，出现性能回退时以非零状态退出。
+
+用法:
+    python benchmark_recommender.py --sizes 100,1000,10000 --save-baseline bench_baseline.json
+    python benchmark_recommender.py --sizes 100,1000,10000 --baseline bench_baseline.json
+"""
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import platform
+import tracemalloc
+import contextlib
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from advanced_recommender import AdvancedOpenDiggerRecommender
+
+CATEGORIES = ['database', 'analytics', 'visualization', 'ai-ml', 'frontend', 'backend', 'dev-tools', 'devops']
+DIFFICULTIES = ['beginner', 'intermediate', 'advanced']
+LANGUAGES = ['Python', 'JavaScript', 'Java', 'TypeScript', 'Go', 'Rust', 'C++', None]
+EXPERIENCE_LEVELS = ['beginner', 'intermediate', 'advanced']
+REPO_DESCRIPTIONS = [
+    'machine learning toolkit', 'web frontend built with react', 'backend api server',
+    'iot sensor data pipeline', 'big data processing with spark', 'dashboard for data visualization',
+    'docker and kubernetes deployment', 'open source github tools', 'mobile app for android', None
+]
+STARRED_DESCRIPTIONS = [
+    'data analysis library', 'llm and gpt tooling', 'cloud native docker tools', 'web framework',
+    'blockchain web3 sdk', 'game engine built with unity', 'productivity tools', None
+]
+TOPICS = ['ai', 'web', 'data', 'docker', 'iot', 'vue', 'react', 'python', 'machine-learning', 'cli',
+          'database', 'kubernetes', 'visualization', 'nlp', 'devops']
+
+
+def zipf_sampler(rng, items, exponent=1.1):
+    """按Zipf分布（长尾）抽样：少数热门标签出现得多，大量冷门标签出现得少"""
+    weights = [1.0 / (rank + 1) ** exponent for rank in range(len(items))]
+    return lambda k: rng.choices(items, weights=weights, k=k)
+
+
+def build_vocabulary(recommender):
+    """标签词表：真实目录标签 + 技能图谱词汇"""
+    vocabulary = []
+    for info in recommender.project_db.values():
+        vocabulary.extend(info['tags'])
+    for skill, data in recommender.skill_graph.items():
+        vocabulary.append(skill)
+        vocabulary.extend(data['related'])
+    return list(dict.fromkeys(vocabulary))
+
+
+def generate_catalog(rng, size, vocabulary):
+    """生成合成项目目录"""
+    sample_tags = zipf_sampler(rng, vocabulary)
+    catalog = {}
+    for i in range(size):
+        tags = list(dict.fromkeys(sample_tags(rng.randint(4, 11))))
+        if rng.random() < 0.01:
+            tags.append('大赛工具')
+        catalog[f"synthetic-org{i % 997}/repo-{i}"] = {
+            'tags': tags,
+            'category': rng.choice(CATEGORIES),
+            'difficulty': rng.choice(DIFFICULTIES),
+            'description': f"合成项目 {i}"
+        }
+    return catalog
+
+
+def generate_metrics(rng):
+    """生成一份预置的OpenDigger指标"""
+    contributors = rng.randint(0, 2000)
+    return {
+        'activity': {'value': round(rng.lognormvariate(3, 1.2), 2), 'trend': rng.choice(['up', 'down', 'stable']),
+                     'latest_month': '2026-09'},
+        'openrank': {'value': round(rng.lognormvariate(2, 1.3), 2), 'trend': 'stable', 'latest_month': '2026-09'},
+        'contributors': {'value': contributors, 'trend': 'stable', 'latest_month': '2026-09'},
+        'new_contributors': {'value': rng.randint(0, max(contributors // 5, 1)), 'trend': 'stable',
+                             'latest_month': '2026-09'}
+    }
+
+
+def generate_profile(rng, vocabulary):
+    """生成合成用户画像"""
+    sample_tags = zipf_sampler(rng, vocabulary)
+    return {
+        'skills': list(dict.fromkeys(sample_tags(rng.randint(3, 15)))),
+        'interests': list(dict.fromkeys(sample_tags(rng.randint(0, 8)))),
+        'experience_level': rng.choice(EXPERIENCE_LEVELS),
+        'activity_score': rng.randint(0, 100)
+    }
+
+
+def generate_repos(rng, owner, count):
+    """生成REST结构的用户仓库列表"""
+    return [{
+        'full_name': f"{owner}/repo-{i}",
+        'name': f"repo-{i}",
+        'language': rng.choice(LANGUAGES),
+        'description': rng.choice(REPO_DESCRIPTIONS),
+        'topics': rng.sample(TOPICS, rng.randint(0, 4)),
+        'updated_at': f"2026-{rng.randint(1, 9):02d}-{rng.randint(1, 28):02d}T00:00:00Z",
+        'stargazers_count': rng.randint(0, 500),
+        'forks_count': rng.randint(0, 100)
+    } for i in range(count)]
+
+
+def generate_starred(rng, count):
+    """生成REST结构的starred列表"""
+    return [{
+        'full_name': f"starred-org/repo-{i}",
+        'name': f"repo-{i}",
+        'description': rng.choice(STARRED_DESCRIPTIONS),
+        'topics': rng.sample(TOPICS, rng.randint(0, 4))
+    } for i in range(count)]
+
+
+def prepare_recommender(rng, size):
+    """创建完全离线的推荐器：合成目录 + 内存缓存中预置指标"""
+    recommender = AdvancedOpenDiggerRecommender()
+    vocabulary = build_vocabulary(recommender)
+    recommender.project_db = generate_catalog(rng, size, vocabulary)
+    recommender.MEMORY_CACHE_SIZE = size + 1024
+
+    now = time.time()
+    for repo in recommender.project_db:
+        recommender._remember_cache(recommender._opendigger_cache_file(repo), now, generate_metrics(rng))
+    recommender.invalidate_recommendation_cache()
+    return recommender, vocabulary
+
+
+def percentile(sorted_values, fraction):
+    """分位数（最近秩法）"""
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def measure(func, inputs, min_iterations, time_budget):
+    """重复执行，统计延迟分位数与吞吐；峰值内存单独用tracemalloc测一次"""
+    latencies = []
+    started = time.perf_counter()
+    i = 0
+    while i < min_iterations or (time.perf_counter() - started < time_budget and i < min_iterations * 20):
+        item = inputs[i % len(inputs)]
+        call_started = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - call_started)
+        i += 1
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    func(inputs[0])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'iterations': len(latencies),
+        'throughput_per_s': round(len(latencies) / elapsed, 3),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 4),
+        'p90_ms': round(percentile(latencies, 0.90) * 1000, 4),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 4),
+        'peak_memory_kb': round(peak / 1024, 1)
+    }
+
+
+def run_suite(sizes, iterations=20, time_budget=2.0, seed=42, log=sys.stderr):
+    """运行全部基准，返回 {基准名: 结果}"""
+    results = {}
+
+    for size in sizes:
+        rng = random.Random(seed + size)
+        print(f"📦 目录规模 {size}: 生成合成数据...", file=log, flush=True)
+        recommender, vocabulary = prepare_recommender(rng, size)
+        profiles = [generate_profile(rng, vocabulary) for _ in range(16)]
+        # 大目录单次推荐就要数秒，减少迭代次数
+        size_iterations = max(1, min(iterations, iterations * 1000 // size))
+
+        def recommend(profile):
+            recommender._recommendation_cache.clear()
+            recommender.recommend_projects(profile, top_n=10)
+
+        metrics_list = [recommender._memory_cache[recommender._opendigger_cache_file(repo)][1]
+                        for repo in list(recommender.project_db)[:1000]]
+
+        def health(_):
+            for metrics in metrics_list:
+                recommender._calculate_health_score(metrics)
+
+        results[f"recommend_projects[{size}]"] = measure(recommend, profiles, size_iterations, time_budget)
+        results[f"health_score_x1000[{size}]"] = measure(health, [None], iterations, time_budget)
+        print(f"   ✓ recommend_projects p50 {results[f'recommend_projects[{size}]']['p50_ms']:.2f}ms",
+              file=log, flush=True)
+
+    # 提取器与目录规模无关，按账户规模测量
+    rng = random.Random(seed)
+    recommender = AdvancedOpenDiggerRecommender()
+    for count in (100, 1000, 10000):
+        repos_inputs = [generate_repos(rng, f"user{i}", count) for i in range(2)]
+        starred_inputs = [generate_starred(rng, count) for _ in range(2)]
+        results[f"extract_skills[{count}]"] = measure(
+            recommender._extract_enhanced_skills_from_repos, repos_inputs,
+            max(1, iterations * 100 // count), time_budget)
+        results[f"extract_interests[{count}]"] = measure(
+            recommender._extract_enhanced_interests_from_starred, starred_inputs,
+            max(1, iterations * 100 // count), time_budget)
+        # 流式提取：草图计数 + 限长示例，峰值内存不随账户规模增长
+        results[f"extract_skills_stream[{count}]"] = measure(
+            partial(recommender._extract_enhanced_skills_from_repos, stream=True), repos_inputs,
+            max(1, iterations * 100 // count), time_budget)
+        results[f"extract_interests_stream[{count}]"] = measure(
+            partial(recommender._extract_enhanced_interests_from_starred, stream=True), starred_inputs,
+            max(1, iterations * 100 // count), time_budget)
+
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """与基线比较：p50延迟或峰值内存超过基线(1+tolerance)倍视为回退"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for key in ('p50_ms', 'peak_memory_kb'):
+            if previous[key] > 0 and current[key] > previous[key] * (1 + tolerance):
+                regressions.append(f"{name} {key}: {previous[key]} -> {current[key]}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OpenDigger推荐系统 - 离线性能基准")
+    parser.add_argument('--sizes', default='100,1000,10000',
+                        help="合成目录规模（逗号分隔，例如 100,10000,1000000）")
+    parser.add_argument('--iterations', type=int, default=20, help="每项基准的最少迭代次数")
+    parser.add_argument('--time-budget', type=float, default=2.0, help="每项基准的时间预算（秒）")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='-', help="结果JSON输出文件，'-'表示标准输出")
+    parser.add_argument('--baseline', default=None, help="基线文件，出现回退时以状态码1退出")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="允许的回退比例（默认25%%）")
+    parser.add_argument('--save-baseline', default=None, help="把本次结果保存为基线")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+
+    # 推荐器会创建cache/和user_data/目录并打印过程日志，全部隔离在临时目录和空设备里
+    workdir = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, 'w') as devnull:
+        os.chdir(tmp)
+        try:
+            with contextlib.redirect_stdout(devnull):
+                results = run_suite(sizes, args.iterations, args.time_budget, args.seed)
+        finally:
+            os.chdir(workdir)
+
+    report = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"💾 基线已保存: {args.save_baseline}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("❌ 性能回退:", file=sys.stderr)
+            for line in regressions:
+                print(f"   {line}", file=sys.stderr)
+            return 1
+        print("✅ 未发现性能回退", file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
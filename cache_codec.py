@@ -0,0 +1,103 @@
+"""
+缓存编解码层
+紧凑JSON（可选zlib/gzip压缩）+ 版本头；安装了orjson时自动使用，否则回退标准库json。
+没有版本头的旧缓存文件（带缩进的纯JSON）仍然可以读取。
+"""
+import gzip
+import json
+import os
+import tempfile
+import zlib
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 文件头：魔数 + 格式版本 + 压缩方式
+MAGIC = b'\x89ODC'
+FORMAT_VERSION = 1
+HEADER_SIZE = len(MAGIC) + 2
+
+COMPRESSION_CODES = {None: 0, 'zlib': 1, 'gzip': 2}
+COMPRESSION_NAMES = {code: name for name, code in COMPRESSION_CODES.items()}
+
+# 缓存文件损坏（截断、非法JSON、解压失败）时 decode/read_file 可能抛出的异常
+DECODE_ERRORS = (ValueError, EOFError, zlib.error, gzip.BadGzipFile)
+
+
+def dumps(obj):
+    """序列化为紧凑的UTF-8 JSON字节串"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data):
+    """从JSON字节串反序列化"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(bytes(data))
+
+
+def encode(obj, compression=None):
+    """编码为带版本头的缓存负载"""
+    if compression not in COMPRESSION_CODES:
+        raise ValueError(f"不支持的压缩方式: {compression}")
+
+    payload = dumps(obj)
+    if compression == 'zlib':
+        payload = zlib.compress(payload)
+    elif compression == 'gzip':
+        payload = gzip.compress(payload)
+
+    return MAGIC + bytes([FORMAT_VERSION, COMPRESSION_CODES[compression]]) + payload
+
+
+def decode(data):
+    """解码缓存负载（bytes、memoryview或mmap）；兼容没有版本头的旧JSON文件"""
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        # 旧格式：json.dump(..., indent=2) 写出的纯文本
+        return loads(data)
+
+    version = data[len(MAGIC)]
+    if version > FORMAT_VERSION:
+        raise ValueError(f"缓存格式版本过新: {version}")
+
+    compression = COMPRESSION_NAMES.get(data[len(MAGIC) + 1], 'unknown')
+    payload = memoryview(data)[HEADER_SIZE:]
+    if compression == 'zlib':
+        payload = zlib.decompress(payload)
+    elif compression == 'gzip':
+        payload = gzip.decompress(payload)
+    elif compression is not None:
+        raise ValueError(f"未知的压缩方式: {compression}")
+
+    return loads(payload)
+
+
+def atomic_write(path, data):
+    """原子写入：先写同目录下的临时文件再替换，其他进程不会读到写了一半的文件"""
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_file(path, obj, compression=None):
+    """原子写入缓存文件"""
+    atomic_write(path, encode(obj, compression))
+
+
+def read_file(path):
+    """读取缓存文件"""
+    with open(path, 'rb') as f:
+        return decode(f.read())
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+缓存回收
+扫描缓存目录（分片布局 cache/{类别}/{xx}/，兼容旧版平铺文件）：
+1. 删除过期超过保留期的条目（过期数据在保留期内仍可用于降级和回填期间的兜底）
+2. 删除残留的临时文件和失效租约
+3. 超出磁盘配额时按最近访问时间（LRU，文件的atime，由推荐器批量写回）淘汰，直到总大小降到配额以内
+可作为命令单独运行，也可在服务进程中作为后台线程定时运行（多个进程间用租约保证只有一个进程在回收）。
+
+用法:
+    python cache_gc.py --max-size 500M --keep-stale 86400
+    python cache_gc.py --migrate       # 把旧版平铺的缓存文件移动到分片目录
+"""
+import sys
+import os
+import time
+import hashlib
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cache_lease import CacheLease, LEASE_SUFFIX
+
+# 残留临时文件（写入进程中途退出）的清理期限（秒）
+TEMP_FILE_MAX_AGE = 3600
+# 后台回收在进程间协调用的租约（位于缓存目录下）
+GC_LEASE_NAME = '.gc'
+
+SIZE_UNITS = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def sharded_path(cache_dir, filename):
+    """分片缓存路径 {cache_dir}/{类别}/{文件名哈希前两位}/{文件名}，类别为文件名前缀"""
+    kind = filename.split('_', 1)[0]
+    shard = hashlib.md5(filename.encode()).hexdigest()[:2]
+    return os.path.join(cache_dir, kind, shard, filename)
+
+
+def parse_size(value):
+    """解析磁盘配额：纯数字为字节，支持K/M/G后缀"""
+    if value is None:
+        return None
+    value = value.strip().upper().rstrip('B')
+    if value and value[-1] in SIZE_UNITS:
+        return int(float(value[:-1]) * SIZE_UNITS[value[-1]])
+    return int(value)
+
+
+def iter_cache_files(cache_dir):
+    """递归列出缓存目录下的所有文件（os.DirEntry）"""
+    stack = [cache_dir]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+        except FileNotFoundError:
+            continue
+
+
+def collect(cache_dir, ttls, keep_stale=86400, max_bytes=None, lease_ttl=60, dry_run=False):
+    """
+    执行一次回收
+    ttls: 缓存类别（文件名前缀）-> 有效期（秒），未知类别的文件只参与配额淘汰
+    返回统计信息
+    """
+    now = time.time()
+    stats = {'scanned': 0, 'expired': 0, 'temp': 0, 'leases': 0, 'evicted': 0,
+             'freed_bytes': 0, 'remaining_bytes': 0}
+    live = []
+
+    def remove(entry, reason, size):
+        if not dry_run:
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                return
+        stats[reason] += 1
+        stats['freed_bytes'] += size
+
+    for entry in iter_cache_files(cache_dir):
+        stats['scanned'] += 1
+        try:
+            info = entry.stat(follow_symlinks=False)
+        except OSError:
+            continue
+
+        name = entry.name
+        if name.startswith('.tmp_'):
+            if now - info.st_mtime > TEMP_FILE_MAX_AGE:
+                remove(entry, 'temp', info.st_size)
+            continue
+        if name == GC_LEASE_NAME + LEASE_SUFFIX:
+            continue
+        if name.endswith(LEASE_SUFFIX):
+            if now - info.st_mtime > lease_ttl:
+                remove(entry, 'leases', info.st_size)
+            continue
+
+        ttl = ttls.get(name.split('_', 1)[0])
+        if ttl is not None and now - info.st_mtime > ttl + keep_stale:
+            remove(entry, 'expired', info.st_size)
+            continue
+
+        live.append((info.st_atime, info.st_size, entry))
+
+    total = sum(size for _, size, _ in live)
+    if max_bytes is not None and total > max_bytes:
+        live.sort(key=lambda item: item[0])
+        for _, size, entry in live:
+            if total <= max_bytes:
+                break
+            remove(entry, 'evicted', size)
+            total -= size
+
+    stats['remaining_bytes'] = total
+    return stats
+
+
+def migrate_legacy(cache_dir, dry_run=False):
+    """把旧版平铺的缓存文件移动到分片目录（保留修改时间），返回移动的文件数"""
+    moved = 0
+    for entry in os.scandir(cache_dir):
+        if not entry.is_file() or not entry.name.endswith('.json') or '_' not in entry.name:
+            continue
+        target = sharded_path(cache_dir, entry.name)
+        if not dry_run:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(entry.path, target)
+        moved += 1
+    return moved
+
+
+class BackgroundCacheGC:
+    """
+    后台定时回收线程；多个进程共享缓存目录时只有持有租约的进程执行回收
+    持有者每轮回收前后续期租约，租约有效期为回收间隔的两倍：持有者正常运行时其他进程不会接管，
+    持有者退出后租约过期，由其他进程接管
+    """
+
+    def __init__(self, cache_dir, ttls, interval=600, **options):
+        self.cache_dir = cache_dir
+        self.ttls = ttls
+        self.interval = interval
+        self.lease_ttl = interval * 2
+        self.options = options
+        self.last_stats = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='cache-gc', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        lease = CacheLease(os.path.join(self.cache_dir, GC_LEASE_NAME), ttl=self.lease_ttl)
+        try:
+            while not self._stop.wait(self.interval):
+                if not (lease.renew() or lease.acquire()):
+                    continue
+                try:
+                    self.last_stats = collect(self.cache_dir, self.ttls, **self.options)
+                except OSError as e:
+                    print(f"⚠️ 缓存回收失败: {e}")
+                lease.renew()
+        finally:
+            lease.release()
+
+
+def default_ttls():
+    """推荐器使用的各类缓存有效期"""
+    from advanced_recommender import AdvancedOpenDiggerRecommender
+    return {
+        'github': AdvancedOpenDiggerRecommender.GITHUB_CACHE_TTL,
+        'opendigger': AdvancedOpenDiggerRecommender.OPENDIGGER_CACHE_TTL,
+        'ranking': AdvancedOpenDiggerRecommender.RANKING_CURSOR_TTL
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OpenDigger推荐系统 - 缓存回收")
+    parser.add_argument('--cache-dir', default='cache', help="缓存目录（默认cache）")
+    parser.add_argument('--max-size', default=None, help="磁盘配额（如 500M、2G），超出时按LRU淘汰")
+    parser.add_argument('--keep-stale', type=float, default=86400,
+                        help="过期条目的保留期（秒），保留期内仍可作为降级兜底数据（默认1天）")
+    parser.add_argument('--migrate', action='store_true', help="先把旧版平铺的缓存文件移动到分片目录")
+    parser.add_argument('--dry-run', action='store_true', help="只统计，不删除")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.cache_dir):
+        print(f"❌ 缓存目录不存在: {args.cache_dir}")
+        return 1
+
+    if args.migrate:
+        print(f"📦 已迁移 {migrate_legacy(args.cache_dir, args.dry_run)} 个旧版缓存文件")
+
+    started = time.time()
+    stats = collect(args.cache_dir, default_ttls(), keep_stale=args.keep_stale,
+                    max_bytes=parse_size(args.max_size), dry_run=args.dry_run)
+    print(f"🧹 扫描 {stats['scanned']} 个文件：过期 {stats['expired']}，LRU淘汰 {stats['evicted']}，"
+          f"临时文件 {stats['temp']}，失效租约 {stats['leases']}")
+    print(f"   释放 {stats['freed_bytes'] / 1024:.1f} KB，剩余 {stats['remaining_bytes'] / 1024:.1f} KB，"
+          f"耗时 {time.time() - started:.2f}s{'（演练模式，未删除）' if args.dry_run else ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
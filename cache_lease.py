@@ -0,0 +1,127 @@
+"""
+缓存回填租约
+多个进程共享同一个缓存目录时，用租约文件保证同一个过期条目只由一个进程回填，
+其他进程等待回填完成或先返回过期数据。租约文件记录持有者的 pid 和随机nonce：
+- 新租约用 O_CREAT | O_EXCL 原子创建（各平台通用）
+- 持有者崩溃留下的租约超过有效期后，由其他进程把自己的内容写入临时文件再 os.replace 覆盖接管，
+  替换后读回确认租约内容是自己的（多个进程同时接管时只有最后一次替换生效，其余进程放弃）
+- 释放和续期前先确认租约仍属于自己，不会删除已被其他进程接管的租约
+"""
+import os
+import time
+import secrets
+
+LEASE_SUFFIX = '.lease'
+
+
+class CacheLease:
+    def __init__(self, cache_file, ttl=30.0):
+        """ttl: 租约有效期（秒），应大于一次回填的最长耗时"""
+        self.path = cache_file + LEASE_SUFFIX
+        self.ttl = ttl
+        self.owned = False
+        self.token = f"{os.getpid()} {secrets.token_hex(8)}"
+
+    def acquire(self):
+        """尝试取得租约；其他进程持有未过期的租约时返回False"""
+        try:
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return self._take_over()
+        except OSError:
+            # 无法创建租约文件（如目录不可写）时不做协调，直接回填
+            return True
+
+        with os.fdopen(fd, 'w') as f:
+            f.write(self.token + "\n")
+        self.owned = True
+        return True
+
+    def _take_over(self):
+        """
+        接管过期租约
+        1. 租约未过期，或读到的内容在准备期间已变化（刚被其他进程接管）时放弃
+        2. 本进程的内容写入临时文件后 os.replace 原子替换租约文件
+        3. 读回租约文件，内容是自己的才算取得
+        """
+        previous = self._read()
+        if not self._expired():
+            return False
+        temp_path = os.path.join(os.path.dirname(self.path),
+                                 f".tmp_{os.path.basename(self.path)}_{self.token.split()[1]}")
+        try:
+            with open(temp_path, 'w') as f:
+                f.write(self.token + "\n")
+            if self._read() != previous or not self._expired():
+                os.unlink(temp_path)
+                return False
+            os.replace(temp_path, self.path)
+        except OSError:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            return False
+        self.owned = self._read() == self.token
+        return self.owned
+
+    def held(self):
+        """租约是否被（任意进程）持有且未过期"""
+        return os.path.exists(self.path) and not self._expired()
+
+    def wait(self, timeout):
+        """等待租约释放，最多等待timeout秒；返回租约是否已释放"""
+        deadline = time.time() + timeout
+        delay = 0.01
+        while self.held():
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.2)
+        return True
+
+    def renew(self):
+        """续期仍属于自己的租约（刷新修改时间）；租约已被接管或删除时返回False"""
+        if self.owned and self._read() == self.token:
+            try:
+                os.utime(self.path)
+                return True
+            except OSError:
+                pass
+        self.owned = False
+        return False
+
+    def release(self):
+        """释放租约：只删除仍属于自己的租约文件"""
+        if self.owned:
+            if self._read() == self.token:
+                self._unlink()
+            self.owned = False
+
+    def _read(self):
+        """租约文件中的持有者（pid 和 nonce），文件不存在或不可读时返回None"""
+        try:
+            with open(self.path, 'r') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _expired(self):
+        try:
+            return time.time() - os.path.getmtime(self.path) > self.ttl
+        except OSError:
+            return True
+
+    def _unlink(self):
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+缓存预热
+按缓存有效期和访问统计，在缓存过期之前主动刷新：
+- 目录中所有项目的OpenDigger指标
+- 近期被频繁分析的GitHub用户（访问统计记录在 user_data/state_*.json 中）
+所有请求都经过令牌桶限速，不会超出配置的请求速率预算。可单次运行，也可作为守护进程定时运行。
+
+用法:
+    python cache_warmer.py --rate 2 --ahead 1800             # 单次预热
+    python cache_warmer.py --daemon --interval 300 --rate 1  # 守护进程
+"""
+import sys
+import os
+import glob
+import json
+import time
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from advanced_recommender import AdvancedOpenDiggerRecommender
+
+
+class RateBudget:
+    """令牌桶：平均每秒rate个请求，最多允许burst个突发请求"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.spent = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取一个令牌，没有令牌时等待"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.spent += 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def wrap(self, transport):
+        """包装transport：每个HTTP请求先从令牌桶取令牌"""
+        def budgeted(method, url, **kwargs):
+            self.acquire()
+            return transport(method, url, **kwargs)
+        return budgeted
+
+
+class CacheWarmer:
+    def __init__(self, recommender, budget, ahead=1800, top_users=50, min_accesses=2, active_days=7):
+        """
+        recommender: 专用于预热的推荐器（会被设置为强制刷新、不记录访问）
+        ahead: 距离过期不足该秒数的缓存会被刷新
+        top_users / min_accesses / active_days: 热门用户的筛选条件
+        """
+        self.recommender = recommender
+        self.budget = budget
+        self.ahead = ahead
+        self.top_users = top_users
+        self.min_accesses = min_accesses
+        self.active_days = active_days
+
+        recommender.force_refresh = True
+        recommender.track_access = False
+        recommender.transport = budget.wrap(recommender.transport)
+
+    def _expires_at(self, cache_file, ttl):
+        """磁盘缓存的过期时间（不存在时视为已过期）"""
+        try:
+            return os.path.getmtime(cache_file) + ttl
+        except OSError:
+            return 0
+
+    def plan_repos(self, now=None):
+        """即将过期的项目指标，按过期时间从早到晚排列"""
+        now = now or time.time()
+        recommender = self.recommender
+        due = []
+        for repo in recommender.project_db:
+            expires_at = self._expires_at(recommender._opendigger_cache_file(repo),
+                                          recommender.OPENDIGGER_CACHE_TTL)
+            if expires_at - now < self.ahead:
+                due.append((expires_at, repo))
+        return [repo for _, repo in sorted(due)]
+
+    def plan_users(self, now=None):
+        """
+        即将过期的热门用户
+        1. 读取各用户画像状态中的访问统计，筛选近期访问次数达到阈值的用户
+        2. 按访问次数取前top_users个
+        3. 以用户信息接口的缓存时间判断是否即将过期，按过期时间排列
+        """
+        now = now or time.time()
+        recommender = self.recommender
+        popular = []
+        for state_file in glob.glob("user_data/state_*.json"):
+            try:
+                with open(state_file, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                continue
+
+            access = state.get('access') or {}
+            if access.get('count', 0) < self.min_accesses:
+                continue
+            if now - (access.get('last_accessed') or 0) > self.active_days * 86400:
+                continue
+            username = state.get('username')
+            if not isinstance(username, str) or not recommender.USERNAME_PATTERN.fullmatch(username):
+                continue
+            popular.append((access['count'], username))
+
+        popular.sort(reverse=True)
+        due = []
+        for count, username in popular[:self.top_users]:
+            expires_at = self._expires_at(recommender._github_cache_file(f"/users/{username}"),
+                                          recommender.GITHUB_CACHE_TTL)
+            if expires_at - now < self.ahead:
+                due.append((expires_at, -count, username))
+        return [username for _, _, username in sorted(due)]
+
+    def run_once(self, dry_run=False):
+        """执行一轮预热，返回刷新的项目数和用户数"""
+        started = time.time()
+        repos = self.plan_repos(started)
+        users = self.plan_users(started)
+        print(f"🔥 缓存预热: {len(repos)} 个项目指标、{len(users)} 个热门用户即将过期")
+        if dry_run:
+            for repo in repos:
+                print(f"  · 项目 {repo}")
+            for username in users:
+                print(f"  · 用户 {username}")
+            return 0, 0
+
+        spent = self.budget.spent
+        for repo in repos:
+            self.recommender.get_cached_metrics(repo, fetch_missing=True)
+            print(f"  ✓ 项目 {repo}")
+        for username in users:
+            self.recommender.analyze_github_user(username, incremental=True)
+            print(f"  ✓ 用户 {username}")
+
+        print(f"✅ 预热完成：{self.budget.spent - spent} 个请求，耗时 {time.time() - started:.1f}s")
+        return len(repos), len(users)
+
+    def run_forever(self, interval=300):
+        """守护进程模式：每隔interval秒执行一轮"""
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"⚠️ 本轮预热失败: {e}")
+            time.sleep(interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OpenDigger推荐系统 - 缓存预热")
+    parser.add_argument('--daemon', action='store_true', help="守护进程模式，定时预热")
+    parser.add_argument('--interval', type=float, default=300, help="守护进程模式下两轮预热的间隔（秒）")
+    parser.add_argument('--rate', type=float, default=1.0, help="请求速率预算（每秒请求数）")
+    parser.add_argument('--burst', type=int, default=5, help="允许的突发请求数")
+    parser.add_argument('--ahead', type=float, default=1800, help="距离过期不足该秒数的缓存会被刷新")
+    parser.add_argument('--top-users', type=int, default=50, help="最多预热的热门用户数")
+    parser.add_argument('--min-accesses', type=int, default=2, help="热门用户的最少访问次数")
+    parser.add_argument('--active-days', type=float, default=7, help="只预热最近若干天内访问过的用户")
+    parser.add_argument('--token', default=os.environ.get('GITHUB_TOKEN'),
+                        help="GitHub Token（默认读取GITHUB_TOKEN环境变量）")
+    parser.add_argument('--github-api', default=None, help="GitHub API地址（可指向本地回放服务）")
+    parser.add_argument('--opendigger-url', default=None, help="OpenDigger数据地址（可指向本地回放服务）")
+    parser.add_argument('--cache-compression', choices=['zlib', 'gzip'], default=None,
+                        help="缓存文件压缩方式（与服务进程保持一致）")
+    parser.add_argument('--dry-run', action='store_true', help="只列出将要刷新的项目和用户")
+    args = parser.parse_args(argv)
+
+    recommender = AdvancedOpenDiggerRecommender(github_token=args.token,
+                                                cache_compression=args.cache_compression,
+                                                github_api=args.github_api,
+                                                opendigger_url=args.opendigger_url)
+    warmer = CacheWarmer(recommender, RateBudget(args.rate, args.burst), ahead=args.ahead,
+                         top_users=args.top_users, min_accesses=args.min_accesses,
+                         active_days=args.active_days)
+
+    try:
+        if args.daemon:
+            warmer.run_forever(args.interval)
+        else:
+            warmer.run_once(dry_run=args.dry_run)
+    except KeyboardInterrupt:
+        print("\n👋 缓存预热已停止")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+目录预热快照
+把推荐器启动后才会逐步构建、评分时实际使用的状态（项目目录、技能图谱、技能词表、
+编译成编号的项目标签和相关技能、各项目最新的OpenDigger指标）编译成一个带版本号的快照文件。
+新进程通过mmap读取快照即可直接服务，不必重建目录、编译标签、逐个读取指标缓存文件。
+
+用法:
+    python catalog_snapshot.py build catalog.snapshot --compression zlib
+    python catalog_snapshot.py info catalog.snapshot
+    recommender = AdvancedOpenDiggerRecommender(snapshot='catalog.snapshot')
+"""
+import sys
+import os
+import time
+import mmap
+import argparse
+import contextlib
+
+import cache_codec
+from skill_vocabulary import SkillVocabulary
+
+# 快照内容的结构版本（与cache_codec的文件头版本无关），结构变化时递增
+SNAPSHOT_VERSION = 2
+
+
+def compile_snapshot(recommender, fetch_missing=False):
+    """
+    编译推荐器的当前状态
+    1. 目录和技能图谱
+    2. 技能词表，以及按词表编号编译好的项目标签、大赛专项规则和相关技能（与评分使用的一致）
+    3. 每个项目的最新指标及其写入时间（来自内存/磁盘缓存；fetch_missing时补抓缺失的指标）
+    """
+    project_db = recommender.project_db
+    compiled = recommender._compiled_catalog()
+    metrics = {}
+    for repo in project_db:
+        data, written_at = recommender.get_cached_metrics(repo, fetch_missing)
+        if data and written_at is not None:
+            metrics[repo] = {'written_at': written_at, 'data': data}
+
+    return {
+        'snapshot_version': SNAPSHOT_VERSION,
+        'created_at': time.time(),
+        'catalog': project_db,
+        'skill_graph': recommender.skill_graph,
+        'vocabulary': recommender.vocabulary.to_dict(),
+        # JSON对象的键只能是字符串，编号映射保存为 [编号, [相关编号]] 列表
+        'compiled_tags': {repo: sorted(tag_ids) for repo, tag_ids in compiled['tags'].items()},
+        'compiled_competition': {repo: list(rules) for repo, rules in compiled['competition'].items()},
+        'compiled_related': [[skill_id, list(related)] for skill_id, related in compiled['related'].items()],
+        'metrics': metrics
+    }
+
+
+def write_snapshot(path, snapshot, compression=None):
+    """原子写出快照文件（正在读取旧快照的进程不受影响）"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    cache_codec.write_file(path, snapshot, compression)
+
+
+def load_snapshot(path):
+    """通过mmap读取快照文件（未压缩时直接从映射的页面解析，不额外复制整个文件）"""
+    with open(path, 'rb') as f:
+        with contextlib.closing(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)) as mapped:
+            return decode_snapshot(mapped)
+
+
+def decode_snapshot(buffer):
+    """从快照字节（bytes、mmap或共享内存）解码并检查版本"""
+    snapshot = cache_codec.decode(buffer)
+    version = snapshot.get('snapshot_version') if isinstance(snapshot, dict) else None
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"快照版本不匹配: {version}（需要 {SNAPSHOT_VERSION}）")
+    return snapshot
+
+
+def apply_snapshot(recommender, snapshot):
+    """
+    把快照装入推荐器
+    1. 替换目录、技能图谱和技能词表（评分规则按恢复的词表重新编译）
+    2. 以原始写入时间预热指标内存缓存（过期的指标仍按TTL重新抓取）
+    3. 目录已变化，清空推荐结果缓存，再装入编译好的标签、大赛专项规则和相关技能编号
+    """
+    recommender.project_db = snapshot['catalog']
+    recommender.skill_graph = snapshot['skill_graph']
+    recommender.vocabulary = SkillVocabulary.from_dict(snapshot['vocabulary'])
+    recommender._scoring_rules = recommender._compile_scoring_rules()
+
+    metrics = snapshot['metrics']
+    recommender.MEMORY_CACHE_SIZE = max(recommender.MEMORY_CACHE_SIZE, len(metrics) * 2)
+    for repo, entry in metrics.items():
+        recommender._remember_cache(recommender._opendigger_cache_file(repo),
+                                    entry['written_at'], entry['data'])
+
+    recommender.invalidate_recommendation_cache()
+    recommender._compiled_catalog_terms = {
+        'version': recommender.catalog_version,
+        'tags': {repo: frozenset(tag_ids) for repo, tag_ids in snapshot['compiled_tags'].items()},
+        'competition': {repo: tuple(rules) for repo, rules in snapshot['compiled_competition'].items()},
+        'related': {skill_id: tuple(related) for skill_id, related in snapshot['compiled_related']}
+    }
+    return recommender
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OpenDigger推荐系统 - 目录预热快照")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help="编译当前目录和指标缓存，写出快照")
+    build.add_argument('path', help="快照文件路径")
+    build.add_argument('--fetch', action='store_true', help="补抓缓存中缺失或过期的OpenDigger指标")
+    build.add_argument('--compression', choices=['zlib', 'gzip'], default=None,
+                       help="快照压缩方式（默认不压缩，mmap读取最快）")
+    build.add_argument('--opendigger-url', default=None, help="OpenDigger数据地址（可指向本地回放服务）")
+
+    info = subparsers.add_parser('info', help="查看快照内容概要")
+    info.add_argument('path', help="快照文件路径")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        from advanced_recommender import AdvancedOpenDiggerRecommender
+        recommender = AdvancedOpenDiggerRecommender(opendigger_url=args.opendigger_url)
+        started = time.perf_counter()
+        snapshot = compile_snapshot(recommender, fetch_missing=args.fetch)
+        write_snapshot(args.path, snapshot, args.compression)
+        print(f"📦 快照已写出: {args.path}（{os.path.getsize(args.path) / 1024:.1f} KB，"
+              f"{len(snapshot['catalog'])} 个项目，{len(snapshot['metrics'])} 份指标，"
+              f"{(time.perf_counter() - started) * 1000:.0f}ms）")
+        return 0
+
+    started = time.perf_counter()
+    snapshot = load_snapshot(args.path)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"📦 {args.path}")
+    print(f"   版本: {snapshot['snapshot_version']}  "
+          f"创建于: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(snapshot['created_at']))}")
+    print(f"   项目: {len(snapshot['catalog'])}  词表: {len(snapshot['vocabulary']['names'])}  "
+          f"指标: {len(snapshot['metrics'])}")
+    print(f"   加载耗时: {elapsed:.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
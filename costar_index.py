@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+共同star相似度索引（item-item协同过滤）
+离线扫描已分析用户的画像状态（user_data/state_*.json）中的starred列表，
+统计仓库两两被同一用户star的次数，按余弦相似度 co(i, j) / sqrt(n_i * n_j)
+为每个仓库只保留最相似的M个邻居。请求时对用户已star的每个仓库取其邻居累加相似度，
+开销为 O(已star数 × M)，不需要任何实时抓取。
+
+用法:
+    python costar_index.py build costar.index --neighbors 20 --min-cooccurrence 2
+    python costar_index.py similar costar.index apache/iotdb
+    recommender = AdvancedOpenDiggerRecommender(costar_index='costar.index')
+"""
+import sys
+import os
+import glob
+import json
+import math
+import time
+import heapq
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cache_codec
+
+# 索引文件的结构版本，结构变化时递增
+INDEX_VERSION = 1
+
+
+def iter_starred_lists(pattern="user_data/state_*.json"):
+    """逐个读取画像状态中的starred仓库列表（无法读取的文件跳过）"""
+    for state_file in glob.glob(pattern):
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            continue
+        starred = [entry['full_name'] for entry in state.get('starred') or [] if entry.get('full_name')]
+        if starred:
+            yield starred
+
+
+def build_index(starred_lists, max_neighbors=20, min_cooccurrence=2, candidates=None,
+                max_stars_per_user=100):
+    """
+    构建索引
+    1. 仓库按首次出现顺序编号，统计每个仓库被star的用户数 n_i 和两两共同star数 co(i, j)
+       （每个用户最多取前max_stars_per_user个，避免个别用户的超长列表主导计数和耗时）
+    2. 相似度 co(i, j) / sqrt(n_i * n_j)，共同star数低于min_cooccurrence的仓库对丢弃
+    3. 每个仓库只保留最相似的max_neighbors个邻居；给定candidates（如目录中的仓库）时只保留候选邻居
+    """
+    repo_ids = {}
+    counts = Counter()
+    pairs = Counter()
+    users = 0
+    for starred in starred_lists:
+        ids = sorted({repo_ids.setdefault(repo, len(repo_ids)) for repo in starred[:max_stars_per_user]})
+        if not ids:
+            continue
+        users += 1
+        counts.update(ids)
+        for n, i in enumerate(ids):
+            for j in ids[n + 1:]:
+                pairs[i, j] += 1
+
+    repos = list(repo_ids)
+    allowed = None if candidates is None else {repo_ids[repo] for repo in candidates if repo in repo_ids}
+    similar = [[] for _ in repos]
+    for (i, j), co in pairs.items():
+        if co < min_cooccurrence:
+            continue
+        similarity = co / math.sqrt(counts[i] * counts[j])
+        if allowed is None or j in allowed:
+            similar[i].append((similarity, j))
+        if allowed is None or i in allowed:
+            similar[j].append((similarity, i))
+
+    neighbors = []
+    scores = []
+    for entries in similar:
+        top = heapq.nlargest(max_neighbors, entries)
+        neighbors.append([j for _, j in top])
+        scores.append([round(similarity, 4) for similarity, _ in top])
+
+    return {
+        'index_version': INDEX_VERSION,
+        'created_at': time.time(),
+        'users': users,
+        'max_neighbors': max_neighbors,
+        'repos': repos,
+        'neighbors': neighbors,
+        'scores': scores
+    }
+
+
+def write_index(path, index, compression=None):
+    """原子写出索引文件"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    cache_codec.write_file(path, index, compression)
+
+
+def load_index(path):
+    """读取索引文件并检查版本"""
+    with open(path, 'rb') as f:
+        index = cache_codec.decode(f.read())
+    version = index.get('index_version') if isinstance(index, dict) else None
+    if version != INDEX_VERSION:
+        raise ValueError(f"共同star索引版本不匹配: {version}（需要 {INDEX_VERSION}）")
+    return CoStarIndex(index)
+
+
+class CoStarIndex:
+    def __init__(self, index):
+        self.index = index
+        self.repos = index['repos']
+        self.neighbors = index['neighbors']
+        self.scores = index['scores']
+        self.repo_ids = {repo: i for i, repo in enumerate(self.repos)}
+
+    def __len__(self):
+        return len(self.repos)
+
+    def __contains__(self, repo):
+        return repo in self.repo_ids
+
+    def similar(self, repo):
+        """与某个仓库最相似的邻居 [(仓库, 相似度)]"""
+        i = self.repo_ids.get(repo)
+        if i is None:
+            return []
+        return [(self.repos[j], score) for j, score in zip(self.neighbors[i], self.scores[i])]
+
+    def affinities(self, starred_repos):
+        """
+        用户对各仓库的协同亲和度：已star仓库的邻居相似度之和
+        用户已star的仓库本身不计入（只推荐“附近”的仓库）
+        """
+        starred = {self.repo_ids[repo] for repo in starred_repos if repo in self.repo_ids}
+        scores = {}
+        for i in starred:
+            for j, score in zip(self.neighbors[i], self.scores[i]):
+                if j not in starred:
+                    scores[j] = scores.get(j, 0.0) + score
+        return {self.repos[j]: score for j, score in scores.items()}
+
+    def __getstate__(self):
+        # 传给工作进程时只传紧凑的索引本身，仓库编号表在子进程中重建
+        return self.index
+
+    def __setstate__(self, index):
+        self.__init__(index)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OpenDigger推荐系统 - 共同star相似度索引")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help="扫描已分析用户的starred列表，构建索引")
+    build.add_argument('path', help="索引文件路径")
+    build.add_argument('--states', default="user_data/state_*.json", help="画像状态文件（glob）")
+    build.add_argument('--neighbors', type=int, default=20, help="每个仓库保留的邻居数M")
+    build.add_argument('--min-cooccurrence', type=int, default=2, help="仓库对最少的共同star用户数")
+    build.add_argument('--all-repos', action='store_true',
+                       help="邻居不限于推荐目录中的项目（默认只保留目录项目作为邻居）")
+    build.add_argument('--compression', choices=['zlib', 'gzip'], default=None, help="索引文件压缩方式")
+
+    similar = subparsers.add_parser('similar', help="查看某个仓库的相似仓库")
+    similar.add_argument('path', help="索引文件路径")
+    similar.add_argument('repo', help="仓库全名（owner/name）")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        candidates = None
+        if not args.all_repos:
+            from advanced_recommender import AdvancedOpenDiggerRecommender
+            candidates = AdvancedOpenDiggerRecommender().project_db
+        started = time.perf_counter()
+        index = build_index(iter_starred_lists(args.states), max_neighbors=args.neighbors,
+                            min_cooccurrence=args.min_cooccurrence, candidates=candidates)
+        write_index(args.path, index, args.compression)
+        linked = sum(1 for neighbors in index['neighbors'] if neighbors)
+        print(f"👥 共同star索引已写出: {args.path}（{os.path.getsize(args.path) / 1024:.1f} KB，"
+              f"{index['users']} 个用户，{len(index['repos'])} 个仓库，其中 {linked} 个有邻居，"
+              f"{(time.perf_counter() - started) * 1000:.0f}ms）")
+        return 0
+
+    index = load_index(args.path)
+    neighbors = index.similar(args.repo)
+    if not neighbors:
+        print(f"❌ 索引中没有 {args.repo} 的相似仓库")
+        return 1
+    print(f"👥 与 {args.repo} 常被一起star的仓库:")
+    for repo, score in neighbors:
+        print(f"  {score:.3f}  {repo}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
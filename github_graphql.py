@@ -0,0 +1,193 @@
+"""
+GitHub GraphQL 批量画像数据后端
+一次查询获取用户信息、仓库（语言与主题）、starred和following，
+多个用户合并到同一个查询中，并把结果转换成REST接口相同的字典结构。
+"""
+import requests
+
+# GraphQL单个连接一次最多返回100个节点
+MAX_PAGE_SIZE = 100
+
+REPO_FIELDS = """
+fragment RepoFields on Repository {
+  nameWithOwner
+  name
+  description
+  updatedAt
+  stargazerCount
+  forkCount
+  primaryLanguage { name }
+  repositoryTopics(first: 20) { nodes { topic { name } } }
+}
+"""
+
+# 仓库和starred两个连接的查询参数
+CONNECTIONS = {
+    'repos': ('repositories',
+              'ownerAffiliations: OWNER, privacy: PUBLIC, '
+              'orderBy: {field: UPDATED_AT, direction: DESC}'),
+    'starred': ('starredRepositories',
+                'orderBy: {field: STARRED_AT, direction: DESC}')
+}
+
+
+class GitHubGraphQLBackend:
+    def __init__(self, github_token, graphql_url="https://api.github.com/graphql",
+                 headers=None, timeout=20, batch_size=5):
+        self.graphql_url = graphql_url
+        self.headers = dict(headers or {"User-Agent": "OpenDigger-Recommender"})
+        if github_token:
+            self.headers["Authorization"] = f"bearer {github_token}"
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.last_rate_limit = None
+        # 可替换的HTTP发送函数（推荐器会替换成带指标记录的版本）
+        self.http_post = requests.post
+
+    def fetch_profiles(self, usernames, repos_limit=100, starred_limit=60, following_limit=30):
+        """批量获取用户画像数据，返回 {用户名: {'user_info', 'repos', 'starred', 'following'}}
+
+        用户不存在时对应值为None；请求失败时抛出异常，由调用方回退到REST接口。
+        """
+        results = {}
+        usernames = list(dict.fromkeys(usernames))
+
+        for i in range(0, len(usernames), self.batch_size):
+            batch = usernames[i:i + self.batch_size]
+            results.update(self._fetch_profile_batch(batch, repos_limit, starred_limit, following_limit))
+
+        return results
+
+    def _fetch_profile_batch(self, logins, repos_limit, starred_limit, following_limit):
+        """一次查询获取一批用户，再按游标补齐超过单页的仓库和starred"""
+        variables = {f"l{i}": login for i, login in enumerate(logins)}
+        declarations = ", ".join(f"$l{i}: String!" for i in range(len(logins)))
+        aliases = "\n".join(
+            f"  u{i}: user(login: $l{i}) {{ ...ProfileFields }}" for i in range(len(logins))
+        )
+
+        query = (
+            f"query({declarations}) {{\n"
+            f"  rateLimit {{ cost remaining resetAt }}\n"
+            f"{aliases}\n"
+            f"}}\n"
+            f"fragment ProfileFields on User {{\n"
+            f"  login name bio\n"
+            f"  followers {{ totalCount }}\n"
+            f"  {self._connection_selection('repos', min(repos_limit, MAX_PAGE_SIZE))}\n"
+            f"  {self._connection_selection('starred', min(starred_limit, MAX_PAGE_SIZE))}\n"
+            f"  following(first: {min(following_limit, MAX_PAGE_SIZE)}) {{ nodes {{ login }} }}\n"
+            f"}}\n"
+            f"{REPO_FIELDS}"
+        )
+
+        data = self._execute(query, variables)
+
+        results = {}
+        pending_pages = []
+        for i, login in enumerate(logins):
+            user = data.get(f"u{i}")
+            if not user:
+                results[login] = None
+                continue
+
+            repos_conn = user['repositories']
+            starred_conn = user['starredRepositories']
+            results[login] = {
+                'user_info': {
+                    'login': user['login'],
+                    'name': user.get('name'),
+                    'bio': user.get('bio'),
+                    'public_repos': repos_conn.get('totalCount', 0),
+                    'followers': user['followers']['totalCount']
+                },
+                'repos': [self._to_rest_repo(node) for node in repos_conn['nodes']],
+                'starred': [self._to_rest_repo(node) for node in starred_conn['nodes']],
+                'following': [{'login': node['login']} for node in user['following']['nodes']]
+            }
+
+            for source, conn, limit in (('repos', repos_conn, repos_limit),
+                                        ('starred', starred_conn, starred_limit)):
+                if conn['pageInfo']['hasNextPage'] and len(conn['nodes']) < limit:
+                    pending_pages.append((login, source, conn['pageInfo']['endCursor'], limit))
+
+        # 游标分页：同一轮的后续页也合并到一个查询里
+        while pending_pages:
+            pending_pages = self._fetch_next_pages(results, pending_pages)
+
+        return results
+
+    def _fetch_next_pages(self, results, pending_pages):
+        """按游标获取下一页，返回仍需继续分页的列表"""
+        variables = {}
+        declarations = []
+        aliases = []
+        for i, (login, source, cursor, limit) in enumerate(pending_pages):
+            remaining = limit - len(results[login][source])
+            variables[f"l{i}"] = login
+            variables[f"c{i}"] = cursor
+            declarations.append(f"$l{i}: String!, $c{i}: String")
+            selection = self._connection_selection(source, min(remaining, MAX_PAGE_SIZE), f"$c{i}")
+            aliases.append(f"  p{i}: user(login: $l{i}) {{ {selection} }}")
+
+        query = (
+            f"query({', '.join(declarations)}) {{\n"
+            f"  rateLimit {{ cost remaining resetAt }}\n"
+            + "\n".join(aliases) +
+            f"\n}}\n{REPO_FIELDS}"
+        )
+        data = self._execute(query, variables)
+
+        still_pending = []
+        for i, (login, source, cursor, limit) in enumerate(pending_pages):
+            user = data.get(f"p{i}")
+            if not user:
+                continue
+            conn = user[CONNECTIONS[source][0]]
+            results[login][source].extend(self._to_rest_repo(node) for node in conn['nodes'])
+            if conn['pageInfo']['hasNextPage'] and len(results[login][source]) < limit:
+                still_pending.append((login, source, conn['pageInfo']['endCursor'], limit))
+
+        return still_pending
+
+    def _connection_selection(self, source, first, after=None):
+        """生成仓库/starred连接的查询片段"""
+        field, arguments = CONNECTIONS[source]
+        after_argument = f", after: {after}" if after else ""
+        return (
+            f"{field}(first: {first}{after_argument}, {arguments}) {{ "
+            f"totalCount pageInfo {{ hasNextPage endCursor }} nodes {{ ...RepoFields }} }}"
+        )
+
+    def _execute(self, query, variables):
+        """执行GraphQL查询；NOT_FOUND错误（用户不存在）不视为失败"""
+        response = self.http_post(
+            self.graphql_url,
+            json={'query': query, 'variables': variables},
+            headers=self.headers,
+            timeout=self.timeout
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"GitHub GraphQL错误: {response.status_code}")
+
+        payload = response.json()
+        errors = [e for e in payload.get('errors') or [] if e.get('type') != 'NOT_FOUND']
+        if errors and not payload.get('data'):
+            raise RuntimeError(f"GitHub GraphQL错误: {errors[0].get('message')}")
+
+        data = payload.get('data') or {}
+        self.last_rate_limit = data.get('rateLimit')
+        return data
+
+    def _to_rest_repo(self, node):
+        """把GraphQL仓库节点转换为REST接口的仓库字典结构"""
+        return {
+            'full_name': node['nameWithOwner'],
+            'name': node.get('name') or node['nameWithOwner'].split('/')[-1],
+            'description': node.get('description'),
+            'language': (node.get('primaryLanguage') or {}).get('name'),
+            'topics': [topic['topic']['name'] for topic in node['repositoryTopics']['nodes']],
+            'updated_at': node.get('updatedAt'),
+            'stargazers_count': node.get('stargazerCount', 0),
+            'forks_count': node.get('forkCount', 0)
+        }
@@ -0,0 +1,198 @@
+"""
+项目健康度排行榜
+把全目录的OpenDigger指标整理成按列存储的数组（活跃度、贡献者、新贡献者、OpenRank、类别、趋势），
+一次性向量化计算所有项目的健康度，支持按健康度取top-k、按类别和活跃度趋势过滤。
+安装了numpy时使用numpy计算，否则回退到标准库array + 列表推导。
+
+用法:
+    board = HealthLeaderboard.from_recommender(recommender)
+    board.top(10, categories=['database'], trends=['up'])
+    board.attach(recommender)               # 推荐器每次刷新项目指标后自动更新，下次查询时重新计算
+更新（可能来自推荐器的多个工作线程）和查询由排行榜自己的锁串行化。
+"""
+import heapq
+import threading
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+TRENDS = ('stable', 'up', 'down', 'error')
+
+
+def _metric_value(metrics, name):
+    """取出指标值；缺失或非数值时按0处理"""
+    value = (metrics.get(name) or {}).get('value', 0)
+    return float(value) if isinstance(value, (int, float)) else 0.0
+
+
+def compute_health_scores(activity, contributors, new_contributors, openrank):
+    """
+    向量化计算健康度（与 AdvancedOpenDiggerRecommender._calculate_health_score 一致）
+    1. 活跃度 (40%)：min(activity, 100) * 0.4
+    2. 贡献者生态 (30%)：min(contributors / 10, 15) + min(新贡献者占比 * 100, 15)
+    3. 影响力 (30%)：min(openrank, 30)
+    """
+    if numpy is not None:
+        activity = numpy.asarray(activity)
+        contributors = numpy.asarray(contributors)
+        new_contributors = numpy.asarray(new_contributors)
+        openrank = numpy.asarray(openrank)
+
+        score = numpy.minimum(activity, 100) * 0.4
+        score += numpy.minimum(contributors / 10, 15)
+        has_contributors = contributors > 0
+        ratio = numpy.divide(new_contributors, contributors,
+                             out=numpy.zeros_like(contributors), where=has_contributors)
+        score += numpy.where(has_contributors, numpy.minimum(ratio * 100, 15), 0)
+        score += numpy.minimum(openrank, 30)
+        return numpy.minimum(score, 100)
+
+    return array('d', (
+        min(min(a, 100) * 0.4 + min(c / 10, 15) + (min(n / c * 100, 15) if c > 0 else 0) + min(o, 30), 100)
+        for a, c, n, o in zip(activity, contributors, new_contributors, openrank)
+    ))
+
+
+class HealthLeaderboard:
+    def __init__(self, rows):
+        """rows: 可迭代的 (repo, category, metrics)"""
+        self.repos = []
+        self.categories = []
+        self._category_codes = {}
+        self._index = {}
+        category_codes = array('i')
+        trend_codes = array('b')
+        columns = {name: array('d') for name in ('activity', 'contributors', 'new_contributors', 'openrank')}
+
+        for repo, category, metrics in rows:
+            self._index[repo] = len(self.repos)
+            self.repos.append(repo)
+            category_codes.append(self._category_code(category))
+            trend_codes.append(self._trend_code(metrics))
+            for name, column in columns.items():
+                column.append(_metric_value(metrics, name))
+
+        if numpy is not None:
+            self.category_codes = numpy.frombuffer(category_codes, dtype=numpy.int32).copy()
+            self.trend_codes = numpy.frombuffer(trend_codes, dtype=numpy.int8).copy()
+            self.columns = {name: numpy.frombuffer(column, dtype=numpy.float64).copy()
+                            for name, column in columns.items()}
+        else:
+            self.category_codes = category_codes
+            self.trend_codes = trend_codes
+            self.columns = columns
+        self._scores = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_recommender(cls, recommender, fetch_missing=False):
+        """从推荐器的项目目录和指标缓存构建（默认只使用已缓存的指标；fetch_missing时抓取缺失的指标）"""
+        def rows():
+            for repo, project_info in recommender.project_db.items():
+                metrics, _ = recommender.get_cached_metrics(repo, fetch_missing)
+                yield repo, project_info.get('category', 'unknown'), metrics
+        return cls(rows())
+
+    def attach(self, recommender):
+        """订阅推荐器的指标刷新：新抓取的指标写入列，目录中新增的项目暂不加入榜单"""
+        recommender.metrics_listeners.append(self.update)
+        return self
+
+    def _category_code(self, category):
+        code = self._category_codes.get(category)
+        if code is None:
+            code = self._category_codes[category] = len(self.categories)
+            self.categories.append(category)
+        return code
+
+    def _trend_code(self, metrics):
+        trend = (metrics.get('activity') or {}).get('trend', 'stable')
+        return TRENDS.index(trend) if trend in TRENDS else 0
+
+    def __len__(self):
+        return len(self.repos)
+
+    @property
+    def scores(self):
+        """所有项目的健康度（按需重新计算）"""
+        with self._lock:
+            if self._scores is None:
+                columns = self.columns
+                self._scores = compute_health_scores(columns['activity'], columns['contributors'],
+                                                     columns['new_contributors'], columns['openrank'])
+            return self._scores
+
+    def update(self, repo, metrics, category=None):
+        """指标刷新后更新单个项目的列值；不在榜单中的项目忽略"""
+        i = self._index.get(repo)
+        if i is None:
+            return False
+        with self._lock:
+            for name, column in self.columns.items():
+                column[i] = _metric_value(metrics, name)
+            self.trend_codes[i] = self._trend_code(metrics)
+            if category is not None:
+                self.category_codes[i] = self._category_code(category)
+            self._scores = None
+        return True
+
+    def _candidates(self, categories, trends):
+        """满足过滤条件的项目下标（numpy下为布尔掩码，无过滤时返回None）"""
+        if categories is None and trends is None:
+            return None
+
+        category_set = None if categories is None else \
+            {self._category_codes[c] for c in categories if c in self._category_codes}
+        trend_set = None if trends is None else {TRENDS.index(t) for t in trends if t in TRENDS}
+
+        if numpy is not None:
+            mask = numpy.ones(len(self.repos), dtype=bool)
+            if category_set is not None:
+                mask &= numpy.isin(self.category_codes, list(category_set))
+            if trend_set is not None:
+                mask &= numpy.isin(self.trend_codes, list(trend_set))
+            return mask
+
+        return [i for i in range(len(self.repos))
+                if (category_set is None or self.category_codes[i] in category_set)
+                and (trend_set is None or self.trend_codes[i] in trend_set)]
+
+    def top(self, k=10, categories=None, trends=None):
+        """健康度前k名（可按类别、活跃度趋势过滤），按健康度从高到低排列"""
+        with self._lock:
+            return self._top(k, categories, trends)
+
+    def _top(self, k, categories, trends):
+        scores = self.scores
+        candidates = self._candidates(categories, trends)
+
+        if numpy is not None:
+            indices = numpy.arange(len(self.repos)) if candidates is None else numpy.flatnonzero(candidates)
+            if 0 < k < len(indices):
+                # 先用第k大的分数筛掉大部分项目，同分时保持目录顺序
+                candidate_scores = scores[indices]
+                threshold = numpy.partition(candidate_scores, len(indices) - k)[len(indices) - k]
+                indices = indices[candidate_scores >= threshold]
+            order = indices[numpy.argsort(-scores[indices], kind='stable')]
+            selected = order[:k].tolist()
+        else:
+            indices = range(len(self.repos)) if candidates is None else candidates
+            selected = heapq.nlargest(k, indices, key=scores.__getitem__)
+
+        return [self.entry(i) for i in selected]
+
+    def entry(self, i):
+        """第i个项目的榜单条目"""
+        with self._lock:
+            columns = self.columns
+            return {
+                'repo': self.repos[i],
+                'health_score': float(self.scores[i]),
+                'category': self.categories[self.category_codes[i]],
+                'activity': float(columns['activity'][i]),
+                'contributors': float(columns['contributors'][i]),
+                'trend': TRENDS[self.trend_codes[i]]
+            }
@@ -0,0 +1,122 @@
+"""
+高频项草图（Space-Saving）
+在固定容量内近似统计数据流中各项的累计权重：草图满时新出现的项替换当前计数最小的项，
+并继承其计数作为误差上界。内存只与容量有关，与流的长度和不同项的数量无关。
+
+保证（W为流的总权重，m为容量）：
+1. 每个被跟踪项的计数 count 满足 真实权重 <= count <= 真实权重 + error，且 error <= W / m
+2. 真实权重超过 W / m 的项一定在草图中
+3. guaranteed_top(k) 返回的项一定属于真实的前k名
+
+用法:
+    sketch = SpaceSaving(200)
+    for topic in topics:
+        sketch.update(topic)
+    sketch.most_common(15)
+"""
+import heapq
+
+
+class SpaceSaving:
+    def __init__(self, capacity):
+        if capacity <= 0:
+            raise ValueError("草图容量必须为正数")
+        self.capacity = capacity
+        self.total = 0
+        self._counts = {}   # 项 -> [计数, 误差上界]
+        self._heap = []     # (计数, 插入序号, 项)，惰性删除：计数已变化的条目弹出时丢弃
+        self._sequence = 0
+
+    def __len__(self):
+        return len(self._counts)
+
+    def __contains__(self, item):
+        return item in self._counts
+
+    def _push(self, item, count):
+        self._sequence += 1
+        heapq.heappush(self._heap, (count, self._sequence, item))
+        # 过期条目过多时重建堆，保持堆大小与容量同阶
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(entry[0], n, key) for n, (key, entry) in enumerate(self._counts.items())]
+            heapq.heapify(self._heap)
+            self._sequence = len(self._heap)
+
+    def _pop_min(self):
+        """弹出当前计数最小的项"""
+        while True:
+            count, _, item = heapq.heappop(self._heap)
+            entry = self._counts.get(item)
+            if entry is not None and entry[0] == count:
+                return item, entry
+
+    def update(self, item, weight=1):
+        """
+        累加一项的权重（权重须为正数）
+        返回被替换出草图的项（没有替换时返回None）
+        """
+        if weight <= 0:
+            return None
+        self.total += weight
+        entry = self._counts.get(item)
+        if entry is not None:
+            entry[0] += weight
+            self._push(item, entry[0])
+            return None
+
+        evicted = None
+        error = 0
+        if len(self._counts) >= self.capacity:
+            evicted, (error, _) = self._pop_min()
+            del self._counts[evicted]
+        self._counts[item] = [error + weight, error]
+        self._push(item, error + weight)
+        return evicted
+
+    def count(self, item):
+        """项的计数（不在草图中时为0）"""
+        entry = self._counts.get(item)
+        return entry[0] if entry else 0
+
+    def error(self, item):
+        """项计数的误差上界"""
+        entry = self._counts.get(item)
+        return entry[1] if entry else 0
+
+    def top(self, k=None):
+        """按计数从高到低的 [(项, 计数, 误差上界)]，同计数时先进入草图的在前"""
+        items = sorted(self._counts.items(), key=lambda pair: pair[1][0], reverse=True)
+        return [(item, count, error) for item, (count, error) in items[:k]]
+
+    def most_common(self, k=None):
+        """与 Counter.most_common 相同形式的 [(项, 计数)]"""
+        return [(item, count) for item, count, _ in self.top(k)]
+
+    def guaranteed_top(self, k):
+        """
+        一定属于真实前k名的项
+        某项的下界（计数 - 误差）不低于第k+1名的计数时，真实排名不会落到k名之外
+        """
+        ranked = self.top(k + 1)
+        if len(ranked) <= k:
+            bound = 0 if len(self._counts) < self.capacity else min(entry[0] for entry in self._counts.values())
+        else:
+            bound = ranked[k][1]
+        return [item for item, count, error in ranked[:k] if count - error >= bound]
+
+    def to_dict(self):
+        """可JSON序列化的状态"""
+        return {
+            'capacity': self.capacity,
+            'total': self.total,
+            'items': [[item, count, error] for item, count, error in self.top()]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['capacity'])
+        sketch.total = data['total']
+        for item, count, error in data['items']:
+            sketch._counts[item] = [count, error]
+            sketch._push(item, count)
+        return sketch
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+GitHub / OpenDigger 请求录制与回放
+录制模式把推荐器收到的每个响应（状态码、响应头、响应体、耗时）追加写入JSONL存档；
+回放模式通过可注入的transport或本地HTTP服务把存档中的响应返回，
+并可注入延迟、403限流响应和超时，用于无网络环境下的压测。
+
+用法:
+    # 录制
+    recommender = AdvancedOpenDiggerRecommender(transport=RecordingTransport('archive.jsonl'))
+    # 进程内回放
+    recommender = AdvancedOpenDiggerRecommender(transport=ReplayTransport('archive.jsonl', latency='recorded'))
+    # 本地回放服务
+    python http_replay.py serve archive.jsonl --port 9000 --rate-limit-rate 0.05
+    python batch_analyze.py users.txt --github-api http://127.0.0.1:9000 \\
+        --opendigger-url http://127.0.0.1:9000/open_digger/github
+"""
+import sys
+import json
+import time
+import base64
+import random
+import hashlib
+import argparse
+import threading
+from urllib.parse import urlsplit
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+def request_key(method, url, body=None):
+    """请求的回放键：方法 + 路径和查询串（忽略主机）+ 请求体摘要"""
+    parts = urlsplit(url)
+    target = parts.path + (f"?{parts.query}" if parts.query else "")
+    digest = hashlib.sha1(body).hexdigest()[:16] if body else ''
+    return f"{method.upper()} {target} {digest}".rstrip()
+
+
+def _request_body(kwargs):
+    """取出请求体字节（GraphQL的json参数也按规范化JSON处理）"""
+    if kwargs.get('json') is not None:
+        return json.dumps(kwargs['json'], sort_keys=True, ensure_ascii=False).encode('utf-8')
+    data = kwargs.get('data')
+    if isinstance(data, str):
+        return data.encode('utf-8')
+    return data
+
+
+class ReplayResponse:
+    """回放的响应对象，提供推荐器用到的 requests.Response 接口"""
+
+    def __init__(self, status_code, headers=None, content=b'', elapsed=0.0, url=''):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.content = content
+        self.elapsed_seconds = elapsed
+        self.url = url
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class RecordingTransport:
+    """录制transport：转发真实请求，并把响应追加写入存档"""
+
+    def __init__(self, archive_path, inner=requests.request):
+        self.archive_path = archive_path
+        self.inner = inner
+        self._lock = threading.Lock()
+
+    def __call__(self, method, url, **kwargs):
+        started = time.time()
+        response = self.inner(method, url, **kwargs)
+        elapsed = time.time() - started
+
+        content = response.content
+        try:
+            body = {'text': content.decode('utf-8')}
+        except UnicodeDecodeError:
+            body = {'base64': base64.b64encode(content).decode('ascii')}
+
+        record = {
+            'key': request_key(method, url, _request_body(kwargs)),
+            'method': method.upper(),
+            'url': url,
+            'status': response.status_code,
+            'headers': dict(response.headers),
+            'elapsed': round(elapsed, 4),
+            'recorded_at': started,
+            **body
+        }
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.archive_path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+        return response
+
+
+class ReplayTransport:
+    """回放transport：从存档返回响应，可注入延迟、403限流和超时"""
+
+    def __init__(self, archive_path, latency=None, rate_limit_rate=0.0, timeout_rate=0.0,
+                 timeout_delay=0.0, seed=None):
+        """
+        latency: None 不延迟；'recorded' 按录制时的耗时；数字为固定延迟（秒）
+        rate_limit_rate: 以该概率返回403限流响应
+        timeout_rate: 以该概率抛出超时（抛出前等待 min(timeout_delay, 请求timeout) 秒）
+        """
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_delay = timeout_delay
+        self.random = random.Random(seed)
+        self.responses = {}
+        self._positions = {}
+        self._lock = threading.Lock()
+        self.stats = {'served': 0, 'missing': 0, 'rate_limited': 0, 'timeouts': 0}
+        self.load(archive_path)
+
+    def load(self, archive_path):
+        """读取存档；同一请求录制多次时按顺序轮流返回"""
+        with open(archive_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    record = json.loads(line)
+                    self.responses.setdefault(record['key'], []).append(record)
+
+    def lookup(self, method, target, body=None):
+        """按请求查找录制的响应记录，找不到返回None"""
+        key = request_key(method, target, body)
+        with self._lock:
+            records = self.responses.get(key)
+            if not records:
+                return None
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            return records[position % len(records)]
+
+    def respond(self, record, url='', timeout=None):
+        """根据注入策略生成回放响应（可能睡眠、返回403或抛出超时）"""
+        with self._lock:
+            roll_timeout = self.random.random() < self.timeout_rate
+            roll_rate_limit = self.random.random() < self.rate_limit_rate
+
+        if roll_timeout:
+            self.stats['timeouts'] += 1
+            time.sleep(min(self.timeout_delay, timeout or self.timeout_delay))
+            raise requests.exceptions.Timeout(f"回放注入超时: {url}")
+
+        if self.latency == 'recorded':
+            time.sleep(record.get('elapsed', 0) if record else 0)
+        elif self.latency:
+            time.sleep(float(self.latency))
+
+        if roll_rate_limit:
+            self.stats['rate_limited'] += 1
+            return ReplayResponse(403, {
+                'Content-Type': 'application/json',
+                'X-RateLimit-Remaining': '0',
+                'X-RateLimit-Reset': str(int(time.time()) + 60)
+            }, b'{"message": "API rate limit exceeded"}', url=url)
+
+        if record is None:
+            self.stats['missing'] += 1
+            return ReplayResponse(404, {'Content-Type': 'application/json'},
+                                  b'{"message": "Not Found (not in archive)"}', url=url)
+
+        self.stats['served'] += 1
+        if 'base64' in record:
+            content = base64.b64decode(record['base64'])
+        else:
+            content = record.get('text', '').encode('utf-8')
+        return ReplayResponse(record['status'], record.get('headers'), content,
+                              record.get('elapsed', 0.0), url=url)
+
+    def __call__(self, method, url, **kwargs):
+        record = self.lookup(method, url, _request_body(kwargs))
+        return self.respond(record, url=url, timeout=kwargs.get('timeout'))
+
+
+class ReplayServer:
+    """本地回放HTTP服务：按路径和查询串匹配存档，GitHub和OpenDigger共用一个端口"""
+
+    def __init__(self, transport, host='127.0.0.1', port=0):
+        self.transport = transport
+        replay = transport
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _serve(self, body=None):
+                if body is not None:
+                    try:
+                        # 与录制时一样按规范化JSON计算请求体摘要
+                        body = json.dumps(json.loads(body), sort_keys=True, ensure_ascii=False).encode('utf-8')
+                    except ValueError:
+                        pass
+                record = replay.lookup(self.command, self.path, body)
+                try:
+                    response = replay.respond(record, url=self.path)
+                except requests.exceptions.Timeout:
+                    # 超时注入：不返回任何响应直接断开
+                    self.close_connection = True
+                    return
+
+                self.send_response(response.status_code)
+                for name, value in response.headers.items():
+                    if name.lower() not in ('content-length', 'content-encoding', 'transfer-encoding',
+                                            'connection'):
+                        self.send_header(name, value)
+                self.send_header('Content-Length', str(len(response.content)))
+                self.end_headers()
+                self.wfile.write(response.content)
+
+            def do_GET(self):
+                self._serve()
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                self._serve(self.rfile.read(length) if length else b'')
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """在后台线程中启动服务，返回服务地址"""
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self.url
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def build_transport(record=None, replay=None, **replay_options):
+    """根据命令行参数创建transport（都未指定时返回None，即直接访问网络）"""
+    if record and replay:
+        raise ValueError("录制和回放不能同时开启")
+    if record:
+        return RecordingTransport(record)
+    if replay:
+        return ReplayTransport(replay, **replay_options)
+    return None
+
+
+def parse_latency(value):
+    """解析 --latency 参数：'recorded' 或秒数"""
+    if value in (None, '', 'recorded'):
+        return value or None
+    return float(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GitHub / OpenDigger 请求回放服务")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve = subparsers.add_parser('serve', help="启动本地回放HTTP服务")
+    serve.add_argument('archive', help="录制存档（JSONL）")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=9000)
+    serve.add_argument('--latency', default=None, help="'recorded' 按录制耗时，或固定延迟秒数")
+    serve.add_argument('--rate-limit-rate', type=float, default=0.0, help="返回403限流响应的概率")
+    serve.add_argument('--timeout-rate', type=float, default=0.0, help="不响应直接断开的概率")
+    serve.add_argument('--timeout-delay', type=float, default=10.0, help="注入超时前等待的秒数")
+    serve.add_argument('--seed', type=int, default=None)
+
+    args = parser.parse_args(argv)
+
+    transport = ReplayTransport(args.archive, latency=parse_latency(args.latency),
+                                rate_limit_rate=args.rate_limit_rate, timeout_rate=args.timeout_rate,
+                                timeout_delay=args.timeout_delay, seed=args.seed)
+    server = ReplayServer(transport, args.host, args.port)
+    print(f"🎞️ 回放服务已启动: {server.url}（{len(transport.responses)} 个请求）")
+    print(f"   GitHub API: {server.url}")
+    print(f"   OpenDigger: {server.url}/open_digger/github")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n👋 回放服务已停止: {transport.stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+多进程评分
+把编译好的目录快照（目录、技能图谱、索引和指标）编码后放进一块共享内存，
+工作进程启动时只读挂载并直接从共享页面解码一次，之后每个任务只传递用户画像、top_n和截止时间，
+目录和指标不会随任务重复pickle。解码得到的目录和指标是各工作进程私有的Python对象
+（评分按项目读取指标字典，不直接在共享内存上计算）。评分是纯Python的CPU计算，多进程可以绕开GIL。
+
+用法:
+    with ParallelScorer(recommender, processes=8) as scorer:
+        results = scorer.recommend_batch(profiles, top_n=10)
+"""
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import cache_codec
+import catalog_snapshot
+from http_replay import build_transport
+
+# 工作进程内的推荐器（由initializer从共享内存构建）
+_worker_recommender = None
+
+
+def _init_worker(segment_name, size, recommender_options, transport_options):
+    """工作进程初始化：挂载共享内存中的快照，构建本进程的推荐器（transport与主进程相同的录制/回放设置）"""
+    global _worker_recommender
+    from advanced_recommender import AdvancedOpenDiggerRecommender
+
+    # 进程池的子进程与主进程共用资源追踪器，共享内存段由主进程在close()中释放
+    segment = shared_memory.SharedMemory(name=segment_name)
+    try:
+        snapshot = catalog_snapshot.decode_snapshot(segment.buf[:size])
+    finally:
+        segment.close()
+
+    # 评分过程日志没有意义且会在多个进程间交错，直接丢弃
+    sys.stdout = open(os.devnull, 'w')
+    transport = build_transport(**transport_options) if transport_options else None
+    _worker_recommender = AdvancedOpenDiggerRecommender(snapshot=snapshot, transport=transport,
+                                                         **recommender_options)
+
+
+def _recommend(user_profile, top_n, deadline=None):
+    return _worker_recommender.recommend_projects(user_profile, top_n=top_n, deadline=deadline)
+
+
+class ParallelScorer:
+    """进程池评分：目录快照放在共享内存中，由各工作进程只读挂载"""
+
+    def __init__(self, recommender, processes=None, transport_options=None):
+        """
+        transport_options: 主进程transport的创建参数（同 http_replay.build_transport，如录制/回放存档），
+                           工作进程按同样设置创建transport，离线回放时指标过期也不会访问网络
+        1. 编译推荐器当前状态（补抓缺失的指标，工作进程中通常不再访问网络）
+        2. 编码后写入一块共享内存
+        3. 启动进程池，各进程在initializer中挂载共享内存
+        """
+        snapshot = catalog_snapshot.compile_snapshot(recommender, fetch_missing=True)
+        payload = cache_codec.encode(snapshot)
+
+        self.segment = shared_memory.SharedMemory(create=True, size=len(payload))
+        self.segment.buf[:len(payload)] = payload
+        self.processes = processes or os.cpu_count() or 1
+
+        recommender_options = {
+            'github_api': recommender.github_api,
+            'opendigger_url': recommender.opendigger_url,
+            'cache_compression': recommender.cache_compression,
+            'costar_index': recommender.costar_index
+        }
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.processes, initializer=_init_worker,
+            initargs=(self.segment.name, len(payload), recommender_options, transport_options)
+        )
+
+    def submit(self, user_profile, top_n=10, deadline=None):
+        """提交一个评分任务，返回Future（可在多个线程中并发调用；deadline同 recommend_projects）"""
+        return self.executor.submit(_recommend, user_profile, top_n, deadline)
+
+    def recommend(self, user_profile, top_n=10, deadline=None):
+        """同步评分一个画像"""
+        return self.submit(user_profile, top_n, deadline).result()
+
+    def recommend_batch(self, user_profiles, top_n=10):
+        """批量评分，结果与输入顺序一致"""
+        user_profiles = list(user_profiles)
+        chunksize = max(len(user_profiles) // (self.processes * 4), 1)
+        return list(self.executor.map(_recommend, user_profiles, [top_n] * len(user_profiles),
+                                      chunksize=chunksize))
+
+    def close(self):
+        """关闭进程池并释放共享内存"""
+        self.executor.shutdown()
+        self.segment.close()
+        self.segment.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
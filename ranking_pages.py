@@ -0,0 +1,209 @@
+"""
+推荐结果分页
+首页完整排序一次，把有序结果压缩成紧凑数组（目录下标 + 分数 + 匹配度分项，不引用目录记录和指标），
+保存在不透明游标后面；后续页直接从保存的数组中切片，取页时才按当前目录解析出本页的项目，不再评分和排序。
+游标带有效期。默认只在生成它的进程内有效；指定共享目录时排序同时写入磁盘，
+多进程服务中落到其他进程的后续页从磁盘读取（目录内容不一致时视为游标失效）。
+"""
+import os
+import time
+import base64
+import hashlib
+import secrets
+import threading
+from array import array
+
+import cache_codec
+from cache_gc import sharded_path
+
+
+class CursorError(ValueError):
+    """游标无效或已过期"""
+
+
+def encode_cursor(ranking_id, offset):
+    payload = f"{ranking_id}:{offset}".encode('ascii')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """解析游标，返回 (排序编号, 偏移)"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+        ranking_id, offset = payload.split(':')
+        offset = int(offset)
+    except (ValueError, UnicodeError):
+        raise CursorError("无效的游标")
+    if offset < 0 or not ranking_id.isalnum():
+        raise CursorError("无效的游标")
+    return ranking_id, offset
+
+
+def catalog_fingerprint(repos):
+    """目录指纹：项目名及其顺序的摘要（下标只在指纹相同的目录上有意义）"""
+    return hashlib.sha1('\n'.join(repos).encode('utf-8')).hexdigest()
+
+
+def _pack(values):
+    return base64.b64encode(values.tobytes()).decode('ascii')
+
+
+def _unpack(typecode, data):
+    values = array(typecode)
+    values.frombytes(base64.b64decode(data))
+    return values
+
+
+class CompactRanking:
+    """
+    有序结果的紧凑形式
+    positions: 各结果在目录中的下标；scores: (匹配度, 健康度, 综合分数) 依次展开；
+    components: 匹配度分项依次展开（每项width个）；degraded: 下标 -> 降级原因（只记录降级的结果）
+    """
+    __slots__ = ('catalog', 'positions', 'scores', 'components', 'width', 'degraded', 'context')
+
+    def __init__(self, catalog, positions, scores, components, width, degraded=None, context=None):
+        self.catalog = catalog
+        self.positions = positions
+        self.scores = scores
+        self.components = components
+        self.width = width
+        self.degraded = degraded or {}
+        self.context = context
+
+    @classmethod
+    def from_recommendations(cls, recommendations, catalog, repo_positions, width, context=None):
+        """从Recommendation列表压缩（repo_positions: 项目名 -> 目录下标）"""
+        positions = array('i')
+        scores = array('d')
+        components = array('d')
+        degraded = {}
+        for i, rec in enumerate(recommendations):
+            positions.append(repo_positions[rec.repo])
+            scores.extend((rec.match_score, rec.health_score, rec.combined_score))
+            components.extend(rec.components)
+            if rec.degraded is not None:
+                degraded[i] = rec.degraded
+        return cls(catalog, positions, scores, components, width, degraded, context)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def entry(self, i):
+        """第i个结果：(目录下标, 匹配度, 健康度, 综合分数, 分项元组, 降级原因或None)"""
+        match_score, health_score, combined_score = self.scores[3 * i:3 * i + 3]
+        width = self.width
+        return (self.positions[i], match_score, health_score, combined_score,
+                tuple(self.components[width * i:width * (i + 1)]), self.degraded.get(i))
+
+    def to_dict(self):
+        """可写入缓存文件的形式（数组按机器字节序打包为base64）"""
+        return {
+            'catalog': self.catalog,
+            'positions': _pack(self.positions),
+            'scores': _pack(self.scores),
+            'components': _pack(self.components),
+            'width': self.width,
+            'degraded': [[i, reason] for i, reason in self.degraded.items()],
+            'context': self.context
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['catalog'], _unpack('i', data['positions']), _unpack('d', data['scores']),
+                   _unpack('d', data['components']), data['width'], dict(data['degraded']), data['context'])
+
+
+class RankingStore:
+    """
+    保存紧凑排序结果的LRU表，按保存的结果总条数限制内存，条目在ttl秒后失效
+    directory: 共享目录（多进程服务中各进程共用），为None时只保存在进程内
+    """
+
+    def __init__(self, max_items=1000000, ttl=600, directory=None):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.directory = directory
+        self._rankings = {}
+        self._items = 0
+        self._lock = threading.Lock()
+
+    def _path(self, ranking_id):
+        return sharded_path(self.directory, f"ranking_{ranking_id}.json")
+
+    def _remember(self, ranking_id, expires_at, ranking):
+        with self._lock:
+            previous = self._rankings.pop(ranking_id, None)
+            if previous is not None:
+                self._items -= len(previous[1])
+            self._rankings[ranking_id] = (expires_at, ranking)
+            self._items += len(ranking)
+            # 超出总条数时淘汰最久未使用的排序（至少保留刚放入的这一份）
+            while self._items > self.max_items and len(self._rankings) > 1:
+                _, evicted = self._rankings.pop(next(iter(self._rankings)))
+                self._items -= len(evicted)
+
+    def put(self, ranking, page_size):
+        """
+        保存一份紧凑排序结果并直接取首页
+        返回 (首页条目, 下一页游标或None, 总数)
+        """
+        ranking_id = secrets.token_hex(8)
+        now = time.time()
+        self._remember(ranking_id, now + self.ttl, ranking)
+        if self.directory is not None and len(ranking) > page_size:
+            path = self._path(ranking_id)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                cache_codec.write_file(path, ranking.to_dict())
+            except OSError as e:
+                print(f"⚠️ 排序结果写入失败 {path}: {e}")
+        return self._slice(ranking_id, ranking, 0, page_size)
+
+    def get(self, cursor):
+        """按游标取出 (紧凑排序结果, 偏移, 排序编号)；无效或过期时抛出CursorError"""
+        ranking_id, offset = decode_cursor(cursor)
+        now = time.time()
+        with self._lock:
+            entry = self._rankings.get(ranking_id)
+            if entry is not None and entry[0] <= now:
+                del self._rankings[ranking_id]
+                self._items -= len(entry[1])
+                raise CursorError("游标已过期，请重新请求首页")
+            if entry is not None:
+                # LRU：命中的条目移到末尾
+                self._rankings[ranking_id] = self._rankings.pop(ranking_id)
+        if entry is None:
+            entry = self._load(ranking_id, now)
+        return entry[1], offset, ranking_id
+
+    def _load(self, ranking_id, now):
+        """从共享目录读取其他进程保存的排序结果"""
+        if self.directory is None:
+            raise CursorError("游标已过期或不存在，请重新请求首页")
+        path = self._path(ranking_id)
+        try:
+            expires_at = os.path.getmtime(path) + self.ttl
+        except OSError:
+            raise CursorError("游标已过期或不存在，请重新请求首页")
+        if expires_at <= now:
+            raise CursorError("游标已过期，请重新请求首页")
+        try:
+            ranking = CompactRanking.from_dict(cache_codec.read_file(path))
+        except (OSError, KeyError, TypeError, *cache_codec.DECODE_ERRORS):
+            raise CursorError("游标已过期或不存在，请重新请求首页")
+        self._remember(ranking_id, expires_at, ranking)
+        return expires_at, ranking
+
+    def page(self, cursor, page_size):
+        """
+        取一页
+        返回 (本页条目, 下一页游标或None, 总数, 紧凑排序结果)
+        """
+        ranking, offset, ranking_id = self.get(cursor)
+        return (*self._slice(ranking_id, ranking, offset, page_size), ranking)
+
+    def _slice(self, ranking_id, ranking, offset, page_size):
+        end = min(offset + page_size, len(ranking))
+        next_cursor = encode_cursor(ranking_id, end) if end < len(ranking) else None
+        return [ranking.entry(i) for i in range(offset, end)], next_cursor, len(ranking)
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+推荐服务（常驻进程）
+基于asyncio的轻量HTTP/JSON服务，进程内保持一个预热好的推荐器，
+项目库、技能图谱和内存缓存在请求之间复用。
+
+接口:
+    GET  /healthz                       服务状态
+    GET  /metrics                       Prometheus文本格式的流水线指标
+    GET  /analyze/{username}            分析GitHub用户画像
+    GET  /recommend?user=xxx&top_n=8    分析用户并推荐
+    GET  /leaderboard?top_n=20&category=database&trend=up
+                                        全目录健康度排行榜（类别、趋势可逗号分隔多个）
+    POST /recommend                     {"user_profile": {...}, "top_n": 8} 或 {"username": "xxx"}
+    GET  /recommend?user=xxx&page_size=10          分页推荐：首页完整排序一次，返回 next_cursor
+    GET  /recommend?cursor=...&page_size=10        后续页直接从保存的排序中取（游标过期或目录已变化返回410；
+                                                   多进程时排序写入缓存目录，任一进程都能取后续页）
+
+    /analyze 和 /recommend 都支持 budget_ms 参数（或服务级 --latency-budget）：
+    超出时间预算时返回用过期/默认数据得到的结果，降级的推荐带有 degraded 字段
+
+用法:
+    python recommend_server.py --port 8080 --processes 0   # 0 表示每个CPU核一个进程
+    python recommend_server.py --access-log                # 每个请求记录一行访问日志（默认关闭）
+"""
+import sys
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+import argparse
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs, unquote
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from advanced_recommender import AdvancedOpenDiggerRecommender
+from cache_gc import BackgroundCacheGC, default_ttls, parse_size
+from health_leaderboard import HealthLeaderboard
+from ranking_pages import CursorError
+from http_replay import build_transport, parse_latency
+
+# GitHub用户名规则（与推荐器共用，同时防止用户名被用来拼接出任意文件路径）
+USERNAME_PATTERN = AdvancedOpenDiggerRecommender.USERNAME_PATTERN
+
+# 访问日志（--access-log 开启时每个请求一行：方法、路径、状态码、耗时）
+ACCESS_LOG = logging.getLogger('recommend_server.access')
+
+MAX_BODY_SIZE = 1024 * 1024
+IDLE_TIMEOUT = 30
+MAX_TOP_N = 50
+
+HTTP_REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 410: 'Gone',
+    413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'
+}
+
+
+class RecommendationServer:
+    def __init__(self, recommender, max_concurrency=8, max_queue=64, latency_budget=None, access_log=False):
+        self.recommender = recommender
+        self.latency_budget = latency_budget
+        self.access_log = access_log
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self.semaphore = None
+        self.in_flight = 0
+        self.started_at = time.time()
+        self.stats = {'requests': 0, 'rejected': 0, 'errors': 0}
+        # 健康度排行榜：首次请求时用已缓存的指标构建，之后随指标刷新更新
+        self.leaderboard = None
+        self._leaderboard_lock = threading.Lock()
+
+    async def start(self, host='127.0.0.1', port=8080, reuse_port=False):
+        """启动监听（需要在事件循环中调用）"""
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        return await asyncio.start_server(
+            self._handle_connection, host, port, reuse_port=reuse_port or None
+        )
+
+    # ========== HTTP协议处理 ==========
+
+    async def _handle_connection(self, reader, writer):
+        """处理一个连接（支持HTTP/1.1 keep-alive）"""
+        try:
+            while True:
+                request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                if not request_line:
+                    break
+
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length') or 0)
+                if length > MAX_BODY_SIZE:
+                    await self._send(writer, 413, {'error': '请求体过大'}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                started = time.time()
+                status, payload = await self._dispatch(method, target, body)
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                await self._send(writer, status, payload, keep_alive)
+                if self.access_log:
+                    ACCESS_LOG.info("%s %s %d %.1fms", method, target, status, (time.time() - started) * 1000)
+
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send(self, writer, status, payload, keep_alive=True):
+        """写出响应：字符串按纯文本发送，其余按JSON发送"""
+        if isinstance(payload, str):
+            body = payload.encode('utf-8')
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            content_type = "application/json; charset=utf-8"
+        headers = [
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, 'OK')}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"
+        ]
+        if status == 503:
+            headers.append("Retry-After: 1")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode('latin-1') + body)
+        await writer.drain()
+
+    # ========== 路由 ==========
+
+    async def _dispatch(self, method, target, body):
+        """按路径分发请求，返回 (状态码, JSON对象或纯文本)"""
+        self.stats['requests'] += 1
+        url = urlsplit(target)
+        path = unquote(url.path)
+        query = parse_qs(url.query)
+
+        if path == '/healthz':
+            return 200, {
+                'status': 'ok',
+                'uptime': round(time.time() - self.started_at, 1),
+                'in_flight': self.in_flight,
+                'projects': len(self.recommender.project_db),
+                **self.stats
+            }
+
+        if path == '/metrics':
+            return 200, self.recommender.metrics.render_prometheus()
+
+        if path == '/leaderboard':
+            try:
+                top_n = min(max(int(query.get('top_n', [10])[0]), 1), MAX_TOP_N)
+            except ValueError:
+                return 400, {'error': 'top_n必须是整数'}
+            categories = self._list_param(query, 'category')
+            trends = self._list_param(query, 'trend')
+            return await self._run(self._leaderboard, top_n, categories, trends)
+
+        try:
+            budget = self._latency_budget(query.get('budget_ms', [None])[0])
+        except ValueError:
+            return 400, {'error': 'budget_ms必须是正数'}
+        
+        if path.startswith('/analyze/'):
+            if method != 'GET':
+                return 405, {'error': '只支持GET'}
+            username = path[len('/analyze/'):]
+            if not USERNAME_PATTERN.fullmatch(username):
+                return 400, {'error': '无效的GitHub用户名'}
+            return await self._run(self._analyze, username, budget)
+
+        if path == '/recommend':
+            top_n = query.get('top_n', [None])[0]
+            if method == 'GET':
+                request = {'username': query.get('user', [''])[0], 'top_n': top_n,
+                           'cursor': query.get('cursor', [None])[0],
+                           'page_size': query.get('page_size', [None])[0]}
+            elif method == 'POST':
+                try:
+                    request = json.loads(body or b'{}')
+                except ValueError:
+                    return 400, {'error': '请求体不是合法JSON'}
+                if not isinstance(request, dict):
+                    return 400, {'error': '请求体必须是JSON对象'}
+                request.setdefault('top_n', top_n)
+                if request.get('budget_ms') is not None:
+                    try:
+                        budget = self._latency_budget(request['budget_ms'])
+                    except (TypeError, ValueError):
+                        return 400, {'error': 'budget_ms必须是正数'}
+            else:
+                return 405, {'error': '只支持GET和POST'}
+
+            try:
+                top_n = min(max(int(request.get('top_n') or 10), 1), MAX_TOP_N)
+            except (TypeError, ValueError):
+                return 400, {'error': 'top_n必须是整数'}
+            
+            # 分页：带游标时直接取后续页，不需要画像
+            cursor = request.get('cursor')
+            if cursor is not None or request.get('page_size') is not None:
+                try:
+                    page_size = min(max(int(request.get('page_size') or top_n), 1), MAX_TOP_N)
+                except (TypeError, ValueError):
+                    return 400, {'error': 'page_size必须是整数'}
+                if cursor is not None:
+                    if not isinstance(cursor, str):
+                        return 400, {'error': 'cursor必须是字符串'}
+                    return await self._run(self._recommend_page, None, '', page_size, cursor, budget)
+
+            user_profile = request.get('user_profile')
+            username = request.get('username') or ''
+            if user_profile is None and not (isinstance(username, str) and USERNAME_PATTERN.fullmatch(username)):
+                return 400, {'error': '需要提供user_profile或有效的username'}
+            if user_profile is not None and not isinstance(user_profile, dict):
+                return 400, {'error': 'user_profile必须是JSON对象'}
+
+            if request.get('page_size') is not None:
+                return await self._run(self._recommend_page, user_profile, username, page_size, None, budget)
+            return await self._run(self._recommend, user_profile, username, top_n, budget)
+
+        return 404, {'error': f'未知路径: {path}'}
+
+    def _latency_budget(self, budget_ms):
+        """请求的时间预算（秒）：请求参数优先，否则使用服务级配置"""
+        if budget_ms is None:
+            return self.latency_budget
+        budget = float(budget_ms) / 1000
+        if budget <= 0:
+            raise ValueError(budget_ms)
+        return budget
+
+    def _list_param(self, query, name):
+        """可重复或逗号分隔的查询参数，未提供时返回None"""
+        if name not in query:
+            return None
+        return [item for value in query[name] for item in value.split(',') if item]
+
+    def _leaderboard(self, top_n, categories, trends):
+        with self._leaderboard_lock:
+            if self.leaderboard is None:
+                self.leaderboard = HealthLeaderboard.from_recommender(self.recommender, fetch_missing=False)
+                self.leaderboard.attach(self.recommender)
+        return {'total': len(self.leaderboard),
+                'leaderboard': self.leaderboard.top(top_n, categories=categories, trends=trends)}
+
+    def _analyze(self, username, budget):
+        deadline = time.time() + budget if budget else None
+        return self.recommender.analyze_github_user(username, deadline=deadline)
+
+    def _recommend(self, user_profile, username, top_n, budget=None):
+        """在工作线程中执行：必要时先分析用户，再生成推荐（分析和推荐共用一个截止时间）"""
+        deadline = time.time() + budget if budget else None
+        if user_profile is None:
+            user_profile = self.recommender.analyze_github_user(username, deadline=deadline)
+        recommendations = self.recommender.recommend_projects(user_profile, top_n=top_n, deadline=deadline)
+        return {'user_profile': user_profile, 'recommendations': [rec.to_dict() for rec in recommendations]}
+
+    def _recommend_page(self, user_profile, username, page_size, cursor, budget=None):
+        """分页推荐：首页（cursor为None）分析用户并完整排序，后续页直接从保存的排序中取"""
+        deadline = time.time() + budget if budget else None
+        if cursor is None and user_profile is None:
+            user_profile = self.recommender.analyze_github_user(username, deadline=deadline)
+        page = self.recommender.recommend_page(user_profile, page_size=page_size, cursor=cursor,
+                                               deadline=deadline)
+        result = {'recommendations': [rec.to_dict() for rec in page['recommendations']],
+                  'next_cursor': page['next_cursor'], 'total': page['total']}
+        if cursor is None:
+            result['user_profile'] = user_profile
+        return result
+    
+    async def _run(self, func, *args):
+        """带背压地把阻塞任务交给线程池：排队已满时直接返回503"""
+        if self.in_flight >= self.max_concurrency + self.max_queue:
+            self.stats['rejected'] += 1
+            return 503, {'error': '服务繁忙，请稍后重试'}
+
+        self.in_flight += 1
+        try:
+            async with self.semaphore:
+                result = await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+            return 200, result
+        except CursorError as e:
+            return 410, {'error': str(e)}
+        except Exception as e:
+            self.stats['errors'] += 1
+            return 500, {'error': str(e)}
+        finally:
+            self.in_flight -= 1
+
+
+def serve_forever(host, port, reuse_port=False, recommender_options=None,
+                  max_concurrency=8, max_queue=64, latency_budget=None, cache_gc_options=None, access_log=False):
+    """创建推荐器并运行服务（单个进程）"""
+    if access_log:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s [pid %(process)d] %(message)s")
+    options = dict(recommender_options or {})
+    # transport在各进程内创建（录制存档按行追加，多进程共享同一文件也不会互相覆盖）
+    transport_options = options.pop('transport_options', None)
+    if transport_options:
+        options['transport'] = build_transport(**transport_options)
+    recommender = AdvancedOpenDiggerRecommender(**options)
+    server = RecommendationServer(recommender, max_concurrency=max_concurrency, max_queue=max_queue,
+                                  latency_budget=latency_budget, access_log=access_log)
+    # 后台缓存回收（多进程时由租约保证同一时刻只有一个进程在回收）
+    if cache_gc_options:
+        BackgroundCacheGC("cache", default_ttls(), **cache_gc_options).start()
+
+    async def run():
+        listener = await server.start(host, port, reuse_port=reuse_port)
+        print(f"🚀 推荐服务已启动 (pid {os.getpid()}): http://{host}:{port}")
+        async with listener:
+            await listener.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OpenDigger推荐系统 - HTTP推荐服务")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--processes', type=int, default=1,
+                        help="服务进程数，0表示每个CPU核一个（多进程依赖SO_REUSEPORT）")
+    parser.add_argument('--concurrency', type=int, default=8, help="每个进程同时处理的请求数")
+    parser.add_argument('--queue', type=int, default=64, help="每个进程允许排队的请求数，超出返回503")
+    parser.add_argument('--latency-budget', type=float, default=None,
+                        help="每个请求的时间预算（秒），超出时用过期/默认数据返回降级结果；默认不限")
+    parser.add_argument('--access-log', action='store_true', help="每个请求记录一行访问日志（写入stderr）")
+    parser.add_argument('--cache-gc-interval', type=float, default=0,
+                        help="后台缓存回收间隔（秒），0表示不回收（可改用 cache_gc.py 定时执行）")
+    parser.add_argument('--cache-max-size', default=None, help="缓存磁盘配额（如 500M、2G），超出时按LRU淘汰")
+    parser.add_argument('--token', default=os.environ.get('GITHUB_TOKEN'),
+                        help="GitHub Token（默认读取GITHUB_TOKEN环境变量）")
+    parser.add_argument('--github-api', default=None, help="GitHub API地址（可指向本地替身服务）")
+    parser.add_argument('--opendigger-url', default=None, help="OpenDigger数据地址（可指向本地替身服务）")
+    parser.add_argument('--record', default=None, help="把收到的所有HTTP响应录制到该存档（JSONL）")
+    parser.add_argument('--replay', default=None, help="不访问网络，从该存档回放HTTP响应")
+    parser.add_argument('--replay-latency', default=None, help="回放延迟：'recorded' 或固定秒数")
+    parser.add_argument('--profile-dir', default=None, help="为每个请求输出Chrome trace文件到该目录")
+    parser.add_argument('--snapshot', default=None,
+                        help="从目录预热快照启动（各进程mmap同一文件，见 catalog_snapshot.py）")
+    parser.add_argument('--costar-index', default=None,
+                        help="共同star相似度索引，为推荐加入协同过滤加成（见 costar_index.py）")
+    args = parser.parse_args(argv)
+
+    recommender_options = {
+        'github_token': args.token,
+        'github_api': args.github_api,
+        'opendigger_url': args.opendigger_url,
+        'profile_dir': args.profile_dir,
+        'snapshot': args.snapshot,
+        'costar_index': args.costar_index,
+        'transport_options': {
+            'record': args.record,
+            'replay': args.replay,
+            'latency': parse_latency(args.replay_latency)
+        } if args.record or args.replay else None
+    }
+    processes = args.processes or os.cpu_count() or 1
+    # 多进程时后续页可能落到其他进程，分页排序写入共享的缓存目录
+    recommender_options['shared_rankings'] = processes > 1
+    serve_args = (args.host, args.port)
+    serve_kwargs = {
+        'recommender_options': recommender_options,
+        'max_concurrency': args.concurrency,
+        'max_queue': args.queue,
+        'latency_budget': args.latency_budget,
+        'access_log': args.access_log,
+        'cache_gc_options': {
+            'interval': args.cache_gc_interval,
+            'max_bytes': parse_size(args.cache_max_size)
+        } if args.cache_gc_interval else None
+    }
+
+    if processes == 1:
+        serve_forever(*serve_args, **serve_kwargs)
+        return 0
+
+    # 多进程：每个进程一个事件循环和一份预热状态，由内核在进程间分发连接
+    workers = [
+        multiprocessing.Process(target=serve_forever, args=serve_args,
+                                kwargs=dict(serve_kwargs, reuse_port=True), daemon=True)
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        print("\n👋 推荐服务已停止")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+推荐结果
+每个候选项目只保存分数和对目录记录、指标的引用（__slots__，不复制标签、不构建分项字典），
+推荐理由只为最终返回的前top_n个结果生成。对外仍可像字典一样读取（rec['repo']、rec.get(...)、
+dict(rec)），to_dict() 得到可直接JSON序列化的字典。
+"""
+from collections.abc import Mapping
+
+# 匹配度分项（与 _calculate_high_match_score 的累加顺序一致）
+BREAKDOWN_KEYS = ('skill_match', 'interest_match', 'experience_match',
+                  'quality_bonus', 'competition_bonus', 'hot_tech_bonus', 'collaborative_bonus')
+
+# 可以通过 rec[key] = value 修改的字段
+WRITABLE_FIELDS = ('match_score', 'health_score', 'combined_score', 'recommendation_reason', 'degraded')
+
+
+class Recommendation(Mapping):
+    __slots__ = ('repo', 'project_info', 'metrics', 'match_score', 'health_score', 'combined_score',
+                 'components', 'recommendation_reason', 'degraded')
+
+    def __init__(self, repo, project_info, metrics, match_score, health_score, combined_score,
+                 components, recommendation_reason=None, degraded=None):
+        self.repo = repo
+        self.project_info = project_info
+        self.metrics = metrics
+        self.match_score = match_score
+        self.health_score = health_score
+        self.combined_score = combined_score
+        self.components = components
+        self.recommendation_reason = recommendation_reason
+        self.degraded = degraded
+
+    @property
+    def is_competition_tool(self):
+        return '大赛工具' in self.project_info.get('tags', [])
+
+    @property
+    def score_breakdown(self):
+        """匹配度分项（每次访问新建字典）"""
+        return dict(zip(BREAKDOWN_KEYS, self.components))
+
+    # ========== 字典式访问 ==========
+
+    def __getitem__(self, key):
+        if key == 'degraded' and self.degraded is not None:
+            return self.degraded
+        getter = FIELD_GETTERS.get(key)
+        if getter is None:
+            raise KeyError(key)
+        return getter(self)
+
+    def __setitem__(self, key, value):
+        if key not in WRITABLE_FIELDS:
+            raise KeyError(f"推荐结果字段不可修改: {key}")
+        setattr(self, key, value)
+
+    def __iter__(self):
+        yield from FIELD_GETTERS
+        if self.degraded is not None:
+            yield 'degraded'
+
+    def __len__(self):
+        return len(FIELD_GETTERS) + (self.degraded is not None)
+
+    def __repr__(self):
+        return f"Recommendation({self.repo!r}, match_score={self.match_score:.1f}, " \
+               f"combined_score={self.combined_score:.1f})"
+
+    def copy(self):
+        """浅拷贝（共享目录记录和指标）"""
+        return Recommendation(self.repo, self.project_info, self.metrics, self.match_score,
+                              self.health_score, self.combined_score, self.components,
+                              self.recommendation_reason, self.degraded)
+
+    def to_dict(self):
+        """完整字典（可JSON序列化）"""
+        return {key: self[key] for key in self}
+
+
+# 字典式访问的字段名 -> 取值函数（按需计算，顺序即 to_dict() 的字段顺序）
+FIELD_GETTERS = {
+    'repo': lambda rec: rec.repo,
+    'name': lambda rec: rec.repo.split('/')[-1],
+    'match_score': lambda rec: rec.match_score,
+    'health_score': lambda rec: rec.health_score,
+    'combined_score': lambda rec: rec.combined_score,
+    'category': lambda rec: rec.project_info.get('category', 'unknown'),
+    'tags': lambda rec: rec.project_info.get('tags', []),
+    'description': lambda rec: rec.project_info.get('description', '开源项目'),
+    'difficulty': lambda rec: rec.project_info.get('difficulty', 'intermediate'),
+    'metrics': lambda rec: rec.metrics,
+    'score_breakdown': lambda rec: rec.score_breakdown,
+    'recommendation_reason': lambda rec: rec.recommendation_reason,
+    'is_competition_tool': lambda rec: rec.is_competition_tool
+}
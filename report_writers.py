@@ -0,0 +1,194 @@
+"""
+流式报告写出
+推荐结果和健康度数据逐条写出：NDJSON每行一条记录，Markdown报告边生成边写，
+汇总信息用累加值计算，内存占用与记录条数无关。
+支持字段投影（只写出需要的字段，可用点号指定嵌套字段）和gzip压缩。
+
+用法:
+    with RecommendationReportWriter('output/rec.ndjson.gz', 'output/rec.md', user_profile,
+                                    fields=['repo', 'match_score', 'metrics.activity.value']) as writer:
+        for rec in recommendations:
+            writer.write(rec)
+"""
+import gzip
+import json
+from collections.abc import Mapping
+from datetime import datetime
+
+# 推荐结果默认写出的字段（不含完整的metrics和score_breakdown）
+DEFAULT_RECOMMENDATION_FIELDS = (
+    'username', 'repo', 'match_score', 'health_score', 'combined_score', 'category', 'tags',
+    'difficulty', 'recommendation_reason', 'is_competition_tool', 'is_discovered',
+    'metrics.activity'
+)
+
+COMPRESSIONS = (None, 'gzip')
+
+
+def open_output(path, compression=None):
+    """打开文本输出流；compression为'gzip'或文件名以.gz结尾时写gzip"""
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"不支持的压缩方式: {compression}")
+    if compression == 'gzip' or path.endswith('.gz'):
+        return gzip.open(path, 'wt', encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
+
+
+def parse_fields(value):
+    """解析逗号分隔的字段列表：'all' 或空表示全部字段"""
+    if not value or value == 'all':
+        return None
+    return [field.strip() for field in value.split(',') if field.strip()]
+
+
+def compile_fields(fields):
+    """把字段列表编译成路径元组（None表示不投影）"""
+    if fields is None:
+        return None
+    return [tuple(field.split('.')) for field in fields]
+
+
+def project(record, paths):
+    """按编译好的路径投影记录（字典或推荐结果等映射）；记录中不存在的字段直接跳过"""
+    if paths is None:
+        return record if isinstance(record, dict) else dict(record)
+
+    result = {}
+    for path in paths:
+        value = record
+        for key in path:
+            if not isinstance(value, Mapping) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = result
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            target[path[-1]] = value
+    return result
+
+
+class NDJSONWriter:
+    """逐行写出JSON记录（可投影字段）"""
+
+    def __init__(self, path, fields=None, compression=None):
+        self.path = path
+        self.paths = compile_fields(fields)
+        self.count = 0
+        self._file = open_output(path, compression)
+
+    def write(self, record):
+        self._file.write(json.dumps(project(record, self.paths), ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class MarkdownReportWriter:
+    """增量生成推荐Markdown报告：构造时写报告头，每条推荐写一节，关闭时写汇总"""
+
+    def __init__(self, path, user_profile, compression=None):
+        self.path = path
+        self.count = 0
+        self.discovered = 0
+        self.match_total = 0.0
+        self.health_total = 0.0
+        self._file = open_output(path, compression)
+
+        f = self._file
+        f.write(f"# 开源项目智能推荐报告\n\n")
+        f.write(f"**生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        if 'username' in user_profile:
+            f.write(f"**GitHub用户**: {user_profile['username']}\n")
+        f.write(f"**技能**: {', '.join(user_profile.get('skills', []))}\n")
+        f.write(f"**经验等级**: {user_profile.get('experience_level', 'N/A')}\n\n")
+        f.write(f"## 推荐结果\n\n")
+
+    def write(self, rec):
+        self.count += 1
+        self.match_total += rec['match_score']
+        self.health_total += rec['health_score']
+
+        f = self._file
+        f.write(f"### {self.count}. {rec['repo']}\n")
+        if rec.get('is_discovered'):
+            self.discovered += 1
+            f.write(f"🔍 **新发现项目**\n\n")
+
+        f.write(f"- **匹配度**: {rec['match_score']:.1f}/100\n")
+        f.write(f"- **健康度**: {rec['health_score']:.1f}/100\n")
+        f.write(f"- **类别**: {rec['category']}\n")
+        f.write(f"- **推荐理由**: {rec['recommendation_reason']}\n")
+        f.write(f"- **技术栈**: {', '.join(rec['tags'][:4])}\n")
+
+        metrics = rec.get('metrics', {})
+        if 'activity' in metrics:
+            trend = metrics['activity'].get('trend', 'stable')
+            trend_text = {'up': '📈上升', 'down': '📉下降', 'stable': '➡️稳定'}.get(trend, trend)
+            f.write(f"- **活跃度**: {metrics['activity']['value']:.1f} ({trend_text})\n")
+
+        f.write("\n")
+
+    def summary(self):
+        """按累加值计算的汇总信息"""
+        return {
+            'total_recommendations': self.count,
+            'avg_match_score': self.match_total / self.count if self.count else 0,
+            'avg_health_score': self.health_total / self.count if self.count else 0,
+            'discovered_count': self.discovered
+        }
+
+    def close(self):
+        summary = self.summary()
+        f = self._file
+        f.write(f"## 汇总\n\n")
+        f.write(f"- **推荐数量**: {summary['total_recommendations']}\n")
+        f.write(f"- **平均匹配度**: {summary['avg_match_score']:.1f}\n")
+        f.write(f"- **平均健康度**: {summary['avg_health_score']:.1f}\n")
+        if summary['discovered_count']:
+            f.write(f"- **新发现项目**: {summary['discovered_count']}\n")
+        f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class RecommendationReportWriter:
+    """同时写出推荐NDJSON和Markdown报告（任一路径为None时跳过该输出）"""
+
+    def __init__(self, ndjson_path, markdown_path, user_profile, fields=DEFAULT_RECOMMENDATION_FIELDS,
+                 compression=None):
+        self.ndjson = NDJSONWriter(ndjson_path, fields, compression) if ndjson_path else None
+        self.markdown = MarkdownReportWriter(markdown_path, user_profile, compression) if markdown_path else None
+        self.username = user_profile.get('username')
+
+    def write(self, rec):
+        if self.ndjson:
+            self.ndjson.write(dict(rec, username=self.username) if self.username else rec)
+        if self.markdown:
+            self.markdown.write(rec)
+
+    def close(self):
+        if self.ndjson:
+            self.ndjson.close()
+        if self.markdown:
+            self.markdown.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -6,13 +6,20 @@
 import sys
 import os
 import json
+import argparse
 from datetime import datetime
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from advanced_recommender import AdvancedOpenDiggerRecommender
+from health_leaderboard import HealthLeaderboard
+from report_writers import (DEFAULT_RECOMMENDATION_FIELDS, COMPRESSIONS, NDJSONWriter, RecommendationReportWriter,
+                            parse_fields)
 
-def main():
+def main(output_options=None):
+    # output_options: 结果保存选项（stream/fields/compression，见 parse_args），默认写出完整JSON
+    output_options = output_options or {}
+    
     print("🚀 OpenDigger高级推荐系统 - GitHub分析版")
     print("="*70)
     
@@ -94,32 +101,23 @@ def main():
             # 批量分析模式
             print("\n📊 批量分析项目健康度")
             
-            health_data = []
-            for repo in list(recommender.project_db.keys())[:15]:
-                try:
-                    metrics = recommender._fetch_opendigger_metrics(repo)
-                    health_score = recommender._calculate_health_score(metrics)
-                    
-                    health_data.append({
-                        'repo': repo,
-                        'health_score': health_score,
-                        'activity': metrics.get('activity', {}).get('value', 0),
-                        'contributors': metrics.get('contributors', {}).get('value', 0),
-                        'trend': metrics.get('activity', {}).get('trend', 'stable')
-                    })
-                    
-                    print(f"  ✓ {repo}: 健康度 {health_score:.1f}")
-                except:
-                    print(f"  ✗ {repo}: 分析失败")
+            category = input("按类别过滤（可选，直接回车表示全部）: ").strip() or None
+            
+            # 全目录指标按列构建排行榜（抓取缺失的指标），一次性计算所有项目的健康度
+            board = HealthLeaderboard.from_recommender(recommender, fetch_missing=True)
+            categories = [category] if category else None
+            health_data = board.top(len(board), categories=categories)
+            print(f"  ✓ 已计算 {len(board)} 个项目的健康度")
             
             # 显示健康度排名
             print("\n🏆 项目健康度排名:")
-            health_data.sort(key=lambda x: x['health_score'], reverse=True)
             for i, item in enumerate(health_data[:10], 1):
-                print(f"  {i}. {item['repo']}: {item['health_score']:.1f}分")
+                trend_symbol = "📈" if item['trend'] == 'up' else "📉" if item['trend'] == 'down' else "➡️"
+                print(f"  {i}. {item['repo']}: {item['health_score']:.1f}分 {trend_symbol}")
             
             # 保存结果
-            save_health_data(health_data)
+            save_health_data(health_data, stream=output_options.get('stream', False),
+                             compression=output_options.get('compression'))
             return
         
         else:
@@ -154,7 +152,7 @@ def main():
             print()
         
         # 保存结果
-        save_recommendations(recommendations, user_profile)
+        save_recommendations(recommendations, user_profile, **output_options)
         
         print(f"\n✅ 演示完成！")
         print(f"💾 结果已保存至 output/ 目录")
@@ -166,6 +164,24 @@ def main():
         import traceback
         traceback.print_exc()
 
+def parse_args(argv=None):
+    """解析结果保存选项"""
+    parser = argparse.ArgumentParser(description="OpenDigger高级推荐系统 - GitHub分析版")
+    parser.add_argument('--stream', action='store_true',
+                        help="流式写出NDJSON（每行一条记录），默认写出完整JSON文档")
+    parser.add_argument('--fields', default=None,
+                        help="流式写出时推荐结果的字段（逗号分隔，可用点号指定嵌套字段，'all'为全部字段）")
+    parser.add_argument('--compression', choices=[c for c in COMPRESSIONS if c], default=None,
+                        help="流式写出时的压缩方式")
+    args = parser.parse_args(argv)
+    
+    options = {'stream': args.stream}
+    if args.stream:
+        options['compression'] = args.compression
+        if args.fields is not None:
+            options['fields'] = parse_fields(args.fields)
+    return options
+
 def save_user_profile(profile, username):
     """保存用户画像"""
     os.makedirs("user_data", exist_ok=True)
@@ -177,8 +193,12 @@ def save_user_profile(profile, username):
     
     print(f"💾 用户画像已保存: {filename}")
 
-def save_recommendations(recommendations, user_profile):
-    """保存推荐结果"""
+def save_recommendations(recommendations, user_profile, stream=False, fields=DEFAULT_RECOMMENDATION_FIELDS,
+                         compression=None):
+    """保存推荐结果（stream为True时改为流式写出NDJSON，见 stream_recommendations）"""
+    if stream:
+        return stream_recommendations(recommendations, user_profile, fields, compression)
+    
     os.makedirs("output", exist_ok=True)
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -186,7 +206,7 @@ def save_recommendations(recommendations, user_profile):
     # 保存完整JSON
     json_data = {
         'user_profile': user_profile,
-        'recommendations': recommendations,
+        'recommendations': [dict(rec) for rec in recommendations],
         'generated_at': datetime.now().isoformat(),
         'summary': {
             'total_recommendations': len(recommendations),
@@ -235,8 +255,11 @@ def save_recommendations(recommendations, user_profile):
     print(f"📁 详细结果: {json_file}")
     print(f"📄 报告文件: {md_file}")
 
-def save_health_data(health_data):
-    """保存健康度数据"""
+def save_health_data(health_data, stream=False, fields=None, compression=None):
+    """保存健康度数据（stream为True时改为流式写出NDJSON，每行一个项目）"""
+    if stream:
+        return stream_health_data(health_data, fields, compression)
+    
     os.makedirs("output", exist_ok=True)
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -247,6 +270,39 @@ def save_health_data(health_data):
     
     print(f"💾 健康度数据已保存: {filename}")
 
+def stream_recommendations(recommendations, user_profile, fields=DEFAULT_RECOMMENDATION_FIELDS,
+                           compression=None, markdown=True):
+    """流式保存推荐结果：NDJSON每行一条推荐（按fields投影），可选同时生成Markdown报告"""
+    os.makedirs("output", exist_ok=True)
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    suffix = ".gz" if compression == 'gzip' else ""
+    
+    json_file = f"output/recommendations_{timestamp}.ndjson{suffix}"
+    md_file = f"output/recommendations_{timestamp}.md{suffix}" if markdown else None
+    with RecommendationReportWriter(json_file, md_file, user_profile, fields=fields,
+                                    compression=compression) as writer:
+        for rec in recommendations:
+            writer.write(rec)
+    
+    print(f"📁 详细结果: {json_file}")
+    if md_file:
+        print(f"📄 报告文件: {md_file}")
+
+def stream_health_data(health_data, fields=None, compression=None):
+    """流式保存健康度数据（NDJSON，每行一个项目）"""
+    os.makedirs("output", exist_ok=True)
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    suffix = ".gz" if compression == 'gzip' else ""
+    filename = f"output/project_health_{timestamp}.ndjson{suffix}"
+    
+    with NDJSONWriter(filename, fields, compression) as writer:
+        for item in health_data:
+            writer.write(item)
+    
+    print(f"💾 健康度数据已保存: {filename}")
+
 if __name__ == "__main__":
     # 检查依赖
     try:
@@ -255,4 +311,4 @@ if __name__ == "__main__":
         print("❌ 需要安装requests库: pip install requests")
         sys.exit(1)
     
-    main()
\ No newline at end of file
+    main(parse_args())
\ No newline at end of file
@@ -0,0 +1,212 @@
+"""
+技能词表
+技能、兴趣和项目标签在进入评分前各编译一次为整数编号，评分时只做整数集合运算。
+默认与原有评分逐项一致：写法只做小写比较，每种小写写法一个编号。
+启用别名表（canonical_terms=CANONICAL_TERMS）时，写法先归一化（全角转半角、连字符/下划线/空白统一），
+同一规范术语的不同写法（'前端开发' / '前端' / 'frontend'，'AI/机器学习' / 'ai/人工智能'）共用一个编号，
+召回不再依赖具体写法，但会改变现有分数（同一术语的多种写法只计一次），因此需要显式开启。
+
+兴趣的部分匹配（子串）在收录项目标签时建立子串索引，评分时直接查表。
+
+用法:
+    vocabulary = SkillVocabulary()                 # 与原有评分一致
+    vocabulary = SkillVocabulary(CANONICAL_TERMS)  # 按规范术语匹配
+    vocabulary.add_terms(project_tags)         # 目录标签：未收录的写法分配新编号
+    vocabulary.term_ids(['Python', 'frontend'])  # 画像：未收录的写法不参与匹配
+"""
+import re
+import threading
+import unicodedata
+
+# 规范术语 -> 其他写法（归一化后比较，不必重复列出大小写、连字符/下划线/空格的变体）
+CANONICAL_TERMS = {
+    'Python': ['py', 'python3'],
+    'JavaScript': ['js', 'ecmascript'],
+    'TypeScript': ['ts'],
+    'Java': [],
+    'Go': ['golang'],
+    'Rust': [],
+    'C++': ['cpp'],
+    'React': ['react.js', 'reactjs'],
+    'Vue': ['vue.js', 'vuejs'],
+    'Node.js': ['node', 'nodejs'],
+    'Spring': ['spring framework'],
+    'Spring Boot': ['springboot'],
+    'Docker': [],
+    'Kubernetes': ['k8s'],
+    '人工智能': ['ai', 'artificial intelligence', 'ai/人工智能', 'ai/机器学习'],
+    '机器学习': ['machine learning', 'ml'],
+    '深度学习': ['deep learning'],
+    '神经网络': ['neural network', 'neural networks'],
+    '自然语言处理': ['nlp', 'natural language processing'],
+    '大语言模型': ['llm', 'llms', 'large language model', '大模型'],
+    '数据科学': ['data science'],
+    '数据分析': ['data analysis', 'data analytics', 'analytics'],
+    '数据挖掘': ['data mining'],
+    '数据可视化': ['data visualization', 'visualization', '可视化'],
+    '大数据': ['big data', 'bigdata'],
+    '数据库': ['database', 'db'],
+    '时序数据库': ['time series', 'time series database', 'tsdb', '时序数据'],
+    '物联网': ['iot', 'internet of things'],
+    '工业互联网': ['industrial internet', 'iiot'],
+    '前端开发': ['前端', 'frontend', 'front end'],
+    '后端开发': ['后端', 'backend', 'back end'],
+    'Web开发': ['web', 'web development', 'web dev'],
+    '移动开发': ['mobile', 'mobile development', '移动端'],
+    'DevOps': [],
+    'CI/CD': ['cicd'],
+    '云原生': ['cloud native'],
+    '云计算': ['cloud', 'cloud computing'],
+    '微服务': ['microservices', 'microservice'],
+    'BI': ['bi工具', 'business intelligence'],
+    'UI/UX': ['ui', 'ux'],
+    '开源分析': ['open source analytics'],
+    'OpenDigger': ['open digger'],
+    'IoTDB': [],
+    'DataEase': [],
+    '开发工具': ['dev tools', 'developer tools', 'devtools'],
+    '开源工具': ['open source tools'],
+    '开源开发': ['open source', '开源'],
+}
+
+_SEPARATORS = re.compile(r'[\s_\-]+')
+
+
+def normalize(term):
+    """归一化写法：全角转半角、小写、连字符/下划线/连续空白统一为单个空格"""
+    term = unicodedata.normalize('NFKC', term).lower()
+    return _SEPARATORS.sub(' ', term).strip()
+
+
+class SkillVocabulary:
+    def __init__(self, canonical_terms=None):
+        """
+        canonical_terms: 规范术语 -> 其他写法；为None时不使用别名，写法只做小写比较
+        规范术语按表中顺序编号（0, 1, 2, ...），同一术语的所有写法共用一个编号
+        """
+        self.aliases = canonical_terms is not None
+        self.names = []
+        self._ids = {}
+        self._forms = []
+        self._tag_forms = {}
+        self._substrings = {'': set()}  # 项目标签写法的子串 -> 标签编号集合
+        self._lock = threading.Lock()
+        for name, aliases in (canonical_terms or {}).items():
+            term_id = len(self.names)
+            self.names.append(name)
+            self._forms.append([])
+            for form in [name, *aliases]:
+                self._add_form(self.normalize(form), term_id)
+
+    def normalize(self, term):
+        """比较用的写法：启用别名时完整归一化，否则只转小写"""
+        return normalize(term) if self.aliases else term.lower()
+
+    def _add_form(self, form, term_id):
+        """登记写法：写法 -> 编号，以及编号 -> 全部写法（供部分匹配使用）"""
+        if form not in self._ids:
+            self._forms[term_id].append(form)
+        self._ids[form] = term_id
+
+    def _add_tag_form(self, form, term_id):
+        """登记项目标签写法，并把它的全部子串加入子串索引"""
+        if self._tag_forms.get(form) == term_id:
+            return
+        self._tag_forms[form] = term_id
+        substrings = self._substrings
+        substrings[''].add(term_id)
+        for start in range(len(form)):
+            for end in range(start + 1, len(form) + 1):
+                substrings.setdefault(form[start:end], set()).add(term_id)
+
+    def __len__(self):
+        return len(self.names)
+
+    def term_id(self, term):
+        """写法对应的编号，未收录时返回None"""
+        return self._ids.get(self.normalize(term))
+
+    def term_ids(self, terms):
+        """多个写法的编号（去重并保持首次出现顺序，跳过未收录的写法）"""
+        ids = (self._ids.get(self.normalize(term)) for term in terms)
+        return tuple(dict.fromkeys(term_id for term_id in ids if term_id is not None))
+
+    def raw_ids(self, terms):
+        """
+        按原样写法比较时的编号：不使用别名时只有本身已是小写的写法参与
+        （原有评分中大赛工具标签不转小写就与小写的规则比较）
+        """
+        ids = (self._ids.get(self.normalize(term)) for term in terms
+               if self.aliases or term == term.lower())
+        return frozenset(term_id for term_id in ids if term_id is not None)
+
+    def key(self, term):
+        """
+        写法的比较形式：启用别名时为规范术语的归一化名称（未收录时为归一化后的写法），
+        否则为原样写法（与原有的字符串比较一致）
+        """
+        if not self.aliases:
+            return term
+        form = normalize(term)
+        term_id = self._ids.get(form)
+        return form if term_id is None else normalize(self.names[term_id])
+
+    def add_terms(self, terms, tag=True):
+        """
+        收录目录中出现的写法，返回编号元组
+        1. 已收录的写法直接返回编号
+        2. 未收录的写法作为新的规范术语分配编号
+        3. tag为True时记录为项目标签写法并加入子串索引，供兴趣的部分匹配使用
+        """
+        with self._lock:
+            ids = []
+            for term in terms:
+                form = self.normalize(term)
+                term_id = self._ids.get(form)
+                if term_id is None:
+                    term_id = len(self.names)
+                    self.names.append(term)
+                    self._forms.append([])
+                    self._add_form(form, term_id)
+                if tag:
+                    self._add_tag_form(form, term_id)
+                ids.append(term_id)
+            return tuple(dict.fromkeys(ids))
+
+    def to_dict(self):
+        """可序列化的词表状态（编号与当前进程一致，供目录快照使用）"""
+        with self._lock:
+            return {'aliases': self.aliases, 'names': list(self.names), 'forms': dict(self._ids),
+                    'tag_forms': dict(self._tag_forms)}
+
+    @classmethod
+    def from_dict(cls, data):
+        """从 to_dict() 的结果恢复词表（子串索引按标签写法重建）"""
+        vocabulary = cls(CANONICAL_TERMS if data['aliases'] else None)
+        vocabulary.names = list(data['names'])
+        vocabulary._forms = [[] for _ in vocabulary.names]
+        vocabulary._ids = {}
+        for form, term_id in data['forms'].items():
+            vocabulary._add_form(form, term_id)
+        for form, term_id in data['tag_forms'].items():
+            vocabulary._add_tag_form(form, term_id)
+        return vocabulary
+
+    def surface_forms(self, term):
+        """
+        部分匹配使用的写法：用户自己的写法（比较形式），启用别名时加上同一规范术语的其他写法
+        其他写法中不足3个字符的纯ASCII缩写（ts、ui、db等）不参与，避免误匹配'charts'之类的标签
+        """
+        form = self.normalize(term)
+        term_id = self._ids.get(form)
+        if term_id is None or not self.aliases:
+            return (form,)
+        aliases = (alias for alias in self._forms[term_id]
+                   if alias != form and (len(alias) >= 3 or not alias.isascii()))
+        return (form, *aliases)
+
+    def tags_containing(self, term):
+        """用户写法（及同一术语的其他写法）作为子串出现在哪些项目标签中，返回标签编号集合"""
+        with self._lock:
+            matches = [self._substrings.get(form, ()) for form in self.surface_forms(term)]
+            return frozenset().union(*matches)
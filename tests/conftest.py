@@ -0,0 +1,64 @@
+import os
+import sys
+import random
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """缓存和画像目录都建在各测试自己的临时目录下"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self.headers = {}
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class FakeTransport:
+    """
+    离线transport：OpenDigger指标按URL生成固定的伪随机月度数据，GitHub接口返回404
+    fail_hosts 中的主机直接抛出连接错误；calls 记录收到的请求
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.fail_hosts = set()
+
+    def __call__(self, method, url, **kwargs):
+        self.calls.append(url)
+        if any(host in url for host in self.fail_hosts):
+            raise ConnectionError(f"unreachable: {url}")
+        if '/open_digger/' in url:
+            rnd = random.Random(url)
+            return FakeResponse(200, {'2024-01': rnd.uniform(1, 100), '2024-02': rnd.uniform(1, 100)})
+        return FakeResponse(404, {'message': 'Not Found'})
+
+
+@pytest.fixture
+def transport():
+    return FakeTransport()
+
+
+@pytest.fixture
+def recommender(transport):
+    from advanced_recommender import AdvancedOpenDiggerRecommender
+    return AdvancedOpenDiggerRecommender(transport=transport)
+
+
+@pytest.fixture
+def user_profile():
+    return {
+        'skills': ['Python', '机器学习', 'JavaScript', 'Java'],
+        'interests': ['AI/机器学习', 'Web开发', '数据分析'],
+        'experience_level': 'intermediate'
+    }
@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+import cache_codec
+
+
+@pytest.mark.parametrize('compression', [None, 'zlib', 'gzip'])
+def test_round_trip(tmp_path, compression):
+    data = {'repo': 'apache/iotdb', 'metrics': {'activity': {'value': 12.5, 'trend': 'up'}}, 'tags': ['物联网']}
+    path = str(tmp_path / 'entry.json')
+    cache_codec.write_file(path, data, compression)
+    with open(path, 'rb') as f:
+        assert f.read(len(cache_codec.MAGIC)) == cache_codec.MAGIC
+    assert cache_codec.read_file(path) == data
+
+
+def test_reads_legacy_plain_json(tmp_path):
+    # 旧版本用 json.dump(..., indent=2) 写出的缓存文件没有版本头
+    data = {'login': 'octocat', 'public_repos': 8, 'bio': '开源爱好者'}
+    path = tmp_path / 'legacy.json'
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+    assert cache_codec.read_file(str(path)) == data
+    assert cache_codec.decode(memoryview(path.read_bytes())) == data
+
+
+def test_rejects_newer_format_and_truncated_payload():
+    payload = cache_codec.encode({'a': 1}, 'zlib')
+    newer = payload[:len(cache_codec.MAGIC)] + bytes([cache_codec.FORMAT_VERSION + 1]) + payload[len(cache_codec.MAGIC) + 1:]
+    with pytest.raises(ValueError):
+        cache_codec.decode(newer)
+    with pytest.raises(cache_codec.DECODE_ERRORS):
+        cache_codec.decode(payload[:-4])
@@ -0,0 +1,58 @@
+import os
+import time
+import multiprocessing
+
+from cache_lease import CacheLease
+
+
+def _acquire(path, ttl, results):
+    results.put(CacheLease(path, ttl=ttl).acquire())
+
+
+def test_exclusive_until_released(workdir):
+    first = CacheLease('entry.json')
+    second = CacheLease('entry.json')
+    assert first.acquire()
+    assert not second.acquire()
+    assert second.held()
+
+    pid, nonce = open(first.path).read().split()
+    assert pid == str(os.getpid()) and nonce
+
+    first.release()
+    assert not os.path.exists(first.path)
+    assert second.acquire()
+    second.release()
+
+
+def test_expired_lease_taken_over_by_one_process(workdir):
+    path = 'entry.json'
+    with open(path + '.lease', 'w') as f:
+        f.write("1 crashed\n")
+    os.utime(path + '.lease', (0, 0))
+
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_acquire, args=(path, 5, results)) for _ in range(6)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert sum(results.get() for _ in workers) == 1
+    assert not [name for name in os.listdir('.') if name.startswith('.tmp_')]
+
+
+def test_release_and_renew_check_ownership(workdir):
+    stale = CacheLease('entry.json', ttl=0.05)
+    assert stale.acquire()
+    time.sleep(0.1)
+
+    fresh = CacheLease('entry.json', ttl=0.05)
+    assert fresh.acquire()
+    # 原持有者的租约已被接管：续期失败，释放不会删除新持有者的租约
+    assert not stale.renew()
+    stale.release()
+    assert open(fresh.path).read().strip() == fresh.token
+
+    assert fresh.renew()
+    fresh.release()
+    assert not os.path.exists(fresh.path)
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_success()
+    assert breaker.failures == 0
+
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_half_open_allows_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    # 探测失败：重新熔断
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    time.sleep(0.06)
+
+    # 探测成功：恢复
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_open_host_fails_fast(recommender, transport):
+    transport.fail_hosts.add('oss.x-lab.info')
+    recommender.circuit_breakers.failure_threshold = 2
+    url = f"{recommender.opendigger_url}/apache/iotdb/activity.json"
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            recommender._http_request('GET', url)
+    calls = len(transport.calls)
+
+    with pytest.raises(CircuitOpenError):
+        recommender._http_request('GET', url)
+    assert len(transport.calls) == calls
+    # 其他主机不受影响
+    assert recommender._http_request('GET', f"{recommender.github_api}/users/octocat").status_code == 404
+
+
+def test_negative_cache_expires_after_its_own_ttl(recommender, transport):
+    recommender.NOT_FOUND_CACHE_TTL = 0.2
+    assert recommender._fetch_github_data('/users/nobody') is None
+    assert recommender._fetch_github_data('/users/nobody') is None
+    assert len(transport.calls) == 1
+
+    time.sleep(0.3)
+    assert recommender._fetch_github_data('/users/nobody') is None
+    assert len(transport.calls) == 2
@@ -0,0 +1,69 @@
+import random
+from collections import Counter
+
+import pytest
+
+from heavy_hitters import SpaceSaving
+
+
+def zipf_stream(n, items, seed):
+    rnd = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(items)]
+    return rnd.choices(range(items), weights=weights, k=n)
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_error_bounds(seed):
+    stream = zipf_stream(20000, 2000, seed)
+    sketch = SpaceSaving(100)
+    for item in stream:
+        sketch.update(item)
+    exact = Counter(stream)
+
+    assert len(sketch) == 100
+    assert sketch.total == len(stream)
+    bound = sketch.total / sketch.capacity
+    for item, count, error in sketch.top():
+        assert exact[item] <= count <= exact[item] + error
+        assert error <= bound
+    # 真实权重超过 W/m 的项一定被跟踪
+    for item, weight in exact.items():
+        if weight > bound:
+            assert item in sketch
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_guaranteed_top_is_in_true_top(seed):
+    stream = zipf_stream(20000, 2000, seed)
+    sketch = SpaceSaving(100)
+    for item in stream:
+        sketch.update(item)
+    exact = Counter(stream)
+
+    for k in (1, 5, 15):
+        guaranteed = sketch.guaranteed_top(k)
+        assert guaranteed
+        kth_weight = exact.most_common(k)[-1][1]
+        for item in guaranteed:
+            assert exact[item] >= kth_weight
+
+
+def test_exact_below_capacity_and_weighted_updates():
+    sketch = SpaceSaving(10)
+    for item, weight in [('python', 3), ('java', 1), ('python', 2), ('go', 4), ('java', 0)]:
+        sketch.update(item, weight)
+    assert sketch.most_common() == [('python', 5), ('go', 4), ('java', 1)]
+    assert all(error == 0 for _, _, error in sketch.top())
+    assert sketch.guaranteed_top(2) == ['python', 'go']
+
+
+def test_round_trip():
+    sketch = SpaceSaving(5)
+    for item in 'abracadabra-alakazam':
+        sketch.update(item)
+    restored = SpaceSaving.from_dict(sketch.to_dict())
+    assert restored.top() == sketch.top()
+    assert restored.total == sketch.total
+    restored.update('z')
+    sketch.update('z')
+    assert restored.top() == sketch.top()
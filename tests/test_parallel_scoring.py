@@ -0,0 +1,22 @@
+import time
+
+from parallel_scoring import ParallelScorer
+
+
+def ranking(recs):
+    return [(rec['repo'], round(rec['match_score'], 6), round(rec['combined_score'], 6)) for rec in recs]
+
+
+def test_matches_sequential_scoring(recommender, user_profile):
+    profiles = [
+        user_profile,
+        {'skills': ['Java', '大数据', '物联网'], 'interests': ['物联网'], 'experience_level': 'beginner'},
+        {'skills': ['JavaScript', 'React'], 'interests': ['Web开发', '前端'], 'experience_level': 'advanced'},
+        {'skills': [], 'interests': [], 'experience_level': 'intermediate'}
+    ]
+    expected = [ranking(recommender.recommend_projects(profile, top_n=8)) for profile in profiles]
+
+    with ParallelScorer(recommender, processes=2) as scorer:
+        assert [ranking(recs) for recs in scorer.recommend_batch(profiles, top_n=8)] == expected
+        deadline = time.time() + 30
+        assert ranking(scorer.recommend(user_profile, 8, deadline=deadline)) == expected[0]
@@ -0,0 +1,59 @@
+import pytest
+
+from ranking_pages import CursorError, RankingStore
+
+
+def summary(recs):
+    return [(rec['repo'], rec['match_score'], rec['health_score'], rec['combined_score'],
+             rec['score_breakdown'], rec['recommendation_reason']) for rec in recs]
+
+
+@pytest.mark.parametrize('page_size', [1, 4, 7])
+def test_pages_match_recommend_projects(recommender, user_profile, page_size):
+    expected = recommender.recommend_projects(user_profile, top_n=len(recommender.project_db))
+
+    pages = []
+    page = recommender.recommend_page(user_profile, page_size=page_size)
+    assert page['total'] == len(expected)
+    while True:
+        assert len(page['recommendations']) <= page_size
+        pages.append(page['recommendations'])
+        if page['next_cursor'] is None:
+            break
+        page = recommender.recommend_page(cursor=page['next_cursor'], page_size=page_size)
+
+    for i, recs in enumerate(pages):
+        assert summary(recs) == summary(expected[i * page_size:(i + 1) * page_size])
+
+
+def test_shared_rankings_served_by_another_process(transport, user_profile):
+    from advanced_recommender import AdvancedOpenDiggerRecommender
+    first = AdvancedOpenDiggerRecommender(transport=transport, shared_rankings=True)
+    other = AdvancedOpenDiggerRecommender(transport=transport, shared_rankings=True)
+
+    page = first.recommend_page(user_profile, page_size=5)
+    expected = first.recommend_page(cursor=page['next_cursor'], page_size=5)
+    assert summary(other.recommend_page(cursor=page['next_cursor'], page_size=5)['recommendations']) == \
+        summary(expected['recommendations'])
+
+
+def test_invalid_and_changed_catalog_cursors(recommender, user_profile):
+    with pytest.raises(CursorError):
+        recommender.recommend_page(cursor='not a cursor')
+
+    page = recommender.recommend_page(user_profile, page_size=5)
+    recommender.project_db['example/new'] = {'tags': ['Python'], 'category': 'tools', 'difficulty': 'beginner',
+                                             'description': 'new project'}
+    recommender.catalog_version += 1
+    with pytest.raises(CursorError):
+        recommender.recommend_page(cursor=page['next_cursor'], page_size=5)
+
+
+def test_store_bounded_by_total_items(recommender, user_profile):
+    recommender.rankings = RankingStore(max_items=20, ttl=600)
+    first = recommender.recommend_page(user_profile, page_size=5)
+    second = recommender.recommend_page(user_profile, page_size=5)
+    # 每份排序15条：放入第二份后第一份被淘汰
+    with pytest.raises(CursorError):
+        recommender.recommend_page(cursor=first['next_cursor'], page_size=5)
+    assert recommender.recommend_page(cursor=second['next_cursor'], page_size=5)['recommendations']
@@ -0,0 +1,57 @@
+from skill_vocabulary import CANONICAL_TERMS, SkillVocabulary, normalize
+
+
+def test_normalize():
+    assert normalize('Ｐｙｔｈｏｎ') == 'python'
+    assert normalize('  Spring_Boot ') == 'spring boot'
+    assert normalize('time-series') == normalize('Time Series')
+
+
+def test_aliases_resolve_to_canonical_term():
+    vocabulary = SkillVocabulary(CANONICAL_TERMS)
+    assert vocabulary.term_id('前端') == vocabulary.term_id('前端开发') == vocabulary.term_id('Frontend')
+    assert vocabulary.term_id('golang') == vocabulary.term_id('Go')
+    assert vocabulary.term_id('AI/机器学习') == vocabulary.term_id('ai/人工智能') == vocabulary.term_id('AI')
+    assert vocabulary.key('frontend') == vocabulary.key('前端开发') == normalize('前端开发')
+    assert vocabulary.term_ids(['py', 'Python', 'unknown-skill', 'js']) == (
+        vocabulary.term_id('Python'), vocabulary.term_id('JavaScript'))
+
+
+def test_catalog_tags_share_alias_ids():
+    vocabulary = SkillVocabulary(CANONICAL_TERMS)
+    tag_ids = vocabulary.add_terms(['Python', 'database', '数据库', '时序数据'])
+    assert tag_ids == (vocabulary.term_id('python'), vocabulary.term_id('数据库'), vocabulary.term_id('时序数据库'))
+    # 新写法分配新编号
+    new_id, = vocabulary.add_terms(['Flink'])
+    assert new_id == len(vocabulary) - 1 and vocabulary.term_id('flink') == new_id
+
+
+def test_tags_containing_uses_aliases():
+    vocabulary = SkillVocabulary(CANONICAL_TERMS)
+    vocabulary.add_terms(['前端', 'charts', '可视化平台', 'Java'])
+    frontend = vocabulary.term_id('前端开发')
+    assert frontend in vocabulary.tags_containing('frontend')
+    # 不足3个字符的ASCII缩写不参与部分匹配
+    assert vocabulary.tags_containing('TypeScript') == frozenset()
+    assert vocabulary.term_id('可视化平台') in vocabulary.tags_containing('数据可视化')
+
+
+def test_exact_mode_compares_lowercase_forms():
+    vocabulary = SkillVocabulary()
+    vocabulary.add_terms(['前端', 'React', 'Web'])
+    assert vocabulary.term_id('前端开发') is None
+    assert vocabulary.term_id('REACT') == vocabulary.term_id('react')
+    assert vocabulary.key('Web开发') == 'Web开发'
+    assert vocabulary.tags_containing('前端开发') == frozenset()
+    assert vocabulary.tags_containing('we') == {vocabulary.term_id('web')}
+    # 按原样比较时只有本身是小写的写法参与
+    assert vocabulary.raw_ids(['React', 'react', 'Web']) == {vocabulary.term_id('react')}
+
+
+def test_round_trip_rebuilds_substring_index():
+    vocabulary = SkillVocabulary(CANONICAL_TERMS)
+    vocabulary.add_terms(['数据可视化', 'dashboard'])
+    restored = SkillVocabulary.from_dict(vocabulary.to_dict())
+    assert restored.aliases and restored.names == vocabulary.names
+    assert restored.tags_containing('dash') == vocabulary.tags_containing('dash')
+    assert restored.term_id('visualization') == vocabulary.term_id('数据可视化')
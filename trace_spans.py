@@ -0,0 +1,148 @@
+"""
+按请求的性能剖析
+记录嵌套的计时区间（span），输出Chrome trace JSON（chrome://tracing、Perfetto可直接打开）
+或火焰图工具使用的折叠栈格式。未开启剖析时 span() 几乎没有开销。
+
+用法:
+    with trace_spans.profiling('trace.json'):
+        recommender.recommend_projects(profile)
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# 当前生效的剖析器，以及当前所在的span路径（随上下文传递到工作线程）
+_current_tracer = contextvars.ContextVar('trace_spans_tracer', default=None)
+_current_path = contextvars.ContextVar('trace_spans_path', default=())
+
+
+class Tracer:
+    """收集一次请求内的所有span"""
+
+    def __init__(self, name='request'):
+        self.name = name
+        self.origin = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def record(self, path, started, ended, args):
+        with self._lock:
+            self.spans.append((path, started, ended, threading.get_ident(), args))
+
+    def to_chrome_trace(self):
+        """转换为Chrome trace事件格式（完整事件 ph='X'，时间单位微秒）"""
+        pid = os.getpid()
+        events = [{
+            'name': path[-1],
+            'cat': self.name,
+            'ph': 'X',
+            'ts': round((started - self.origin) * 1e6, 3),
+            'dur': round((ended - started) * 1e6, 3),
+            'pid': pid,
+            'tid': tid,
+            'args': args
+        } for path, started, ended, tid, args in self.spans]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def to_folded(self):
+        """转换为折叠栈格式（每行 'a;b;c 自身耗时微秒'），可交给flamegraph.pl等工具"""
+        total = defaultdict(float)
+        for path, started, ended, tid, args in self.spans:
+            total[path] += ended - started
+
+        # 自身耗时 = 总耗时 - 直接子span耗时
+        self_time = dict(total)
+        for path, duration in total.items():
+            if len(path) > 1 and path[:-1] in self_time:
+                self_time[path[:-1]] -= duration
+
+        return "\n".join(
+            f"{';'.join(path)} {max(int(seconds * 1e6), 0)}"
+            for path, seconds in sorted(self_time.items())
+        ) + "\n"
+
+    def write(self, path):
+        """写出trace文件：.folded / .txt 为折叠栈，其余为Chrome trace JSON"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(path, 'w', encoding='utf-8') as f:
+            if path.endswith(('.folded', '.txt')):
+                f.write(self.to_folded())
+            else:
+                json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'token', 'started')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.token = _current_path.set(_current_path.get() + (self.name,))
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ended = time.perf_counter()
+        path = _current_path.get()
+        _current_path.reset(self.token)
+        self.tracer.record(path, self.started, ended, self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+def span(name, **args):
+    """开启一个计时区间；未开启剖析时返回空操作对象"""
+    tracer = _current_tracer.get()
+    if tracer is None:
+        return NULL_SPAN
+    return _Span(tracer, name, args)
+
+
+def active():
+    """当前上下文是否开启了剖析"""
+    return _current_tracer.get() is not None
+
+
+def bind(func):
+    """把当前上下文（剖析器和span路径）绑定到函数上，用于提交到线程池"""
+    if _current_tracer.get() is None:
+        return func
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
+
+
+@contextmanager
+def profiling(path=None, name='request'):
+    """在上下文内开启剖析；结束时写出trace文件（提供path时）"""
+    tracer = Tracer(name)
+    tracer_token = _current_tracer.set(tracer)
+    path_token = _current_path.set(())
+    try:
+        yield tracer
+    finally:
+        _current_path.reset(path_token)
+        _current_tracer.reset(tracer_token)
+        if path:
+            tracer.write(path)